@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Upload-path load test against a local fake platform server
+
+Builds a synthetic catalog (random-content videos, captions and a schedule
+for today) in a scratch directory, points YouTube at the fake server's
+resumable endpoint and every Instagram account at FakeInstagramClient, then
+publishes each slot through SocialMediaAgent and reports slot latency
+percentiles and upload throughput. Nothing is posted to real accounts.
+
+Usage:
+    python load_test.py --videos 300 --size-mb 2 --concurrency 4
+    python load_test.py --latency 0.05 --bandwidth-mbps 400 --error-rate 0.02
+    python load_test.py --rate-limit instagram=600 --rate-limit youtube=300 --json report.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import yaml
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from modules.fake_platform import FakePlatformServer, FakeInstagramClient
+from modules.instagram_sessions import InstagramSessionPool
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def build_catalog(videos_dir, count, size_mb, seed):
+    """
+    Write `count` random-content videos of about size_mb each
+
+    Returns:
+        VIDEO_CONFIG-style catalog {filename: {'captions': [...]}}
+    """
+    rng = random.Random(seed)
+    os.makedirs(videos_dir, exist_ok=True)
+    catalog = {}
+    for i in range(count):
+        name = f"loadtest_{i:04d}.mp4"
+        # Vary sizes +-50% so uploads do not finish in lockstep
+        remaining = max(1, int(size_mb * 1024 * 1024 * rng.uniform(0.5, 1.5)))
+        with open(os.path.join(videos_dir, name), 'wb') as f:
+            while remaining:
+                block = os.urandom(min(remaining, 1024 * 1024))
+                f.write(block)
+                remaining -= len(block)
+        catalog[name] = {'captions': [f"Load test video {i}, caption {n} #loadtest #shorts"
+                                      for n in range(3)]}
+    return catalog
+
+
+def write_config(path, workdir, server, accounts, targets, args):
+    """config.yaml for the agent: fake endpoints, fast retries, no client-side pacing"""
+    unlimited = {'per_second': 10000, 'burst': 10000}
+    config = {
+        'instagram': {
+            'enabled': bool(accounts),
+            'accounts': [{'name': name, 'username': name, 'password': 'loadtest'} for name in accounts],
+            'sessions_dir': os.path.join(workdir, 'sessions')
+        },
+        'youtube': {
+            'enabled': 'youtube' in targets,
+            'upload_url': server.upload_url,
+            'chunk_size_mb': args.chunk_mb,
+            'max_resumes': 50,
+            'request_timeout': 60
+        },
+        'tiktok': {'enabled': False},
+        'video': {'auto_compress': args.prepare},
+        'cache': {'prepared_dir': os.path.join(workdir, 'cache', 'prepared')},
+        'jobs': {'db_path': os.path.join(workdir, 'upload_jobs.db')},
+        # Measure retries, not waiting: the server is what rate limits here
+        'retry': {'max_attempts': args.max_attempts, 'base_delay': 0.2, 'max_delay': 5,
+                  'rate_limit_delay': 1, 'max_elapsed': 300,
+                  'failure_threshold': 1000, 'reset_timeout': 1},
+        'rate_limits': {'instagram': unlimited, 'youtube': unlimited, 'max_wait': 600,
+                        **({'bandwidth_mbps': args.client_mbps} if args.client_mbps else {})},
+        'upload': {'max_workers': max(4, len(targets) * args.concurrency),
+                   'concurrency': {target: args.concurrency for target in targets},
+                   'default_timeout': 900}
+    }
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def run(args):
+    """Run one load test and return the report dictionary"""
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    cwd = os.getcwd()
+    # Logs, caches and the job database all land in the scratch directory
+    os.chdir(workdir)
+    try:
+        return _run(args, workdir)
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(args, workdir):
+    from main import SocialMediaAgent
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    accounts = [f"loadtest{n}" for n in range(args.instagram_accounts)]
+    targets = [f"instagram:{name}" for name in accounts]
+    if args.youtube:
+        targets.append('youtube')
+    if not targets:
+        raise SystemExit("No upload targets (use --instagram-accounts and/or --youtube)")
+
+    rate_limits = {}
+    for item in args.rate_limit:
+        platform, _, per_minute = item.partition('=')
+        rate_limits[platform] = float(per_minute)
+
+    videos_dir = os.path.join(workdir, 'videos')
+    print(f"Building {args.videos} synthetic videos of ~{args.size_mb}MB in {videos_dir}...")
+    catalog = build_catalog(videos_dir, args.videos, args.size_mb, args.seed)
+
+    # One slot per video, today, a minute apart
+    names = list(catalog)
+    upload_times = [f"{i // 60 % 24:02d}:{i % 60:02d}" for i in range(len(names))]
+    schedule = {datetime.now().weekday(): names}
+
+    server = FakePlatformServer(
+        latency=args.latency,
+        bandwidth=args.bandwidth_mbps * 1_000_000 / 8 if args.bandwidth_mbps else None,
+        error_rate=args.error_rate,
+        rate_limits=rate_limits,
+        seed=args.seed
+    ).start()
+    try:
+        config_path = os.path.join(workdir, 'config.yaml')
+        write_config(config_path, workdir, server, accounts, targets, args)
+        agent = SocialMediaAgent(config_path, video_config=catalog, daily_schedule=schedule,
+                                 upload_times=upload_times, platforms=targets, videos_dir=videos_dir)
+
+        if accounts:
+            uploader = agent.uploader
+            throttle = uploader.bandwidth.throttle if uploader.bandwidth else None
+            sessions = InstagramSessionPool(
+                {name: {'username': name, 'password': 'loadtest'} for name in accounts},
+                sessions_dir=os.path.join(workdir, 'sessions'),
+                client_factory=lambda: FakeInstagramClient(server.base_url, throttle=throttle)
+            )
+            sessions.warm()
+            uploader.register_backend('instagram', sessions)
+
+        def publish(index):
+            start = time.monotonic()
+            slot = agent._today_slot(index)
+            if not slot:
+                return index, time.monotonic() - start, None
+            video_filename, video_path, video_data, slot_id = slot
+            # Synthetic videos are not decodable; upload them as they are
+            prepared = None if args.prepare else {target: video_path for target in targets}
+            try:
+                results = agent._publish(video_filename, video_path, video_data, slot_id, prepared)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Slot {index} failed: {e}")
+                results = None
+            return index, time.monotonic() - start, results
+
+        print(f"Publishing {len(names)} slots to {', '.join(targets)} "
+              f"with {args.concurrency} concurrent slots...")
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            outcomes = list(executor.map(publish, range(len(names))))
+        wall = max(time.monotonic() - start, 1e-6)
+        server_stats = server.stats()
+    finally:
+        server.stop()
+
+    latencies = [seconds for _, seconds, _ in outcomes]
+    ok = [results for _, _, results in outcomes
+          if results and all(result.get('success') for result in results.values())]
+    uploads = [result for _, _, results in outcomes if results for result in results.values()]
+    retries = sum(max(result.get('attempts', 1) - 1, 0) for result in uploads)
+    errors = Counter(result.get('error', 'Unknown error') for result in uploads if not result.get('success'))
+    payload = sum(os.path.getsize(os.path.join(videos_dir, name)) for name in names) * len(targets)
+
+    return {
+        'slots': len(names),
+        'slots_ok': len(ok),
+        'targets': targets,
+        'concurrency': args.concurrency,
+        'wall_seconds': round(wall, 2),
+        'latency': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies, default=0), 3)
+        },
+        'bytes_received': server_stats['bytes_received'],
+        'payload_bytes': payload,
+        'bytes_per_second': round(server_stats['bytes_received'] / wall),
+        'posts_per_second': round(server_stats['posts'] / wall, 2),
+        'retries': retries,
+        'errors': dict(errors.most_common(5)),
+        'server': server_stats
+    }
+
+
+def print_report(report):
+    latency = report['latency']
+    mb = 1024 * 1024
+    print('=' * 70)
+    print('UPLOAD LOAD TEST')
+    print('=' * 70)
+    print(f"Slots: {report['slots']} ({report['slots_ok']} ok, "
+          f"{report['slots'] - report['slots_ok']} failed) on {len(report['targets'])} targets, "
+          f"concurrency {report['concurrency']}")
+    print(f"Slot latency: p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  "
+          f"p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    print(f"Throughput: {report['bytes_per_second'] / mb:.1f} MB/s "
+          f"({report['bytes_received'] / mb:.0f}MB received for {report['payload_bytes'] / mb:.0f}MB "
+          f"of posts in {report['wall_seconds']:.1f}s), {report['posts_per_second']} posts/s")
+    server = report['server']
+    print(f"Server: {server['requests']} requests, {server['injected_errors']} injected errors, "
+          f"{server['rate_limited']} rate limited; client retries: {report['retries']}")
+    for error, count in report['errors'].items():
+        print(f"  {count} x {error}")
+    print('=' * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the upload path against a local fake platform')
+    parser.add_argument('--videos', type=int, default=200, help='Synthetic catalog size (one slot each)')
+    parser.add_argument('--size-mb', type=float, default=2, help='Average video size')
+    parser.add_argument('--concurrency', type=int, default=4, help='Slots published at once')
+    parser.add_argument('--instagram-accounts', type=int, default=2, help='Fake Instagram accounts')
+    parser.add_argument('--no-youtube', dest='youtube', action='store_false', help='Skip YouTube')
+    parser.add_argument('--chunk-mb', type=int, default=1, help='YouTube resumable chunk size')
+    parser.add_argument('--latency', type=float, default=0.0, help='Server latency per request (seconds)')
+    parser.add_argument('--bandwidth-mbps', type=float, help='Server ingest cap (megabits/s)')
+    parser.add_argument('--client-mbps', type=float, help='Client upload cap (rate_limits.bandwidth_mbps)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failed with 503')
+    parser.add_argument('--rate-limit', action='append', default=[], metavar='PLATFORM=PER_MINUTE',
+                        help='Server request limit, answered with 429 + Retry-After')
+    parser.add_argument('--max-attempts', type=int, default=5, help='Upload attempts per target')
+    parser.add_argument('--prepare', action='store_true',
+                        help='Run real preparation (needs ffmpeg and decodable videos)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the report to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch directory')
+    parser.add_argument('--verbose', action='store_true', help='Show agent logs')
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['slots_ok'] == report['slots'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
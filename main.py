@@ -10,10 +10,13 @@ import logging
 import schedule
 from datetime import datetime, timedelta
 from typing import Optional
-import json
 
 from video_config import VIDEO_CONFIG, DAILY_SCHEDULE, UPLOAD_TIMES, PLATFORMS
-from modules import VideoUploader
+from modules import VideoUploader, VideoProcessor
+from modules.prefetcher import SlotPrefetcher
+from modules.fanout import UploadFanout
+from modules.pipeline import Pipeline, Stage
+from modules.job_store import JobStore, PREPARING, UPLOADING, PUBLISHED, FAILED
 
 # Setup logging
 def setup_logging():
@@ -37,16 +40,43 @@ logger = setup_logging()
 
 
 class SocialMediaAgent:
-    def __init__(self):
-        """Initialize the social media agent"""
+    def __init__(self, config_path: str = "config.yaml", video_config: Optional[dict] = None,
+                 daily_schedule: Optional[dict] = None, upload_times: Optional[list] = None,
+                 platforms: Optional[list] = None, videos_dir: str = "videos"):
+        """
+        Initialize the social media agent
+        
+        The catalog, schedule and platforms default to video_config.py;
+        passing them in lets load_test.py run the agent on a synthetic catalog.
+        
+        Args:
+            config_path: Path to config.yaml
+            video_config: {filename: {'captions': [...], ...}} (default VIDEO_CONFIG)
+            daily_schedule: {weekday: [filename, ...]} (default DAILY_SCHEDULE)
+            upload_times: Slot times 'HH:MM' (default UPLOAD_TIMES)
+            platforms: Upload targets (default PLATFORMS)
+            videos_dir: Folder holding the catalog's videos
+        """
+        self.config_path = config_path
+        self.video_config = VIDEO_CONFIG if video_config is None else video_config
+        self.daily_schedule = DAILY_SCHEDULE if daily_schedule is None else daily_schedule
+        self.upload_times = UPLOAD_TIMES if upload_times is None else upload_times
+        self.platforms = PLATFORMS if platforms is None else platforms
+        self.videos_dir = videos_dir
+        
         logger.info("=" * 60)
         logger.info("Social Media Automated Starting...")
         logger.info("=" * 60)
         
         try:
-            self.uploader = VideoUploader()
+            self._uploader = None  # Created on first upload
+            self._fanout = None
+            self.processor = VideoProcessor(config_path)
+            self.prefetcher = None  # Started by run_scheduler
+            # Upload jobs and caption rotation (imports upload_history.json once)
             self.upload_history_file = "upload_history.json"
-            self.upload_history = self._load_upload_history()
+            self.jobs = JobStore(self.processor.config.get('jobs', {}).get('db_path', 'upload_jobs.db'))
+            self.jobs.import_history(self.upload_history_file)
             
             logger.info("Agent initialized successfully")
             
@@ -54,36 +84,191 @@ class SocialMediaAgent:
             logger.error(f"Error initializing agent: {e}")
             raise
     
-    def _load_upload_history(self):
-        """Load upload history to track which caption was used last"""
-        if os.path.exists(self.upload_history_file):
-            try:
-                with open(self.upload_history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    def _save_upload_history(self):
-        """Save upload history"""
-        with open(self.upload_history_file, 'w') as f:
-            json.dump(self.upload_history, f, indent=2)
-    
-    def _get_next_caption_index(self, video_filename):
-        """Get the next caption index for a video (rotates through available captions)"""
-        if video_filename not in self.upload_history:
-            self.upload_history[video_filename] = {'last_caption_index': -1, 'upload_count': 0}
-        
-        video_data = VIDEO_CONFIG.get(video_filename)
-        if not video_data:
-            return 0
+    @property
+    def uploader(self):
+        """Platform uploader, created on first use so read-only commands start fast"""
+        if self._uploader is None:
+            self._uploader = VideoUploader(self.config_path)
+        return self._uploader
+    
+    @property
+    def fanout(self):
+        """Concurrent upload fan-out, created with the uploader"""
+        if self._fanout is None:
+            self._fanout = UploadFanout.from_config(self.uploader, self.uploader.config.get('upload', {}))
+        return self._fanout
+    
+    def _prepare_for_platforms(self, video_path, platforms=None):
+        """
+        Convert/compress a video for every platform (one encode per compatible group)
         
-        num_captions = len(video_data['captions'])
-        last_index = self.upload_history[video_filename]['last_caption_index']
+        Returns:
+            Dictionary mapping platform to the file to upload (None if the
+            video was refused for that platform, e.g. too long)
+        """
+        reports = self.processor.prepare_for_platforms(video_path, platforms or self.platforms)
+        return {platform: None if report.get('refused') else report['path']
+                for platform, report in reports.items()}
+    
+    def _upload_to_platforms(self, upload_paths, caption, thumbnail, on_result=None):
+        """
+        Upload to every platform in upload_paths concurrently and log each outcome
+        
+        Returns:
+            Dictionary mapping platform to its upload result
+        """
+        logger.info(f"\nUploading to {', '.join(upload_paths)}...")
+        results = self.fanout.run({
+            platform: {
+                'video_path': path,
+                'caption': caption,
+                'hashtags': [],  # Hashtags are already in caption
+                'thumbnail': thumbnail
+            }
+            for platform, path in upload_paths.items()
+        }, on_result=on_result)
         
-        # Get next caption in rotation
-        next_index = (last_index + 1) % num_captions
-        return next_index
+        for platform, result in results.items():
+            if result['success']:
+                logger.info(f"✓ {platform} upload successful! ({result['elapsed']:.1f}s)")
+            else:
+                logger.error(f"✗ {platform} upload failed: {result.get('error', 'Unknown error')}")
+        return results
+    
+    def _publish(self, video_filename, video_path, video_data, slot, prepared=None):
+        """
+        Post a video to every platform once per slot, tracked as durable jobs
+        
+        Platforms already published in this slot are skipped, failed ones
+        are retried with the slot's original caption, and each outcome is
+        committed the moment its platform answers.
+        
+        Args:
+            video_filename: Video filename (catalog key)
+            video_path: Path to the source video
+            video_data: Catalog entry
+            slot: Slot identifier, part of each job's idempotency key
+            prepared: {platform: path} prepared ahead of time (optional)
+            
+        Returns:
+            Dictionary mapping platform to its upload result
+        """
+        captions = video_data['captions']
+        fingerprint = self.processor.fingerprinter.fingerprint(video_path)
+        
+        # A retried slot keeps the caption it started with
+        existing = self.jobs.slot_jobs(fingerprint, slot)
+        if existing and existing[0]['caption_index'] is not None:
+            caption_index = existing[0]['caption_index'] % len(captions)
+        else:
+            caption_index = self.jobs.next_caption_index(video_filename, len(captions))
+        caption = captions[caption_index]
+        
+        logger.info(f"Using caption #{caption_index + 1} of {len(captions)}")
+        logger.info(f"Caption preview: {caption[:50]}...")
+        
+        results = {}
+        keys = {}
+        for platform in self.platforms:
+            job = self.jobs.create(video_filename, fingerprint, platform, slot, caption_index)
+            keys[platform] = job['idempotency_key']
+            if job['state'] == PUBLISHED:
+                logger.info(f"✓ {platform}: already published in this slot ({job['media_id']})")
+                results[platform] = {'platform': platform, 'success': True, 'skipped': True,
+                                     'media_id': job['media_id']}
+            elif job['state'] == UPLOADING:
+                # Interrupted mid-upload: it may be live, so never re-post blindly
+                logger.warning(f"✗ {platform}: an earlier upload in this slot was interrupted; "
+                               f"check the platform before retrying job {job['idempotency_key']}"
+                               + (f" ({job['error']})" if job['error'] else ""))
+                results[platform] = {'platform': platform, 'success': False, 'skipped': True,
+                                     'error': 'Interrupted upload may already be published'}
+        
+        todo = [platform for platform in self.platforms if platform not in results]
+        if not todo:
+            return results
+        
+        for platform in todo:
+            self.jobs.transition(keys[platform], PREPARING)
+        try:
+            upload_paths = {platform: prepared.get(platform) for platform in todo} if prepared \
+                else self._prepare_for_platforms(video_path, todo)
+            
+            # Cover frame from the source, at the per-video cover_time if set
+            thumbnail = self.processor.extract_cover(video_path, video_data.get('cover_time'))
+        except Exception as e:
+            for platform in todo:
+                self.jobs.mark_failed(keys[platform], f"Preparation failed: {e}")
+            raise
+        
+        # Platforms the video was refused for (the reason is logged) are not uploaded
+        for platform in todo:
+            if not upload_paths.get(platform):
+                error = "Video not prepared for this platform (e.g. longer than its limit)"
+                self.jobs.mark_failed(keys[platform], error)
+                results[platform] = {'platform': platform, 'success': False, 'error': error}
+        
+        # Only upload what this run managed to claim
+        upload_paths = {platform: path for platform, path in upload_paths.items()
+                        if path and self.jobs.claim(keys[platform])}
+        
+        def record(platform, result):
+            if result.get('success'):
+                self.jobs.mark_published(keys[platform], result)
+            elif result.get('handed_off'):
+                self.jobs.mark_unconfirmed(keys[platform], result.get('error', 'Unknown error'), result)
+            else:
+                self.jobs.mark_failed(keys[platform], result.get('error', 'Unknown error'), result)
+        
+        results.update(self._upload_to_platforms(upload_paths, caption, thumbnail, on_result=record))
+        for platform, result in results.items():
+            # Uploads that returned nothing never reached record()
+            if platform in upload_paths and not result.get('timed_out') \
+                    and self.jobs.get(keys[platform])['state'] == UPLOADING:
+                record(platform, result)
+        return results
+    
+    def _today_slot(self, time_slot_index):
+        """
+        Resolve today's video for a time slot
+        
+        Returns:
+            (video_filename, video_path, video_data, slot_id) or None if nothing can be uploaded
+        """
+        # Get today's day of week (0=Monday, 6=Sunday)
+        today = datetime.now().weekday()
+        
+        # Get scheduled videos for today
+        video_list = self.daily_schedule.get(today)
+        
+        if not video_list or time_slot_index >= len(video_list):
+            logger.warning(f"No video scheduled for today ({datetime.now().strftime('%A')}) at time slot {time_slot_index}")
+            return None
+        
+        video_filename = video_list[time_slot_index]
+        upload_time = self.upload_times[time_slot_index]
+        
+        logger.info(f"\n{'='*60}")
+        logger.info(f"Daily Upload #{time_slot_index + 1}: {video_filename}")
+        logger.info(f"Day: {datetime.now().strftime('%A')}")
+        logger.info(f"Time Slot: {upload_time}")
+        logger.info(f"Platforms: {', '.join(self.platforms)}")
+        logger.info(f"{'='*60}\n")
+        
+        # Get video path
+        video_path = os.path.join(self.videos_dir, video_filename)
+        
+        if not os.path.exists(video_path):
+            logger.error(f"Video file not found: {video_path}")
+            return None
+        
+        # Get video config
+        video_data = self.video_config.get(video_filename)
+        if not video_data:
+            logger.error(f"No caption config found for: {video_filename}")
+            return None
+        
+        return video_filename, video_path, video_data, f"{datetime.now().date().isoformat()}T{upload_time}"
     
     def upload_scheduled_video(self, time_slot_index):
         """
@@ -93,84 +278,76 @@ class SocialMediaAgent:
             time_slot_index: Index of the time slot (0=9am, 1=12pm, 2=6pm, 3=11pm)
         """
         try:
-            # Get today's day of week (0=Monday, 6=Sunday)
-            today = datetime.now().weekday()
-            
-            # Get scheduled videos for today
-            video_list = DAILY_SCHEDULE.get(today)
-            
-            if not video_list or time_slot_index >= len(video_list):
-                logger.warning(f"No video scheduled for today ({datetime.now().strftime('%A')}) at time slot {time_slot_index}")
+            slot = self._today_slot(time_slot_index)
+            if not slot:
                 return
+            video_filename, video_path, video_data, slot_id = slot
             
-            video_filename = video_list[time_slot_index]
-            upload_time = UPLOAD_TIMES[time_slot_index]
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Daily Upload #{time_slot_index + 1}: {video_filename}")
-            logger.info(f"Day: {datetime.now().strftime('%A')}")
-            logger.info(f"Time Slot: {upload_time}")
-            logger.info(f"Platforms: {', '.join(PLATFORMS)}")
-            logger.info(f"{'='*60}\n")
+            # Use the artifacts prepared ahead of time when the prefetcher has them
+            prepared = self.prefetcher.get_prepared(video_path) if self.prefetcher else None
+            if prepared:
+                logger.info(f"Using prefetched videos: {prepared}")
             
-            # Get video path
-            video_path = os.path.join("videos", video_filename)
+            results = self._publish(video_filename, video_path, video_data, slot_id, prepared)
             
-            if not os.path.exists(video_path):
-                logger.error(f"Video file not found: {video_path}")
-                return
-            
-            # Get video config
-            video_data = VIDEO_CONFIG.get(video_filename)
-            if not video_data:
-                logger.error(f"No caption config found for: {video_filename}")
-                return
-            
-            # Get next caption in rotation
-            caption_index = self._get_next_caption_index(video_filename)
-            caption = video_data['captions'][caption_index]
-            
-            logger.info(f"Using caption #{caption_index + 1} of {len(video_data['captions'])}")
-            logger.info(f"Caption preview: {caption[:50]}...")
-            
-            # Upload the video to all platforms
-            all_success = True
-            for platform in PLATFORMS:
-                logger.info(f"\nUploading to {platform}...")
-                result = self.uploader.upload(
-                    platform=platform,
-                    video_path=video_path,
-                    caption=caption,
-                    hashtags=[]  # Hashtags are already in caption
-                )
-                
-                if result and result.get('success', False):
-                    logger.info(f"✓ {platform} upload successful!")
-                else:
-                    logger.error(f"✗ {platform} upload failed: {result.get('error', 'Unknown error') if result else 'No result'}")
-                    all_success = False
-            
-            # Update upload history
-            if all_success:
+            if all(result['success'] for result in results.values()):
                 logger.info("✓ Upload successful!")
-                
-                # Update caption rotation
-                self.upload_history[video_filename]['last_caption_index'] = caption_index
-                self.upload_history[video_filename]['upload_count'] += 1
-                self.upload_history[video_filename]['last_upload'] = datetime.now().isoformat()
-                self._save_upload_history()
-                
-                logger.info(f"Upload count for this video: {self.upload_history[video_filename]['upload_count']}")
+                logger.info(f"Upload count for this video: {self.jobs.rotation(video_filename)['upload_count']}")
             else:
-                logger.error(f"✗ Upload failed: {result.get('error', 'Unknown error')}")
+                failed = [platform for platform, result in results.items() if not result['success']]
+                logger.error(f"✗ Upload failed on: {', '.join(failed)}")
             
             logger.info(f"\n{'='*60}\n")
-            return result
+            return results
             
         except Exception as e:
             logger.error(f"Error in upload_scheduled_video: {e}", exc_info=True)
             return None
     
+    def upload_today(self):
+        """
+        Upload all of today's videos, preparing the next while the current one uploads
+        
+        Returns:
+            Pipeline summary with per-slot results and per-stage utilization
+        """
+        today = datetime.now().weekday()
+        video_list = self.daily_schedule.get(today, [])
+        logger.info(f"Uploading all {len(video_list)} videos for today...")
+        
+        def prepare(time_slot_index):
+            slot = self._today_slot(time_slot_index)
+            if not slot:
+                return None
+            video_filename, video_path, video_data, slot_id = slot
+            # Platforms already published (or mid-upload) in this slot are skipped
+            # by _publish, so do not spend an encode on them
+            fingerprint = self.processor.fingerprinter.fingerprint(video_path)
+            done = {job['platform'] for job in self.jobs.slot_jobs(fingerprint, slot_id)
+                    if job['state'] in (PUBLISHED, UPLOADING)}
+            platforms = [platform for platform in self.platforms if platform not in done]
+            prepared = self._prepare_for_platforms(video_path, platforms) if platforms else {}
+            return time_slot_index, slot, prepared
+        
+        def upload(item):
+            time_slot_index, (video_filename, video_path, video_data, slot_id), prepared = item
+            results = self._publish(video_filename, video_path, video_data, slot_id, prepared)
+            failed = [platform for platform, result in results.items() if not result['success']]
+            if failed:
+                logger.error(f"✗ {video_filename}: upload failed on {', '.join(failed)}")
+            else:
+                logger.info(f"✓ {video_filename}: uploaded")
+            return time_slot_index, results
+        
+        pipeline_config = self.processor.config.get('pipeline', {})
+        # Pacing comes from the per-account rate limits (config: rate_limits);
+        # the bounded queue caps how many prepared videos wait on disk
+        pipeline = Pipeline([
+            Stage('prepare', prepare, workers=pipeline_config.get('prepare_workers', 1)),
+            Stage('upload', upload, workers=pipeline_config.get('upload_workers', 1))
+        ], queue_size=pipeline_config.get('queue_size', 1))
+        return pipeline.run(range(len(video_list)))
+    
     def upload_specific_video(self, video_filename: str):
         """
         Upload a specific video immediately with next caption in rotation
@@ -181,51 +358,26 @@ class SocialMediaAgent:
         try:
             logger.info(f"\n{'='*60}")
             logger.info(f"Manual Upload: {video_filename}")
-            logger.info(f"Platforms: {', '.join(PLATFORMS)}")
+            logger.info(f"Platforms: {', '.join(self.platforms)}")
             logger.info(f"{'='*60}\n")
             
-            video_path = os.path.join("videos", video_filename)
+            video_path = os.path.join(self.videos_dir, video_filename)
             
             if not os.path.exists(video_path):
                 logger.error(f"Video file not found: {video_path}")
                 return False
             
-            video_data = VIDEO_CONFIG.get(video_filename)
+            video_data = self.video_config.get(video_filename)
             if not video_data:
                 logger.error(f"No caption config found for: {video_filename}")
                 return False
             
-            # Get next caption in rotation
-            caption_index = self._get_next_caption_index(video_filename)
-            caption = video_data['captions'][caption_index]
+            # Manual uploads are a new post each time (deduplicated per minute)
+            slot = f"manual:{datetime.now().strftime('%Y-%m-%dT%H:%M')}"
+            results = self._publish(video_filename, video_path, video_data, slot)
             
-            logger.info(f"Using caption #{caption_index + 1} of {len(video_data['captions'])}")
-            logger.info(f"Caption: {caption}")
-            
-            # Upload to all platforms
-            all_success = True
-            for platform in PLATFORMS:
-                logger.info(f"\nUploading to {platform}...")
-                result = self.uploader.upload(
-                    platform=platform,
-                    video_path=video_path,
-                    caption=caption,
-                    hashtags=[]  # Hashtags are already in caption
-                )
-                
-                if result and result.get('success', False):
-                    logger.info(f"✓ {platform} upload successful!")
-                else:
-                    logger.error(f"✗ {platform} upload failed: {result.get('error', 'Unknown error') if result else 'No result'}")
-                    all_success = False
-            
-            # Update history
-            if all_success:
+            if all(result['success'] for result in results.values()):
                 logger.info("\n✓ All platforms uploaded successfully!")
-                self.upload_history[video_filename]['last_caption_index'] = caption_index
-                self.upload_history[video_filename]['upload_count'] += 1
-                self.upload_history[video_filename]['last_upload'] = datetime.now().isoformat()
-                self._save_upload_history()
                 return True
             else:
                 logger.error("\n✗ Some uploads failed")
@@ -242,32 +394,56 @@ class SocialMediaAgent:
         logger.info("\n" + "="*60)
         logger.info("DAILY UPLOAD SCHEDULER (4 UPLOADS/DAY)")
         logger.info("="*60)
-        logger.info(f"Upload Times: {', '.join(UPLOAD_TIMES)}")
-        logger.info(f"Platforms: {', '.join(PLATFORMS)}")
+        logger.info(f"Upload Times: {', '.join(self.upload_times)}")
+        logger.info(f"Platforms: {', '.join(self.platforms)}")
         logger.info("\nWeekly Schedule:")
         
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        for day_num, video_list in DAILY_SCHEDULE.items():
+        for day_num, video_list in self.daily_schedule.items():
             logger.info(f"  {days[day_num]}:")
             for i, video in enumerate(video_list):
-                logger.info(f"    {UPLOAD_TIMES[i]}: {video}")
+                logger.info(f"    {self.upload_times[i]}: {video}")
         
         logger.info("="*60 + "\n")
         
         # Schedule all 4 daily uploads
-        for i, upload_time in enumerate(UPLOAD_TIMES):
-            schedule.every().day.at(upload_time).do(self.upload_scheduled_video, time_slot_index=i)
+        for i, upload_time in enumerate(self.upload_times):
+            schedule.every().day.at(upload_time).do(self._run_slot, time_slot_index=i)
             logger.info(f"Scheduled upload #{i+1} at {upload_time}")
         
+        # Prepare the next slots' videos in the background so slots only upload
+        prefetch_config = self.processor.config.get('prefetch', {})
+        if prefetch_config.get('enabled', True):
+            self.prefetcher = SlotPrefetcher(
+                self.processor, self.daily_schedule, self.upload_times, self.platforms,
+                videos_folder=self.videos_dir,
+                lookahead=prefetch_config.get('lookahead_slots', 4),
+                safety_margin_minutes=prefetch_config.get('safety_margin_minutes', 10)
+            )
+            self.prefetcher.start()
+            self.prefetcher.refresh()
+        
         logger.info(f"\nScheduler started. Waiting for uploads...")
         logger.info("Press Ctrl+C to stop\n")
         
         try:
             while True:
                 schedule.run_pending()
+                if self.prefetcher:
+                    self.prefetcher.refresh()
                 time.sleep(60)  # Check every minute
         except KeyboardInterrupt:
             logger.info("\nScheduler stopped by user")
+        finally:
+            if self.prefetcher:
+                self.prefetcher.stop(timeout=5)
+    
+    def _run_slot(self, time_slot_index):
+        """Scheduler job: upload a slot while background preparation is paused"""
+        if not self.prefetcher:
+            return self.upload_scheduled_video(time_slot_index)
+        with self.prefetcher.foreground():
+            return self.upload_scheduled_video(time_slot_index)
     
     def show_status(self):
         """Show current status and upload history"""
@@ -275,33 +451,189 @@ class SocialMediaAgent:
         logger.info("UPLOAD STATUS")
         logger.info("="*60)
         
-        for video_filename, video_data in VIDEO_CONFIG.items():
-            if video_filename in self.upload_history:
-                history = self.upload_history[video_filename]
+        for video_filename, video_data in self.video_config.items():
+            history = self.jobs.rotation(video_filename)
+            if history['upload_count']:
                 logger.info(f"\n{video_filename}:")
                 logger.info(f"  Total uploads: {history['upload_count']}")
                 logger.info(f"  Last caption used: #{history['last_caption_index'] + 1} of {len(video_data['captions'])}")
-                if 'last_upload' in history:
+                if history['last_upload']:
                     logger.info(f"  Last upload: {history['last_upload']}")
             else:
                 logger.info(f"\n{video_filename}: Never uploaded")
         
+        counts = self.jobs.state_counts()
+        logger.info("\nUpload jobs:")
+        logger.info("  " + "  ".join(f"{state}: {counts.get(state, 0)}"
+                                     for state in (PUBLISHED, FAILED, UPLOADING, PREPARING)))
+        for job in self.jobs.jobs(state=UPLOADING, limit=10):
+            logger.info(f"  Interrupted: {job['video']} on {job['platform']} ({job['slot']})"
+                        + (f": {job['error']}" if job['error'] else ""))
+        for job in self.jobs.jobs(state=FAILED, limit=10):
+            logger.info(f"  Failed: {job['video']} on {job['platform']} ({job['slot']}): {job['error']}")
+        
+        cache_stats = self.processor.cache.stats()
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        hit_rate = f"{cache_stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        logger.info("\nPrepared video cache:")
+        logger.info(f"  Hits: {cache_stats['hits']}  Misses: {cache_stats['misses']}  "
+                    f"Evictions: {cache_stats['evictions']}  (hit rate {hit_rate})")
+        logger.info(f"  Entries: {cache_stats['entries']}  "
+                    f"Size: {cache_stats['bytes'] / (1024 * 1024):.1f}MB / "
+                    f"{cache_stats['max_bytes'] / (1024 * 1024):.0f}MB")
+        
         logger.info("\n" + "="*60 + "\n")
 
 
+def prepare_all(source: str = 'config', cores: Optional[int] = None, nice: Optional[int] = None):
+    """
+    Prepare the whole catalog ahead of time on a process pool
+    
+    Args:
+        source: 'config' for every VIDEO_CONFIG entry, 'folder' for every
+            video the scheduler finds in the videos folder
+        cores: CPU budget (defaults to batch.cores in config, then all cores)
+        nice: Nice level for workers (defaults to batch.nice in config, then 10)
+    """
+    from modules.batch import prepare_catalog
+    
+    if source == 'folder':
+        from modules.scheduler import VideoScheduler
+        video_paths = VideoScheduler().video_queue
+    else:
+        video_paths = [os.path.join("videos", name) for name in VIDEO_CONFIG]
+    
+    batch_config = VideoProcessor().config.get('batch', {})
+    return prepare_catalog(
+        video_paths,
+        cores=cores or batch_config.get('cores'),
+        nice=nice if nice is not None else batch_config.get('nice', 10),
+        platforms=PLATFORMS
+    )
+
+
+def draft_captions(output: str = "caption_pool.yaml", variants: Optional[int] = None,
+                   concurrency: Optional[int] = None, tone: str = "casual"):
+    """
+    Draft captions for every video in the weekly schedule in one parallel pass
+    
+    Writes a rotation pool in the VIDEO_CONFIG shape ({video: {'captions': [...]}})
+    for review; nothing is uploaded and video_config.py is not changed.
+    
+    Args:
+        output: YAML file to write
+        variants: Captions per video (defaults to how often the video is scheduled per week)
+        concurrency: Requests in flight (defaults to ai.batch_concurrency in config)
+        tone: Caption tone
+    """
+    import yaml
+    from modules.caption_generator import CaptionGenerator
+    
+    # One caption per scheduled slot, so each video rotates through fresh ones
+    scheduled = [video for video_list in DAILY_SCHEDULE.values() for video in video_list]
+    if variants:
+        scheduled = list(dict.fromkeys(scheduled))
+    
+    batch = CaptionGenerator().generate_batch(
+        [os.path.join("videos", video) for video in scheduled],
+        tone=tone, variants=variants or 1, concurrency=concurrency
+    )
+    pool = {os.path.basename(video_path): {'captions': [post['full_text'] for post in posts]}
+            for video_path, posts in batch.items()}
+    
+    with open(output, 'w') as f:
+        f.write(f"# Drafted {datetime.now().strftime('%Y-%m-%d %H:%M')} by `python main.py draft-captions`\n")
+        f.write("# Review and edit, then copy the captions you keep into VIDEO_CONFIG in video_config.py\n")
+        yaml.safe_dump(pool, f, allow_unicode=True, sort_keys=False, width=1000)
+    
+    logger.info(f"Drafted {sum(len(entry['captions']) for entry in pool.values())} captions "
+                f"for {len(pool)} videos into {output}")
+    return pool
+
+
+def import_report(module: str = 'main', top: int = 15):
+    """
+    Print an import-time breakdown of a module (python -X importtime)
+    
+    Args:
+        module: Module to import in a fresh interpreter
+        top: Number of slowest modules to list
+    """
+    import subprocess
+    
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    
+    entries = []
+    for line in completed.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    
+    if not entries:
+        print(completed.stderr.strip() or f"No import timings for {module}")
+        return
+    
+    # Children are printed before their parent; skip interpreter startup
+    end = max((i for i, e in enumerate(entries) if e[0] == module and e[3] == 0), default=len(entries) - 1)
+    start = max((i + 1 for i, e in enumerate(entries[:end]) if e[3] == 0), default=0)
+    own = entries[start:end + 1]
+    total_us = own[-1][2]
+    print(f"\nImporting {module}: {total_us / 1000:.1f}ms, {len(own)} modules")
+    
+    print("\nSlowest direct imports (cumulative):")
+    for name, _, cumulative, _ in sorted((e for e in own if e[3] == 1), key=lambda e: -e[2])[:top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+    
+    print("\nSlowest modules (self):")
+    for name, self_us, _, _ in sorted(own, key=lambda e: -e[1])[:top]:
+        print(f"  {self_us / 1000:8.1f}ms  {name}")
+    
+    if completed.returncode != 0:
+        print(f"\nImport failed:\n{completed.stderr.strip().splitlines()[-1]}")
+
+
 def main():
     """Main entry point"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Social Media Automated - Daily Video Uploader (4x/day)')
-    parser.add_argument('command', choices=['schedule', 'upload', 'status'], 
+    parser.add_argument('command', choices=['schedule', 'upload', 'status', 'prepare-all', 'imports',
+                                            'draft-captions'], 
                        help='Command to run')
     parser.add_argument('--video', help='Specific video filename to upload (for upload command)')
     parser.add_argument('--slot', type=int, choices=[0, 1, 2, 3], 
                        help='Time slot (0=9am, 1=12pm, 2=6pm, 3=11pm) for upload command')
+    parser.add_argument('--source', choices=['config', 'folder'], default='config',
+                       help='Videos to prepare: VIDEO_CONFIG entries or the videos folder (for prepare-all)')
+    parser.add_argument('--cores', type=int, help='CPU cores to use (for prepare-all)')
+    parser.add_argument('--nice', type=int, help='Nice level for worker processes (for prepare-all)')
+    parser.add_argument('--module', default='main', help='Module to time (for imports)')
+    parser.add_argument('--output', default='caption_pool.yaml', help='Rotation pool file (for draft-captions)')
+    parser.add_argument('--variants', type=int,
+                       help='Captions per video (for draft-captions; default: weekly schedule count)')
+    parser.add_argument('--concurrency', type=int, help='Concurrent LLM requests (for draft-captions)')
     
     args = parser.parse_args()
     
+    if args.command == 'imports':
+        import_report(args.module)
+        return
+    
+    if args.command == 'draft-captions':
+        draft_captions(args.output, args.variants, args.concurrency)
+        return
+    
+    if args.command == 'prepare-all':
+        # Batch preparation does not need platform clients
+        prepare_all(args.source, args.cores, args.nice)
+        return
+    
     agent = SocialMediaAgent()
     
     if args.command == 'schedule':
@@ -317,14 +649,7 @@ def main():
             agent.upload_scheduled_video(args.slot)
         else:
             # Upload all 4 videos for today
-            today = datetime.now().weekday()
-            video_list = DAILY_SCHEDULE.get(today, [])
-            logger.info(f"Uploading all {len(video_list)} videos for today...")
-            for i in range(len(video_list)):
-                agent.upload_scheduled_video(i)
-                if i < len(video_list) - 1:
-                    logger.info("Waiting 5 seconds before next upload...")
-                    time.sleep(5)
+            agent.upload_today()
     
     elif args.command == 'status':
         # Show status
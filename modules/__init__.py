@@ -4,7 +4,9 @@ Modules package for Social Media Agent
 
 # Only import what we need for hard-coded mode
 from .uploader import VideoUploader
+from .video_processor import VideoProcessor
 
 __all__ = [
-    'VideoUploader'
+    'VideoUploader',
+    'VideoProcessor'
 ]
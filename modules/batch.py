@@ -0,0 +1,127 @@
+"""
+Batch Preparation Module
+Prepares a whole video catalog in parallel on a process pool
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-process processor, created once by the pool initializer
+_worker_processor = None
+
+
+def _init_worker(config_path: str, nice: int, threads: int):
+    """Process pool initializer: lower priority and build one VideoProcessor"""
+    global _worker_processor
+
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+        except OSError as e:
+            logger.warning(f"Could not set nice level: {e}")
+
+    from .video_processor import VideoProcessor
+    _worker_processor = VideoProcessor(config_path)
+    _worker_processor.threads = threads
+
+
+def _prepare_one(video_path: str, platforms: Optional[List[str]]) -> List[dict]:
+    """Prepare a single video inside a worker process (one report per artifact)"""
+    try:
+        if not platforms:
+            return [_worker_processor.prepare(video_path)]
+        reports = _worker_processor.prepare_for_platforms(video_path, platforms)
+        return list({id(report): report for report in reports.values()}.values())
+    except Exception as e:
+        return [{'source': video_path, 'path': video_path, 'success': False,
+                 'error': str(e), 'seconds': 0}]
+
+
+def prepare_catalog(video_paths: List[str], config_path: str = "config.yaml",
+                    cores: Optional[int] = None, nice: int = 10,
+                    platforms: Optional[List[str]] = None) -> dict:
+    """
+    Prepare every video in a catalog on a process pool
+
+    Args:
+        video_paths: Source videos to prepare
+        config_path: Config file each worker loads
+        cores: CPU budget (defaults to all cores); split between
+            worker processes and ffmpeg threads per encode
+        nice: Nice level applied to worker processes
+        platforms: Prepare per-platform artifacts for these platforms
+            (optional, uses the default target)
+
+    Returns:
+        Summary dictionary with per-file 'results' and aggregate throughput
+    """
+    video_paths = [path for path in video_paths if os.path.exists(path)]
+    if not video_paths:
+        logger.warning("No videos to prepare")
+        return _summarize([], 0)
+
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(cores, len(video_paths)))
+    threads = max(1, cores // workers)
+    logger.info(f"Preparing {len(video_paths)} videos on {workers} workers "
+                f"({threads} ffmpeg threads each, nice {nice})")
+
+    results = []
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config_path, nice, threads)) as executor:
+        futures = {executor.submit(_prepare_one, path, platforms): path for path in video_paths}
+        for future in as_completed(futures):
+            try:
+                reports = future.result()
+            except Exception as e:
+                # A worker that could not start (bad config.yaml, ...) breaks the whole pool
+                reports = [{'source': futures[future], 'path': futures[future], 'success': False,
+                            'error': f"Worker failed: {e!r}", 'seconds': 0}]
+            for report in reports:
+                results.append(report)
+
+                name = os.path.basename(report['source'])
+                targets = '+'.join(report.get('platforms') or [])
+                name = f"{name} [{targets}]" if targets else name
+                if report['success']:
+                    status = 'cached' if report.get('cached') else report.get('action')
+                    logger.info(f"✓ {name}: {status} in {report['seconds']:.1f}s "
+                                f"({report.get('size_mb') or 0:.1f}MB)")
+                else:
+                    logger.error(f"✗ {name}: {report.get('error', 'preparation failed')}")
+
+    summary = _summarize(results, time.time() - start)
+    logger.info(f"Prepared {summary['files']} videos in {summary['wall_seconds']}s "
+                f"({summary['encoded']} encoded, {summary['cached']} cached, {summary['failed']} failed)")
+    logger.info(f"Throughput: {summary['mb_per_second']} MB/s, {summary['encoded_fps']} encoded fps")
+    return summary
+
+
+def _summarize(results: List[dict], wall_seconds: float) -> dict:
+    """Aggregate counts and throughput of a batch's prepare reports"""
+    wall_seconds = max(wall_seconds, 1e-6)
+
+    # Throughput counts only work actually done (cache hits are free)
+    worked = [r for r in results if r['success'] and not r.get('cached')
+              and r.get('action') != 'passthrough']
+    source_mb = sum(r.get('size_mb') or 0 for r in worked)
+    frames = sum((r.get('duration') or 0) * (r.get('fps') or 0) for r in worked)
+
+    return {
+        'results': results,
+        'files': len(results),
+        'failed': sum(1 for r in results if not r['success']),
+        'cached': sum(1 for r in results if r.get('cached')),
+        'encoded': len(worked),
+        'wall_seconds': round(wall_seconds, 2),
+        # Summed per-file wall time across workers, not CPU time
+        'worker_seconds': round(sum(r.get('seconds') or 0 for r in results), 2),
+        'mb_per_second': round(source_mb / wall_seconds, 2),
+        'encoded_fps': round(frames / wall_seconds, 1)
+    }
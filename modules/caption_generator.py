@@ -5,11 +5,140 @@ Uses AI (OpenAI or local Ollama) to generate engaging captions and relevant hash
 
 import yaml
 import os
-from typing import List, Dict, Tuple
+import re
+import json
+import time
+import asyncio
+import inspect
+import threading
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import logging
 
+from .llm_cache import LLMCache, make_key
+
 logger = logging.getLogger(__name__)
 
+CAPTION_SYSTEM = "You are a social media expert who creates engaging captions."
+HASHTAG_SYSTEM = "You are a social media hashtag expert."
+POST_SYSTEM = ("You are a social media expert who writes engaging captions and picks hashtags. "
+               "You always answer with a single JSON object.")
+
+# Ask OpenAI for a final usage chunk on streams (sent as raw body so older SDKs pass it through)
+_STREAM_USAGE = {'stream_options': {'include_usage': True}}
+
+# Leading list markers models put before hashtags ("1.", "-", "*", "•")
+_LIST_MARKER = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+_NON_WORD = re.compile(r'\W+')
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) or a line break
+_SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*(?=\s|$)|\n')
+
+
+def _clean_hashtags(raw_tags: List[str]) -> List[str]:
+    """Hashtag words without '#', list markers or punctuation, deduplicated in order"""
+    tags, seen = [], set()
+    for raw in raw_tags:
+        tag = _NON_WORD.sub('', _LIST_MARKER.sub('', str(raw)))
+        if len(tag) > 2 and tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    return tags
+
+
+def _cut_at_sentence(text: str, max_length: int) -> str:
+    """
+    Shorten text to max_length, ending on a sentence boundary when one is
+    in the second half of the budget, else on a word boundary with "..."
+    """
+    # A trailing newline or space is not worth cutting a sentence for
+    text = text.rstrip()
+    if len(text) <= max_length:
+        return text
+    window = text[:max_length]
+    ends = [match.end() for match in _SENTENCE_END.finditer(window)]
+    if ends and ends[-1] >= max_length // 2:
+        return window[:ends[-1]].rstrip()
+    head = window[:max_length - 3]
+    if ' ' in head:
+        head = head.rsplit(' ', 1)[0]
+    return head.rstrip() + "..."
+
+
+class _StreamedText:
+    """Streamed response pieces, stopping once the length budget is spent"""
+    
+    def __init__(self, stop_at: int, started: float):
+        self.stop_at = stop_at
+        self.started = started
+        self.pieces = []
+        self.length = 0
+        self.first_token_at = None
+        self.stopped_early = False
+    
+    def add(self, piece: Optional[str]) -> bool:
+        """Add a piece; True once past the budget (the rest would be cut anyway)"""
+        if not piece:
+            return False
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.pieces.append(piece)
+        self.length += len(piece)
+        if self.length > self.stop_at:
+            self.stopped_early = True
+        return self.stopped_early
+    
+    @property
+    def text(self) -> str:
+        return ''.join(self.pieces).strip()
+
+
+def _closer(stream) -> Optional[Callable]:
+    # Generators and newer OpenAI streams close themselves; older OpenAI
+    # streams only expose the underlying HTTP response
+    response = getattr(stream, 'response', None)
+    return (getattr(stream, 'aclose', None) or getattr(stream, 'close', None)
+            or getattr(response, 'aclose', None) or getattr(response, 'close', None))
+
+
+async def _close(stream):
+    """Close a sync or async stream, which ends generation on the server"""
+    close = _closer(stream)
+    if close:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+def _parse_post(text: str) -> Tuple[str, List[str]]:
+    """
+    Parse and validate a combined caption + hashtags response
+    
+    Expected shape: {"caption": non-empty string, "hashtags": [string, ...]}
+    (a space or comma separated string of hashtags is accepted too)
+    
+    Returns:
+        (caption, hashtags)
+        
+    Raises:
+        ValueError: If the response is not JSON or does not match the shape
+    """
+    # Models sometimes wrap JSON in a code fence or add a sentence around it
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in response")
+    data = json.loads(text[start:end + 1])
+    
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    caption = data.get('caption')
+    if not isinstance(caption, str) or not caption.strip():
+        raise ValueError("'caption' must be a non-empty string")
+    hashtags = data.get('hashtags')
+    if isinstance(hashtags, str):
+        hashtags = re.split(r'[\s,]+', hashtags)
+    if not isinstance(hashtags, list) or not all(isinstance(tag, str) for tag in hashtags):
+        raise ValueError("'hashtags' must be a list of strings")
+    return caption.strip(), _clean_hashtags(hashtags)
+
 
 class CaptionGenerator:
     def __init__(self, config_path: str = "config.yaml", 
@@ -32,6 +161,7 @@ class CaptionGenerator:
             except Exception as e:
                 logger.warning(f"Could not load caption style: {e}")
                 self.style_config = None
+        self.style_prefix = self._compile_style_prefix()
         
         # Load video descriptions
         self.video_descriptions = {}
@@ -45,6 +175,18 @@ class CaptionGenerator:
                 logger.warning(f"Could not load video descriptions: {e}")
                 self.video_descriptions = {}
         
+        # Repeat generations for the same prompt are served from disk
+        self.cache = LLMCache.from_config(self.ai_config.get('cache', {}))
+        
+        # Keeping the Ollama model loaded between requests keeps its cached prefix
+        self.keep_alive = self.ai_config.get('keep_alive', '30m')
+        self.prompt_metrics = {'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0,
+                               'prompt_eval_seconds': 0.0, 'unmeasured': 0}
+        # Captions are streamed and cut off at the length limit
+        self.stream = self.ai_config.get('stream', True)
+        self.stream_metrics = {'requests': 0, 'early_stops': 0, 'ttft_seconds': 0.0, 'total_seconds': 0.0}
+        self._metrics_lock = threading.Lock()
+        
         # Initialize AI client
         if self.ai_config['use_local_ai']:
             try:
@@ -65,21 +207,298 @@ class CaptionGenerator:
                 logger.error("OpenAI not installed. Run: pip install openai")
                 raise
     
-    def generate_caption(self, video_path: str, tone: str = "casual", 
-                        max_length: int = 2200) -> str:
+    def _request(self, prompt: str, system: str, max_tokens: int,
+                 json_mode: bool = False) -> Tuple[str, List[dict], dict]:
+        """Backend-qualified model, messages and parameters of one chat request"""
+        # The system message goes first and is identical across videos, so
+        # both backends can reuse its evaluated prefix
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+        if self.use_ollama:
+            model = f"ollama:{self.ai_config['model']}"
+            params = {'format': 'json'} if json_mode else {}
+        else:
+            model = f"openai:{self.ai_config['model']}"
+            params = {'max_tokens': max_tokens}
+            if json_mode:
+                params['response_format'] = {'type': 'json_object'}
+        return model, messages, params
+    
+    def _record_usage(self, response, purpose: str):
+        """Log and accumulate prompt evaluation time and prompt cache reuse"""
+        if self.use_ollama:
+            # Ollama only evaluates prompt tokens past the prefix it has cached
+            prompt_tokens = response.get('prompt_eval_count') or 0
+            eval_seconds = (response.get('prompt_eval_duration') or 0) / 1e9
+            cached_tokens = None
+        else:
+            usage = getattr(response, 'usage', None)
+            prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+            eval_seconds = None
+        
+        with self._metrics_lock:
+            self.prompt_metrics['requests'] += 1
+            self.prompt_metrics['prompt_tokens'] += prompt_tokens
+            self.prompt_metrics['cached_tokens'] += cached_tokens or 0
+            self.prompt_metrics['prompt_eval_seconds'] += eval_seconds or 0
+        
+        if eval_seconds is not None:
+            logger.info(f"Prompt eval for {purpose}: {prompt_tokens} tokens in {eval_seconds * 1000:.0f}ms")
+        else:
+            logger.info(f"Prompt for {purpose}: {prompt_tokens} tokens, {cached_tokens} from prompt cache")
+    
+    def prompt_stats(self) -> dict:
         """
-        Generate a caption for the video
+        Prompt evaluation totals for this generator
+        
+        Returns:
+            Dictionary with requests, prompt_tokens, cached_tokens (OpenAI),
+            prompt_eval_seconds (Ollama), prompt_eval_ms_avg and unmeasured
+            (streams stopped before the backend sent its usage)
+        """
+        with self._metrics_lock:
+            stats = dict(self.prompt_metrics)
+        requests = stats['requests']
+        stats['prompt_eval_ms_avg'] = round(stats['prompt_eval_seconds'] * 1000 / requests, 1) if requests else 0.0
+        return stats
+    
+    def _cache_key(self, model: str, messages: List[dict], params: dict,
+                   stop_at: Optional[int]) -> Optional[str]:
+        if not self.cache:
+            return None
+        if stop_at and self.stream:
+            # A stream cut at stop_at is not the complete answer non-streaming callers expect
+            params = {**params, 'stop_at': stop_at}
+        return make_key(model, messages, params)
+    
+    def _cached(self, key: Optional[str], purpose: str, fresh: bool) -> Optional[str]:
+        if not self.cache or fresh:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"LLM cache hit for {purpose} (hit rate {self.cache.hit_rate():.0%})")
+        return cached
+    
+    def _store(self, key: Optional[str], model: str, text: str, purpose: str, fresh: bool,
+               started: float, validate: Optional[Callable[[str], Any]]):
+        if validate:
+            validate(text)
+        if self.cache:
+            self.cache.put(key, text, model)
+            logger.info(f"LLM cache {'refresh' if fresh else 'miss'} for {purpose}: "
+                        f"generated in {time.monotonic() - started:.1f}s "
+                        f"(hit rate {self.cache.hit_rate():.0%})")
+    
+    def _record_stream(self, streamed: _StreamedText, purpose: str):
+        """Log and accumulate time to first token and total generation time"""
+        finished = time.monotonic()
+        ttft = (streamed.first_token_at or finished) - streamed.started
+        total = finished - streamed.started
+        
+        with self._metrics_lock:
+            self.stream_metrics['requests'] += 1
+            self.stream_metrics['ttft_seconds'] += ttft
+            self.stream_metrics['total_seconds'] += total
+            self.stream_metrics['early_stops'] += streamed.stopped_early
+        
+        logger.info(f"Streamed {purpose}: first token after {ttft * 1000:.0f}ms, "
+                    f"{streamed.length} chars in {total:.1f}s"
+                    + (" (stopped at the length limit)" if streamed.stopped_early else ""))
+    
+    def _record_unmeasured(self, streamed: _StreamedText, purpose: str):
+        """Count a stream that ended without the backend's usage/eval data"""
+        with self._metrics_lock:
+            self.prompt_metrics['unmeasured'] += 1
+        reason = "stopped at the length limit" if streamed.stopped_early else "no usage in the stream"
+        logger.info(f"Prompt eval for {purpose}: not measured ({reason})")
+    
+    def stream_stats(self) -> dict:
+        """
+        Streaming latency totals for this generator
+        
+        Returns:
+            Dictionary with requests, early_stops, ttft_ms_avg and total_ms_avg
+        """
+        with self._metrics_lock:
+            stats = dict(self.stream_metrics)
+        requests = stats['requests']
+        return {
+            'requests': requests,
+            'early_stops': stats['early_stops'],
+            'ttft_ms_avg': round(stats['ttft_seconds'] * 1000 / requests, 1) if requests else 0.0,
+            'total_ms_avg': round(stats['total_seconds'] * 1000 / requests, 1) if requests else 0.0
+        }
+    
+    def _stream(self, messages: List[dict], params: dict, stop_at: int,
+                started: float, purpose: str) -> Tuple[str, Any]:
+        """Stream a completion, hanging up once stop_at characters have arrived"""
+        streamed = _StreamedText(stop_at, started)
+        response = None
+        if self.use_ollama:
+            stream = self.client.chat(model=self.ai_config['model'], messages=messages, stream=True,
+                                      keep_alive=self.keep_alive, **params)
+            for chunk in stream:
+                # Eval stats come with the final ('done') chunk
+                if chunk.get('done'):
+                    response = chunk
+                if streamed.add(chunk['message']['content']):
+                    break
+        else:
+            stream = self.client.chat.completions.create(
+                model=self.ai_config['model'],
+                messages=messages,
+                stream=True,
+                extra_body=_STREAM_USAGE,
+                **params
+            )
+            for chunk in stream:
+                # Usage comes in a last chunk without choices
+                if getattr(chunk, 'usage', None):
+                    response = chunk
+                if chunk.choices and streamed.add(chunk.choices[0].delta.content):
+                    break
+        # Closing the connection stops generation, so no tokens are paid for past the limit
+        close = _closer(stream)
+        if close:
+            close()
+        
+        self._record_stream(streamed, purpose)
+        if response is None:
+            self._record_unmeasured(streamed, purpose)
+        return streamed.text, response
+    
+    async def _astream(self, client, messages: List[dict], params: dict, stop_at: int,
+                       started: float, purpose: str) -> Tuple[str, Any]:
+        """_stream() on an async client"""
+        streamed = _StreamedText(stop_at, started)
+        response = None
+        if self.use_ollama:
+            stream = await client.chat(model=self.ai_config['model'], messages=messages, stream=True,
+                                       keep_alive=self.keep_alive, **params)
+            async for chunk in stream:
+                if chunk.get('done'):
+                    response = chunk
+                if streamed.add(chunk['message']['content']):
+                    break
+        else:
+            stream = await client.chat.completions.create(
+                model=self.ai_config['model'],
+                messages=messages,
+                stream=True,
+                extra_body=_STREAM_USAGE,
+                **params
+            )
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    response = chunk
+                if chunk.choices and streamed.add(chunk.choices[0].delta.content):
+                    break
+        await _close(stream)
+        
+        self._record_stream(streamed, purpose)
+        if response is None:
+            self._record_unmeasured(streamed, purpose)
+        return streamed.text, response
+    
+    def _complete(self, prompt: str, system: str, max_tokens: int,
+                  purpose: str = "completion", fresh: bool = False,
+                  json_mode: bool = False, validate: Optional[Callable[[str], Any]] = None,
+                  stop_at: Optional[int] = None) -> str:
+        """
+        Run one chat completion, answering from the LLM cache when possible
         
         Args:
-            video_path: Path to the video file
-            tone: Tone of the caption (casual, professional, funny, inspirational)
-            max_length: Maximum character length
+            prompt: User message
+            system: System message (stable prefix: style section, then role)
+            max_tokens: Completion token limit (OpenAI)
+            purpose: What is generated, for logging
+            fresh: Skip the cache lookup for a new variation (the result is still cached)
+            json_mode: Ask the backend to return a JSON object
+            validate: Raises on an unusable response, which is then not cached
+            stop_at: Stream the response and stop once it is longer than this
+                many characters (when ai.stream is on)
             
         Returns:
-            Generated caption
+            Response text
         """
-        video_name = os.path.basename(video_path)
+        model, messages, params = self._request(prompt, system, max_tokens, json_mode)
+        key = self._cache_key(model, messages, params, stop_at)
+        cached = self._cached(key, purpose, fresh)
+        if cached is not None:
+            return cached
+        
+        started = time.monotonic()
+        if stop_at and self.stream:
+            text, response = self._stream(messages, params, stop_at, started, purpose)
+        elif self.use_ollama:
+            response = self.client.chat(model=self.ai_config['model'], messages=messages,
+                                        keep_alive=self.keep_alive, **params)
+            text = response['message']['content'].strip()
+        else:
+            response = self.client.chat.completions.create(
+                model=self.ai_config['model'],
+                messages=messages,
+                **params
+            )
+            text = response.choices[0].message.content.strip()
+        
+        if response:
+            self._record_usage(response, purpose)
+        self._store(key, model, text, purpose, fresh, started, validate)
+        return text
+    
+    def _async_client(self):
+        """Async client of the configured backend (bound to the running event loop)"""
+        if self.use_ollama:
+            from ollama import AsyncClient
+            return AsyncClient()
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.ai_config['openai_api_key'])
+    
+    async def _acomplete(self, client, prompt: str, system: str, max_tokens: int,
+                         purpose: str = "completion", fresh: bool = False,
+                         json_mode: bool = False,
+                         validate: Optional[Callable[[str], Any]] = None,
+                         stop_at: Optional[int] = None) -> str:
+        """_complete() on an async client (see _async_client)"""
+        model, messages, params = self._request(prompt, system, max_tokens, json_mode)
+        key = self._cache_key(model, messages, params, stop_at)
+        cached = self._cached(key, purpose, fresh)
+        if cached is not None:
+            return cached
+        
+        started = time.monotonic()
+        if stop_at and self.stream:
+            text, response = await self._astream(client, messages, params, stop_at, started, purpose)
+        elif self.use_ollama:
+            response = await client.chat(model=self.ai_config['model'], messages=messages,
+                                         keep_alive=self.keep_alive, **params)
+            text = response['message']['content'].strip()
+        else:
+            response = await client.chat.completions.create(
+                model=self.ai_config['model'],
+                messages=messages,
+                **params
+            )
+            text = response.choices[0].message.content.strip()
+        
+        if response:
+            self._record_usage(response, purpose)
+        self._store(key, model, text, purpose, fresh, started, validate)
+        return text
+    
+    def _caption_prompt(self, video_name: str, tone: str, max_length: int,
+                        variation: int = 0) -> str:
+        """
+        Caption prompt for a video, in the trained style if caption_style.yaml exists
         
+        Variation N > 0 asks for a different take, so drafting several
+        captions for one video gives (and caches) distinct ones.
+        """
         # Get video description if available
         video_description = self.video_descriptions.get(video_name, "")
         
@@ -105,34 +524,43 @@ Make it engaging, authentic, and optimized for social media engagement.
 The caption should be relevant to the actual video content.
 Do not include hashtags in the caption (they will be added separately).
 """
+        if variation:
+            prompt += (f"\nThis is alternative caption #{variation + 1} for this video: "
+                       "take a different angle than the obvious first one.\n")
+        return prompt
+    
+    @staticmethod
+    def _fit(caption: str, max_length: int) -> str:
+        """Ensure a caption is within length, ending on a sentence where possible"""
+        return _cut_at_sentence(caption, max_length)
+    
+    def _with_custom_tags(self, hashtags: List[str]) -> List[str]:
+        """Append the configured custom tags and limit to max_count"""
+        hashtags = hashtags + list(self.hashtag_config.get('custom_tags', []))
+        return hashtags[:self.hashtag_config['max_count']]
+    
+    def generate_caption(self, video_path: str, tone: str = "casual", 
+                        max_length: int = 2200, fresh: bool = False) -> str:
+        """
+        Generate a caption for the video
         
-        try:
-            if self.use_ollama:
-                response = self.client.chat(
-                    model=self.ai_config['model'],
-                    messages=[
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ]
-                )
-                caption = response['message']['content'].strip()
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.ai_config['model'],
-                    messages=[
-                        {"role": "system", "content": "You are a social media expert who creates engaging captions."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=500
-                )
-                caption = response.choices[0].message.content.strip()
+        Args:
+            video_path: Path to the video file
+            tone: Tone of the caption (casual, professional, funny, inspirational)
+            max_length: Maximum character length
+            fresh: Generate a new caption even if an identical request is cached
             
-            # Ensure it's within length
-            if len(caption) > max_length:
-                caption = caption[:max_length-3] + "..."
+        Returns:
+            Generated caption
+        """
+        video_name = os.path.basename(video_path)
+        prompt = self._caption_prompt(video_name, tone, max_length)
+        
+        try:
+            caption = self._complete(prompt, self._system(CAPTION_SYSTEM), max_tokens=500,
+                                     purpose="caption", fresh=fresh, stop_at=max_length)
             
+            caption = self._fit(caption, max_length)
             logger.info(f"Generated caption: {caption[:50]}...")
             return caption
             
@@ -140,18 +568,8 @@ Do not include hashtags in the caption (they will be added separately).
             logger.error(f"Error generating caption: {e}")
             return f"Check out this amazing video! 🎬✨ {video_name}"
     
-    def generate_hashtags(self, video_path: str, caption: str = "") -> List[str]:
-        """
-        Generate relevant hashtags for the video
-        
-        Args:
-            video_path: Path to the video file
-            caption: The generated caption (for context)
-            
-        Returns:
-            List of hashtags (without # symbol)
-        """
-        video_name = os.path.basename(video_path)
+    def _hashtag_prompt(self, video_name: str, caption: str = "") -> str:
+        """Hashtag prompt for a video, conditioned on the start of its caption"""
         max_count = self.hashtag_config['max_count']
         custom_tags = self.hashtag_config.get('custom_tags', [])
         
@@ -165,7 +583,7 @@ Do not include hashtags in the caption (they will be added separately).
         if caption:
             video_context += f"\nCaption: {caption[:200]}"
         
-        prompt = f"""Generate {max_count - len(custom_tags)} relevant and trending hashtags for a social media video.
+        return f"""Generate {max_count - len(custom_tags)} relevant and trending hashtags for a social media video.
 
 {video_context}
 
@@ -176,43 +594,29 @@ Requirements:
 - Return only the hashtag words (without # symbol)
 - One hashtag per line
 """
+    
+    def generate_hashtags(self, video_path: str, caption: str = "",
+                          fresh: bool = False) -> List[str]:
+        """
+        Generate relevant hashtags for the video
         
-        try:
-            if self.use_ollama:
-                response = self.client.chat(
-                    model=self.ai_config['model'],
-                    messages=[
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ]
-                )
-                hashtags_text = response['message']['content'].strip()
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.ai_config['model'],
-                    messages=[
-                        {"role": "system", "content": "You are a social media hashtag expert."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=300
-                )
-                hashtags_text = response.choices[0].message.content.strip()
-            
-            # Parse hashtags
-            hashtags = []
-            for line in hashtags_text.split('\n'):
-                tag = line.strip().replace('#', '').replace('-', '').strip()
-                if tag and len(tag) > 2:
-                    hashtags.append(tag)
-            
-            # Add custom tags
-            hashtags.extend(custom_tags)
+        Args:
+            video_path: Path to the video file
+            caption: The generated caption (for context)
+            fresh: Generate new hashtags even if an identical request is cached
             
-            # Limit to max count
-            hashtags = hashtags[:max_count]
+        Returns:
+            List of hashtags (without # symbol)
+        """
+        video_name = os.path.basename(video_path)
+        custom_tags = self.hashtag_config.get('custom_tags', [])
+        prompt = self._hashtag_prompt(video_name, caption)
+        
+        try:
+            hashtags_text = self._complete(prompt, HASHTAG_SYSTEM, max_tokens=300,
+                                           purpose="hashtags", fresh=fresh)
             
+            hashtags = self._with_custom_tags(_clean_hashtags(hashtags_text.splitlines()))
             logger.info(f"Generated {len(hashtags)} hashtags")
             return hashtags
             
@@ -221,104 +625,128 @@ Requirements:
             # Fallback generic hashtags
             return ["video", "content", "viral", "trending"] + custom_tags
     
-    def _build_custom_prompt(self, video_name: str, video_description: str, 
-                           tone: str, max_length: int) -> str:
+    def _compile_style_prefix(self) -> Optional[str]:
         """
-        Build a custom prompt based on the user's caption style training
+        Compile the static part of the style prompt from caption_style.yaml
+        
+        Examples, structure, elements, phrases and CTAs are the same for
+        every video, so they are built once and sent first (in the system
+        message) where Ollama's KV cache and OpenAI prompt caching can reuse
+        them; only the per-video suffix from _build_custom_prompt varies.
         
-        Args:
-            video_name: Name of the video file
-            video_description: Description of the video content
-            tone: Desired tone
-            max_length: Max character length
-            
         Returns:
-            Custom prompt string
+            Style prefix or None without a style config
         """
+        if not self.style_config:
+            return None
+        
         style = self.style_config.get('style', {})
         examples = self.style_config.get('examples', [])
         common_phrases = self.style_config.get('common_phrases', [])
         avoid_phrases = self.style_config.get('avoid_phrases', [])
         cta_templates = self.style_config.get('cta_templates', [])
         
-        # Build video context
-        video_context = f"Video file: {video_name}"
-        if video_description:
-            video_context += f"\nVideo content: {video_description}"
-        else:
-            video_context += "\n(No description provided - use filename as context)"
-        
-        prompt = f"""Generate a social media caption for this video.
-
-{video_context}
-
-IMPORTANT: Write in this EXACT style based on these examples:
-
-"""
+        prefix = "IMPORTANT: Write in this EXACT style based on these examples:\n\n"
         
         # Add example captions
         if examples:
-            prompt += "=== EXAMPLE CAPTIONS (Match this style exactly) ===\n"
+            prefix += "=== EXAMPLE CAPTIONS (Match this style exactly) ===\n"
             for i, example in enumerate(examples[:5], 1):
                 if example and example.strip():
-                    prompt += f"\nExample {i}:\n{example.strip()}\n"
-            prompt += "\n"
+                    prefix += f"\nExample {i}:\n{example.strip()}\n"
+            prefix += "\n"
         
         # Add style description
         if style.get('description'):
-            prompt += f"Style Description: {style['description']}\n\n"
+            prefix += f"Style Description: {style['description']}\n\n"
         
         # Add structure preferences
         if style.get('structure'):
-            prompt += "Structure to follow:\n"
+            prefix += "Structure to follow:\n"
             for item in style['structure']:
-                prompt += f"- {item}\n"
-            prompt += "\n"
+                prefix += f"- {item}\n"
+            prefix += "\n"
         
         # Add elements preferences
         elements = style.get('elements', {})
-        prompt += "Style Elements:\n"
-        prompt += f"- Use emojis: {elements.get('use_emojis', True)}\n"
-        prompt += f"- Use line breaks: {elements.get('use_line_breaks', True)}\n"
-        prompt += f"- Use questions: {elements.get('use_questions', True)}\n"
-        prompt += f"- Use storytelling: {elements.get('use_storytelling', False)}\n"
-        prompt += f"- Personal pronouns (I, we, you): {elements.get('use_personal_pronouns', True)}\n\n"
+        prefix += "Style Elements:\n"
+        prefix += f"- Use emojis: {elements.get('use_emojis', True)}\n"
+        prefix += f"- Use line breaks: {elements.get('use_line_breaks', True)}\n"
+        prefix += f"- Use questions: {elements.get('use_questions', True)}\n"
+        prefix += f"- Use storytelling: {elements.get('use_storytelling', False)}\n"
+        prefix += f"- Personal pronouns (I, we, you): {elements.get('use_personal_pronouns', True)}\n\n"
         
         # Add common phrases
         if common_phrases:
-            prompt += f"Phrases I commonly use: {', '.join(common_phrases)}\n"
+            prefix += f"Phrases I commonly use: {', '.join(common_phrases)}\n"
         
         # Add phrases to avoid
         if avoid_phrases:
-            prompt += f"NEVER use these phrases: {', '.join(avoid_phrases)}\n"
+            prefix += f"NEVER use these phrases: {', '.join(avoid_phrases)}\n"
         
         # Add CTA templates
         if cta_templates:
-            prompt += f"\nCall-to-action examples: {', '.join(cta_templates[:3])}\n"
-        
-        prompt += f"\nMax length: {max_length} characters"
-        prompt += "\nDo not include hashtags in the caption (they will be added separately)."
-        prompt += "\n\nNow write a caption for this video matching MY exact style:"
+            prefix += f"\nCall-to-action examples: {', '.join(cta_templates[:3])}\n"
         
-        return prompt
+        prefix += "\nDo not include hashtags in the caption (they will be added separately)."
+        return prefix
     
-    def generate_full_post(self, video_path: str, tone: str = "casual") -> Dict[str, any]:
+    def _system(self, role: str) -> str:
+        """System message: the compiled style prefix (if any) first, then the role"""
+        if self.style_prefix:
+            return f"{self.style_prefix}\n\n{role}"
+        return role
+    
+    def _build_custom_prompt(self, video_name: str, video_description: str, 
+                           tone: str, max_length: int) -> str:
         """
-        Generate complete post with caption and hashtags
+        Build the per-video part of a styled prompt (the style itself is
+        in the system message, see _compile_style_prefix)
         
         Args:
-            video_path: Path to the video file
-            tone: Tone for the caption
+            video_name: Name of the video file
+            video_description: Description of the video content
+            tone: Desired tone
+            max_length: Max character length
             
         Returns:
-            Dictionary with 'caption', 'hashtags', and 'full_text'
+            Custom prompt string
         """
-        # Generate caption
-        caption = self.generate_caption(video_path, tone)
+        # Build video context
+        video_context = f"Video file: {video_name}"
+        if video_description:
+            video_context += f"\nVideo content: {video_description}"
+        else:
+            video_context += "\n(No description provided - use filename as context)"
         
-        # Generate hashtags
-        hashtags = self.generate_hashtags(video_path, caption)
+        prompt = f"""Generate a social media caption for this video.
+
+{video_context}
+"""
+        prompt += f"\nMax length: {max_length} characters"
+        prompt += "\n\nNow write a caption for this video matching MY exact style:"
         
+        return prompt
+    
+    def _post_prompt(self, video_name: str, tone: str, max_length: int, variation: int = 0) -> str:
+        """Prompt asking for caption and hashtags together as a JSON object"""
+        tag_count = self.hashtag_config['max_count'] - len(self.hashtag_config.get('custom_tags', []))
+        return self._caption_prompt(video_name, tone, max_length, variation) + f"""
+Also choose {tag_count} relevant hashtags for the video: a mix of popular and niche, without the # symbol.
+
+Respond with only a JSON object, no other text:
+{{"caption": "<the caption>", "hashtags": ["<hashtag>", ...]}}
+"""
+    
+    def _post_result(self, text: str, max_length: int) -> Tuple[str, List[str]]:
+        caption, hashtags = _parse_post(text)
+        caption = self._fit(caption, max_length)
+        hashtags = self._with_custom_tags(hashtags)
+        logger.info(f"Generated caption: {caption[:50]}... and {len(hashtags)} hashtags in one request")
+        return caption, hashtags
+    
+    @staticmethod
+    def _post(video_path: str, caption: str, hashtags: List[str]) -> Dict[str, any]:
         # Combine for full text
         hashtag_string = ' '.join([f'#{tag}' for tag in hashtags])
         full_text = f"{caption}\n\n{hashtag_string}"
@@ -330,6 +758,151 @@ IMPORTANT: Write in this EXACT style based on these examples:
             'full_text': full_text,
             'video_path': video_path
         }
+    
+    def generate_post(self, video_path: str, tone: str = "casual", max_length: int = 2200,
+                      fresh: bool = False) -> Optional[Tuple[str, List[str]]]:
+        """
+        Generate caption and hashtags in one request, as a JSON object
+        
+        Args:
+            video_path: Path to the video file
+            tone: Tone of the caption
+            max_length: Maximum caption length
+            fresh: Generate a new post even if an identical request is cached
+            
+        Returns:
+            (caption, hashtags) or None if the model's response was unusable
+        """
+        prompt = self._post_prompt(os.path.basename(video_path), tone, max_length)
+        try:
+            text = self._complete(prompt, self._system(POST_SYSTEM), max_tokens=800, purpose="post",
+                                  fresh=fresh, json_mode=True, validate=_parse_post)
+            return self._post_result(text, max_length)
+        except Exception as e:
+            logger.warning(f"Combined caption + hashtags generation failed: {e}")
+            return None
+    
+    def generate_full_post(self, video_path: str, tone: str = "casual",
+                           fresh: bool = False) -> Dict[str, any]:
+        """
+        Generate complete post with caption and hashtags
+        
+        Uses one combined request (ai.combined_generation, on by default) and
+        falls back to separate caption and hashtag requests if its response
+        cannot be parsed.
+        
+        Args:
+            video_path: Path to the video file
+            tone: Tone for the caption
+            fresh: Bypass the LLM cache for a new variation
+            
+        Returns:
+            Dictionary with 'caption', 'hashtags', and 'full_text'
+        """
+        post = None
+        if self.ai_config.get('combined_generation', True):
+            post = self.generate_post(video_path, tone, fresh=fresh)
+        
+        if post:
+            caption, hashtags = post
+        else:
+            # Generate caption
+            caption = self.generate_caption(video_path, tone, fresh=fresh)
+            
+            # Generate hashtags
+            hashtags = self.generate_hashtags(video_path, caption, fresh=fresh)
+        
+        return self._post(video_path, caption, hashtags)
+    
+    async def _agenerate_full_post(self, client, video_path: str, tone: str = "casual",
+                                   max_length: int = 2200, fresh: bool = False,
+                                   variation: int = 0) -> Dict[str, any]:
+        """generate_full_post() on an async client, for one variation of a video's post"""
+        video_name = os.path.basename(video_path)
+        
+        if self.ai_config.get('combined_generation', True):
+            try:
+                text = await self._acomplete(
+                    client, self._post_prompt(video_name, tone, max_length, variation),
+                    self._system(POST_SYSTEM),
+                    max_tokens=800, purpose="post", fresh=fresh, json_mode=True, validate=_parse_post
+                )
+                return self._post(video_path, *self._post_result(text, max_length))
+            except Exception as e:
+                logger.warning(f"Combined caption + hashtags generation failed for {video_name}: {e}")
+        
+        try:
+            caption = self._fit(await self._acomplete(
+                client, self._caption_prompt(video_name, tone, max_length, variation),
+                self._system(CAPTION_SYSTEM),
+                max_tokens=500, purpose="caption", fresh=fresh, stop_at=max_length
+            ), max_length)
+        except Exception as e:
+            logger.error(f"Error generating caption for {video_name}: {e}")
+            caption = f"Check out this amazing video! 🎬✨ {video_name}"
+        
+        try:
+            hashtags = self._with_custom_tags(_clean_hashtags((await self._acomplete(
+                client, self._hashtag_prompt(video_name, caption), HASHTAG_SYSTEM,
+                max_tokens=300, purpose="hashtags", fresh=fresh
+            )).splitlines()))
+        except Exception as e:
+            logger.error(f"Error generating hashtags for {video_name}: {e}")
+            hashtags = ["video", "content", "viral", "trending"] + self.hashtag_config.get('custom_tags', [])
+        
+        return self._post(video_path, caption, hashtags)
+    
+    async def _agenerate_batch(self, jobs: List[Tuple[str, int]], tone: str, fresh: bool,
+                               concurrency: int) -> List[Dict[str, any]]:
+        client = self._async_client()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def generate(video_path, variation):
+            async with semaphore:
+                return await self._agenerate_full_post(client, video_path, tone,
+                                                       fresh=fresh, variation=variation)
+        
+        return await asyncio.gather(*(generate(video_path, variation) for video_path, variation in jobs))
+    
+    def generate_batch(self, video_paths: List[str], tone: str = "casual", variants: int = 1,
+                       concurrency: Optional[int] = None, fresh: bool = False) -> Dict[str, List[dict]]:
+        """
+        Generate posts for many videos concurrently on the async client
+        
+        Args:
+            video_paths: Videos to write posts for; a video listed N times
+                gets N distinct posts (e.g. once per scheduled slot)
+            tone: Tone for the captions
+            variants: Posts per listed occurrence
+            concurrency: Requests in flight at once (defaults to ai.batch_concurrency, then 4)
+            fresh: Bypass the LLM cache
+            
+        Returns:
+            {video_path: [post dictionary, ...]} in first-seen order
+        """
+        concurrency = concurrency or self.ai_config.get('batch_concurrency', 4)
+        counts = {}
+        for video_path in video_paths:
+            counts[video_path] = counts.get(video_path, 0) + variants
+        jobs = [(video_path, variation) for video_path, count in counts.items() for variation in range(count)]
+        
+        started = time.monotonic()
+        posts = asyncio.run(self._agenerate_batch(jobs, tone, fresh, concurrency))
+        logger.info(f"Generated {len(posts)} posts for {len(counts)} videos in "
+                    f"{time.monotonic() - started:.1f}s ({concurrency} concurrent requests)")
+        stats = self.prompt_stats()
+        if stats['requests']:
+            logger.info(f"Prompt eval: {stats['prompt_tokens']} tokens over {stats['requests']} requests, "
+                        f"{stats['prompt_eval_ms_avg']}ms average, {stats['cached_tokens']} tokens from prompt cache")
+        stats = self.stream_stats()
+        if stats['requests']:
+            logger.info(f"Streaming: {stats['ttft_ms_avg']}ms to first token, {stats['total_ms_avg']}ms total "
+                        f"on average, {stats['early_stops']} of {stats['requests']} stopped at the length limit")
+        
+        batch = {video_path: [] for video_path in counts}
+        for post in posts:
+            batch[post['video_path']].append(post)
+        return batch
 
 
 if __name__ == "__main__":
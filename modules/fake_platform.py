@@ -0,0 +1,546 @@
+"""
+Fake Platform Module
+Local stand-in for the YouTube resumable upload endpoint and the Instagram
+rupload/configure endpoints, for offline throughput, resume and load testing
+
+Latency, bandwidth, error rate and per-platform rate limits are configurable
+(see FakePlatformServer); load_test.py drives the whole agent against it.
+
+Run directly for a self-check:
+    python -m modules.fake_platform --size-mb 64 --chunk-mb 8 --drops 3
+"""
+
+import re
+import os
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_PATH = "/upload/youtube/v3/videos"
+RUPLOAD_PATH = "/rupload_"        # + igvideo/<name> or igphoto/<name>
+CONFIGURE_PATH = "/api/v1/media/configure_to_clips/"
+
+_BLOCK = 64 * 1024
+
+
+class _UploadSession:
+    """Bytes received so far for one resumable upload"""
+
+    def __init__(self, total: int, metadata: dict):
+        self.total = total
+        self.metadata = metadata
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.video_id = uuid.uuid4().hex[:11]
+        self.lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.total
+
+    def resource(self) -> dict:
+        return {'kind': 'youtube#video', 'id': self.video_id, **self.metadata,
+                'fileDetails': {'fileSize': self.total, 'sha256': self.digest.hexdigest()}}
+
+
+class _Rupload:
+    """Bytes received so far for one Instagram rupload (video or cover)"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.received = 0
+        self.lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.total
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: 'FakePlatformServer'
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _reply(self, status: int, body: Optional[dict] = None, headers: Optional[dict] = None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _platform(self) -> str:
+        path = urlparse(self.path).path
+        return 'instagram' if path.startswith((RUPLOAD_PATH, '/api/v1/')) else 'youtube'
+
+    def _drain(self):
+        self._read(int(self.headers.get('Content-Length', 0)))
+
+    def _read(self, length: int, sink: Optional[Callable[[bytes], None]] = None) -> int:
+        """Read a request body in blocks at the server's bandwidth; returns bytes read"""
+        read = 0
+        while read < length:
+            block = self.rfile.read(min(length - read, _BLOCK))
+            if not block:
+                break
+            self.server.shape(len(block))
+            if sink:
+                sink(block)
+            read += len(block)
+        return read
+
+    def _admit(self) -> bool:
+        """Apply latency, rate limit and error injection; False if already answered"""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        retry_in = server.take_request(self._platform())
+        if retry_in is not None:
+            self._drain()
+            self._reply(429, {'error': 'rate limited', 'status': 'fail',
+                              'message': 'Please wait a few minutes before you try again.'},
+                        headers={'Retry-After': str(max(1, math.ceil(retry_in)))})
+            return False
+
+        if server.inject_error():
+            self._drain()
+            self._reply(503, {'error': 'injected failure', 'status': 'fail'})
+            return False
+        return True
+
+    def _incomplete(self, session: _UploadSession):
+        headers = {'Range': f"bytes=0-{session.received - 1}"} if session.received else {}
+        self._reply(308, headers=headers)
+
+    def do_GET(self):
+        if not self._admit():
+            return
+        url = urlparse(self.path)
+        if url.path.startswith(RUPLOAD_PATH):
+            # Resume point of an Instagram rupload
+            upload = self.server.ruploads.get(url.path)
+            return self._reply(200, {'offset': upload.received if upload else 0})
+        self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if not self._admit():
+            return
+        url = urlparse(self.path)
+        if url.path.startswith(RUPLOAD_PATH):
+            return self._rupload(url.path)
+        if url.path == CONFIGURE_PATH:
+            return self._configure()
+        if url.path != UPLOAD_PATH or parse_qs(url.query).get('uploadType') != ['resumable']:
+            return self._reply(404, {'error': 'not found'})
+
+        length = int(self.headers.get('Content-Length', 0))
+        metadata = json.loads(self.rfile.read(length) or b'{}')
+        total = self.headers.get('X-Upload-Content-Length')
+        if total is None:
+            return self._reply(400, {'error': 'X-Upload-Content-Length required'})
+
+        session_id = uuid.uuid4().hex
+        self.server.sessions[session_id] = _UploadSession(int(total), metadata)
+        host, port = self.server.server_address[:2]
+        location = f"http://{host}:{port}{UPLOAD_PATH}?uploadType=resumable&upload_id={session_id}"
+        self._reply(200, headers={'Location': location})
+
+    def _rupload(self, path: str):
+        length = int(self.headers.get('Content-Length', 0))
+        total = self.headers.get('X-Entity-Length')
+        if total is None:
+            self._drain()
+            return self._reply(400, {'error': 'X-Entity-Length required', 'status': 'fail'})
+
+        with self.server.lock:
+            upload = self.server.ruploads.setdefault(path, _Rupload(int(total)))
+        with upload.lock:
+            offset = int(self.headers.get('Offset', 0))
+            if offset != upload.received:
+                self._drain()
+                return self._reply(400, {'error': f"offset {offset} != {upload.received}",
+                                         'status': 'fail'})
+            received = self._read(length)
+            upload.received += received
+            self.server.add_bytes(received)
+            if received < length:
+                # Client hung up mid-body; it resumes from the stored offset
+                self.close_connection = True
+                return
+            if not upload.complete:
+                return self._reply(200, {'offset': upload.received, 'status': 'ok'})
+        self._reply(200, {'media_id': int(time.time() * 1000), 'status': 'ok'})
+
+    def _configure(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        upload_id = form.get('upload_id', [''])[0]
+        upload = self.server.ruploads.get(f"{RUPLOAD_PATH}igvideo/{upload_id}")
+        if upload is None or not upload.complete:
+            return self._reply(400, {'message': 'Transcode not finished yet.', 'status': 'fail'})
+
+        pk = str(random.getrandbits(63))
+        with self.server.lock:
+            self.server.posts += 1
+        self._reply(200, {'media': {'pk': pk, 'id': f"{pk}_1", 'code': uuid.uuid4().hex[:11],
+                                    'caption': {'text': form.get('caption_text', [''])[0]}},
+                          'upload_id': upload_id, 'status': 'ok'})
+
+    def do_PUT(self):
+        if not self._admit():
+            return
+        url = urlparse(self.path)
+        session_id = parse_qs(url.query).get('upload_id', [None])[0]
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            return self._reply(404, {'error': 'unknown upload session'})
+
+        length = int(self.headers.get('Content-Length', 0))
+        content_range = self.headers.get('Content-Range', '')
+
+        # Status query: 'bytes */total'
+        if content_range.startswith('bytes */'):
+            self.rfile.read(length)
+            if session.complete:
+                return self._reply(200, session.resource())
+            return self._incomplete(session)
+
+        match = re.match(r'bytes (\d+)-(\d+)/(\d+)', content_range)
+        if not match:
+            return self._reply(400, {'error': f"bad Content-Range: {content_range!r}"})
+        start, end = int(match.group(1)), int(match.group(2))
+
+        with session.lock:
+            if start != session.received or end - start + 1 != length:
+                self.rfile.read(length)
+                return self._incomplete(session)
+
+            drop_at = self.server.take_drop(start, end)
+            if drop_at is not None:
+                # Read part of the chunk, then hang up without a response;
+                # the partial chunk is not committed
+                self.rfile.read(drop_at - start)
+                self.server.drops += 1
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+
+            # Hash in blocks so a large chunk never sits in memory whole
+            digest = session.digest.copy()
+            if self._read(length, digest.update) < length:
+                return
+            session.digest = digest
+            session.received += length
+            self.server.add_bytes(length)
+
+            if session.complete:
+                with self.server.lock:
+                    self.server.posts += 1
+                return self._reply(201, session.resource())
+            return self._incomplete(session)
+
+
+class FakePlatformServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server speaking the YouTube resumable upload protocol and
+    Instagram's rupload + configure_to_clips flow
+
+    Connections are dropped mid-chunk when the upload passes any byte
+    offset in `drop_offsets` (each offset fires once).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 drop_offsets: Optional[List[int]] = None,
+                 latency: float = 0.0, bandwidth: Optional[float] = None,
+                 error_rate: float = 0.0, rate_limits: Optional[dict] = None,
+                 seed: Optional[int] = None):
+        """
+        Initialize server (call start() or use as a context manager)
+
+        Args:
+            host: Interface to bind
+            port: Port (0 picks a free one)
+            drop_offsets: Byte offsets at which a YouTube chunk is cut off
+            latency: Seconds added to every request
+            bandwidth: Bytes per second accepted across all uploads (optional)
+            error_rate: Fraction of requests answered with 503
+            rate_limits: {platform: requests per minute}; excess requests get
+                429 with Retry-After
+            seed: Seed for error injection (optional, for repeatable runs)
+        """
+        super().__init__((host, port), _Handler)
+        self.sessions = {}
+        self.ruploads = {}
+        self.drop_offsets = sorted(drop_offsets or [])
+        self.drops = 0
+        self.bytes_received = 0
+        self.posts = 0
+        self.requests = 0
+        self.injected_errors = 0
+        self.rate_limited = 0
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bandwidth = TokenBucket(bandwidth, bandwidth) if bandwidth else None
+        self.rate_limits = {platform: TokenBucket(per_minute / 60, max(1, per_minute / 6))
+                            for platform, per_minute in (rate_limits or {}).items() if per_minute}
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._drop_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def upload_url(self) -> str:
+        return self.base_url + UPLOAD_PATH
+
+    def stats(self) -> dict:
+        """Request, error and byte counters"""
+        with self.lock:
+            return {'requests': self.requests, 'bytes_received': self.bytes_received,
+                    'posts': self.posts,
+                    'injected_errors': self.injected_errors, 'rate_limited': self.rate_limited,
+                    'drops': self.drops}
+
+    def add_bytes(self, nbytes: int):
+        with self.lock:
+            self.bytes_received += nbytes
+
+    def shape(self, nbytes: int):
+        """Block until nbytes may be accepted under the bandwidth cap"""
+        if self.bandwidth:
+            self.bandwidth.acquire(nbytes)
+
+    def take_request(self, platform: str) -> Optional[float]:
+        """Count a request; seconds until the next allowed one if it is over the rate limit"""
+        with self.lock:
+            self.requests += 1
+        bucket = self.rate_limits.get(platform)
+        if bucket is None or bucket.reserve(1, max_wait=0) is not None:
+            return None
+        with self.lock:
+            self.rate_limited += 1
+        return (1 - bucket.available()) / bucket.rate
+
+    def inject_error(self) -> bool:
+        """True if this request should fail (at error_rate)"""
+        with self.lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.injected_errors += 1
+                return True
+        return False
+
+    def take_drop(self, start: int, end: int) -> Optional[int]:
+        """Consume the first pending drop offset inside [start, end]"""
+        with self._drop_lock:
+            for offset in self.drop_offsets:
+                if start <= offset <= end:
+                    self.drop_offsets.remove(offset)
+                    return offset
+        return None
+
+    def start(self) -> 'FakePlatformServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True,
+                                        name="fake-platform")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class FakeInstagramClient:
+    """
+    instagrapi.Client stand-in that posts Reels to a FakePlatformServer
+
+    instagrapi talks to Instagram's hosts directly, so this implements the
+    methods InstagramSessionPool and VideoUploader call on a client, over
+    the same rupload + configure_to_clips requests instagrapi makes. Pass
+    it as the pool's client_factory.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60, throttle: Optional[Callable[[int], None]] = None):
+        """
+        Initialize client
+
+        Args:
+            base_url: FakePlatformServer.base_url
+            timeout: Per-request timeout (seconds)
+            throttle: Called with each chunk size before sending (optional)
+        """
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.throttle = throttle
+        self.session = requests.Session()
+        self.settings = {'uuid': str(uuid.uuid4())}
+        self.username = None
+
+    def load_settings(self, path) -> dict:
+        with open(path, 'r') as f:
+            self.settings = json.load(f)
+        return self.settings
+
+    def dump_settings(self, path) -> bool:
+        with open(path, 'w') as f:
+            json.dump(self.settings, f)
+        return True
+
+    def login(self, username: str, password: str, relogin: bool = False) -> bool:
+        self.username = username
+        return True
+
+    def _rupload(self, kind: str, name: str, path) -> dict:
+        """Upload a file to /rupload_<kind>/<name>, resuming from the server's offset"""
+        from .upload_body import UploadBody
+
+        url = f"{self.base_url}{RUPLOAD_PATH}{kind}/{name}"
+        size = os.path.getsize(path)
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        offset = response.json().get('offset', 0)
+
+        with UploadBody(str(path), throttle=self.throttle) as body:
+            response = self.session.post(url, data=body.slice(offset, size), timeout=self.timeout, headers={
+                'X-Entity-Name': name,
+                'X-Entity-Length': str(size),
+                'Offset': str(offset),
+                'Content-Length': str(size - offset),
+                'Content-Type': 'application/octet-stream',
+            })
+        response.raise_for_status()
+        return response.json()
+
+    def clip_rupload(self, path, thumbnail=None) -> tuple:
+        """
+        Upload a Reel's video and optional cover
+
+        Returns:
+            (upload_id, width, height, duration, thumbnail), like instagrapi
+        """
+        upload_id = f"{int(time.time() * 1000)}{random.randrange(1000):03d}"
+        self._rupload('igvideo', upload_id, path)
+        if thumbnail:
+            self._rupload('igphoto', upload_id, thumbnail)
+        return upload_id, 1080, 1920, 0, thumbnail
+
+    def clip_configure(self, upload_id: str, width: int, height: int, duration: int, thumbnail,
+                       caption: str, usertags=(), location=None, feed_show: str = "1",
+                       extra_data: Optional[dict] = None) -> dict:
+        """
+        Publish an uploaded Reel
+
+        Returns:
+            Response JSON with the 'media', like instagrapi
+        """
+        response = self.session.post(f"{self.base_url}{CONFIGURE_PATH}", timeout=self.timeout, data={
+            'upload_id': upload_id,
+            'caption_text': caption,
+            'clips_share_preview_to_feed': feed_show,
+            **{key: json.dumps(value) if isinstance(value, dict) else value
+               for key, value in (extra_data or {}).items()},
+        })
+        response.raise_for_status()
+        return response.json()
+
+    def clip_upload(self, path, caption: str, thumbnail=None, feed_show: str = "1",
+                    extra_data: Optional[dict] = None) -> SimpleNamespace:
+        """
+        Upload a Reel: video rupload, optional cover rupload, then configure
+
+        Returns:
+            Object with pk, id and code, like instagrapi's Media
+        """
+        upload_id, width, height, duration, thumbnail = self.clip_rupload(path, thumbnail)
+        media = self.clip_configure(upload_id, width, height, duration, thumbnail, caption,
+                                    feed_show=feed_show, extra_data=extra_data)['media']
+        return SimpleNamespace(pk=media['pk'], id=media['id'], code=media['code'])
+
+
+def _self_check(size_mb: int, chunk_mb: int, drops: int) -> bool:
+    """Upload a random file through the fake server and verify it arrived intact"""
+    import os
+    import tempfile
+    from .youtube_upload import ResumableUploader, build_video_metadata
+
+    size = size_mb * 1024 * 1024
+    drop_offsets = [size * (i + 1) // (drops + 1) for i in range(drops)]
+
+    with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+        digest = hashlib.sha256()
+        remaining = size
+        while remaining:
+            block = os.urandom(min(remaining, 1024 * 1024))
+            digest.update(block)
+            f.write(block)
+            remaining -= len(block)
+        path = f.name
+
+    try:
+        with FakePlatformServer(drop_offsets=drop_offsets) as server:
+            uploader = ResumableUploader(server.upload_url, chunk_size=chunk_mb * 1024 * 1024)
+            result = uploader.upload(path, lambda: build_video_metadata("Self check", ['test']))
+            sent = server.bytes_received
+    finally:
+        os.remove(path)
+
+    intact = result['resource']['fileDetails']['sha256'] == digest.hexdigest()
+    print(f"Uploaded {size_mb}MB in {result['seconds']:.2f}s "
+          f"({size_mb / max(result['seconds'], 1e-6):.1f} MB/s)")
+    print(f"Drops: {len(drop_offsets)}, resumes: {result['resumes']}, "
+          f"bytes committed: {sent} of {size}")
+    print(f"Content intact: {intact}")
+    try:
+        import resource
+        # ru_maxrss is KiB on Linux; client and server share this process
+        print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+    except ImportError:
+        pass
+    return intact and result['resumes'] == len(drop_offsets)
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resumable upload self-check against a local fake')
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--drops', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(0 if _self_check(args.size_mb, args.chunk_mb, args.drops) else 1)
@@ -0,0 +1,118 @@
+"""
+Upload Fan-out Module
+Uploads one video to several platforms concurrently
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UploadFanout:
+    """Runs per-platform uploads on a thread pool with concurrency limits and timeouts"""
+
+    def __init__(self, uploader, max_workers: int = 4,
+                 platform_concurrency: Optional[Dict[str, int]] = None,
+                 platform_timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = 900):
+        """
+        Initialize fan-out
+
+        Args:
+            uploader: VideoUploader used for each platform upload
+            max_workers: Total upload threads
+            platform_concurrency: {platform: max simultaneous uploads} (default 1 each)
+            platform_timeouts: {platform: seconds} before an upload is given up on
+            default_timeout: Timeout for platforms not listed in platform_timeouts
+        """
+        self.uploader = uploader
+        self.platform_concurrency = platform_concurrency or {}
+        self.platform_timeouts = platform_timeouts or {}
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, uploader, upload_config: dict) -> 'UploadFanout':
+        """Build a fan-out from the 'upload' section of config.yaml"""
+        return cls(
+            uploader,
+            max_workers=upload_config.get('max_workers', 4),
+            platform_concurrency=upload_config.get('concurrency', {}),
+            platform_timeouts=upload_config.get('timeouts', {}),
+            default_timeout=upload_config.get('default_timeout', 900)
+        )
+
+    def _semaphore(self, platform: str) -> threading.Semaphore:
+        with self._lock:
+            if platform not in self._semaphores:
+                limit = self.platform_concurrency.get(platform, 1)
+                self._semaphores[platform] = threading.BoundedSemaphore(limit)
+            return self._semaphores[platform]
+
+    def _upload(self, platform: str, kwargs: dict,
+                on_result: Optional[Callable[[str, dict], None]] = None) -> Optional[dict]:
+        with self._semaphore(platform):
+            start = time.monotonic()
+            result = self.uploader.upload(platform=platform, **kwargs)
+            if result is not None:
+                result['elapsed'] = round(time.monotonic() - start, 2)
+                if on_result:
+                    # Recorded as soon as the platform answers, not after the slowest one
+                    on_result(platform, result)
+            return result
+
+    def run(self, jobs: Dict[str, dict],
+            on_result: Optional[Callable[[str, dict], None]] = None) -> Dict[str, dict]:
+        """
+        Upload to all platforms at once and wait for every result
+
+        A slow platform only costs its own timeout and an exception in one
+        platform is reported as that platform's failure, so neither blocks
+        nor hides the others.
+
+        Args:
+            jobs: {platform: keyword arguments for VideoUploader.upload}
+            on_result: Called from the upload thread with (platform, result)
+                when an upload finishes (optional)
+
+        Returns:
+            {platform: result dictionary} (every result has 'success')
+        """
+        start = time.monotonic()
+        futures = {platform: self._executor.submit(self._upload, platform, kwargs, on_result)
+                   for platform, kwargs in jobs.items()}
+
+        results = {}
+        for platform, future in futures.items():
+            timeout = self.platform_timeouts.get(platform, self.default_timeout)
+            remaining = max(timeout - (time.monotonic() - start), 0)
+            try:
+                result = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # The worker thread cannot be killed; its late result is discarded
+                logger.error(f"✗ {platform} upload timed out after {timeout:.0f}s")
+                result = {'platform': platform, 'success': False, 'timed_out': True,
+                          'error': f"Timed out after {timeout:.0f}s"}
+            except Exception as e:
+                logger.error(f"✗ {platform} upload raised: {e}", exc_info=True)
+                result = {'platform': platform, 'success': False, 'error': str(e)}
+
+            if result is None:
+                result = {'platform': platform, 'success': False, 'error': 'No result'}
+            result.setdefault('timestamp', datetime.now().isoformat())
+            result.setdefault('elapsed', round(time.monotonic() - start, 2))
+            results[platform] = result
+
+        logger.info(f"Fan-out to {len(jobs)} platforms finished in {time.monotonic() - start:.1f}s")
+        return results
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting uploads and release the thread pool"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,181 @@
+"""
+Fingerprint Module
+Stable content identity for video files (memory-mapped, streaming)
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+EDGE_SIZE = 4 * 1024 * 1024
+
+
+def fingerprint_file(file_path: str, fast: bool = False, chunk_size: int = CHUNK_SIZE,
+                     edge_size: int = EDGE_SIZE) -> str:
+    """
+    Hash a file through mmap in fixed-size chunks
+
+    Each chunk is mapped on its own and unmapped once hashed, so resident
+    memory stays around chunk_size however large the video is.
+
+    Args:
+        file_path: Path to file
+        fast: Hash only size + first and last edge_size bytes
+        chunk_size: Bytes hashed per step in full mode
+        edge_size: Bytes taken from each end in fast mode
+
+    Returns:
+        Fingerprint string, 'sha256:<hex>' or 'fast:<hex>'
+    """
+    digest = hashlib.sha256()
+    size = os.path.getsize(file_path)
+    mode = 'fast' if fast and size > 2 * edge_size else 'sha256'
+
+    if size == 0:
+        return f"{mode}:{digest.hexdigest()}"
+
+    if mode == 'fast':
+        digest.update(str(size).encode())
+        ranges = [(0, edge_size), (size - edge_size, size)]
+    else:
+        ranges = [(offset, min(offset + chunk_size, size))
+                  for offset in range(0, size, chunk_size)]
+
+    with open(file_path, 'rb') as f:
+        for start, end in ranges:
+            # Map offsets must be aligned; hash from the requested start
+            aligned = start - start % mmap.ALLOCATIONGRANULARITY
+            with mmap.mmap(f.fileno(), end - aligned, offset=aligned, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mm) as view, view[start - aligned:] as chunk:
+                    digest.update(chunk)
+
+    return f"{mode}:{digest.hexdigest()}"
+
+
+class Fingerprinter:
+    """Fingerprints files, caching results by (device, inode, size, mtime)"""
+
+    def __init__(self, cache_path: Optional[str] = "cache/fingerprints.json", fast: bool = False,
+                 max_entries: int = 5000):
+        """
+        Initialize fingerprinter
+
+        Args:
+            cache_path: JSON file for cached fingerprints (None keeps them in memory only)
+            fast: Default mode for fingerprint() calls
+            max_entries: Entries kept; the oldest are dropped past it
+        """
+        self.cache_path = cache_path
+        self.fast = fast
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = self._load() if cache_path else {}
+        self._prune()
+
+    def _load(self) -> dict:
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load fingerprint cache: {e}")
+        return {}
+
+    @staticmethod
+    def _stat_key(st: os.stat_result, fast: bool) -> str:
+        return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{'fast' if fast else 'full'}"
+
+    def _prune(self):
+        """Drop entries whose file is gone or changed, then the oldest past max_entries"""
+        kept = {}
+        for key, entry in self._entries.items():
+            # Entries without a path (older cache format) cannot be checked
+            if not isinstance(entry, dict) or not entry.get('path'):
+                continue
+            try:
+                st = os.stat(entry['path'])
+            except OSError:
+                continue
+            if self._stat_key(st, key.endswith(':fast')) == key:
+                kept[key] = entry
+        self._entries = dict(list(kept.items())[-self.max_entries:])
+
+    def _save(self, key: str, entry: dict):
+        """
+        Write one entry, merged with what other processes saved meanwhile
+
+        prepare-all workers share the cache file, so it is re-read under a
+        file lock and only this entry is added before writing it back.
+        """
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(f"{self.cache_path}.lock", 'a')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            entries.pop(key, None)
+            entries[key] = entry
+            entries = dict(list(entries.items())[-self.max_entries:])
+            # Per-process temp name so writers never share a half-written file
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        self._entries.update(entries)
+
+    def fingerprint(self, file_path: str, fast: Optional[bool] = None) -> str:
+        """
+        Get a file's fingerprint, hashing only if the file changed
+
+        The cache key uses the inode rather than the path, so renaming or
+        moving a file within the same filesystem keeps its cached entry.
+
+        Args:
+            file_path: Path to file
+            fast: Override the default mode (head + tail + size)
+
+        Returns:
+            Fingerprint string
+        """
+        fast = self.fast if fast is None else fast
+        key = self._stat_key(os.stat(file_path), fast)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached:
+                # Remember where the file is now, for pruning
+                cached['path'] = os.path.abspath(file_path)
+                return cached['fingerprint']
+
+        value = fingerprint_file(file_path, fast=fast)
+        entry = {'fingerprint': value, 'path': os.path.abspath(file_path)}
+        with self._lock:
+            self._entries[key] = entry
+            if self.cache_path:
+                try:
+                    self._save(key, entry)
+                except OSError as e:
+                    logger.warning(f"Could not save fingerprint cache: {e}")
+            if len(self._entries) > self.max_entries:
+                self._prune()
+        return value
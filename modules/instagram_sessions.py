@@ -0,0 +1,220 @@
+"""
+Instagram Sessions Module
+One warm instagrapi client per account, with per-account session files
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Session file of the original single-account setup
+LEGACY_SESSION_FILE = "instagram_session.json"
+
+
+class InstagramSessionPool:
+    """
+    Pool of logged-in instagrapi clients, one per account
+
+    Each client keeps its own HTTP session (and so its connections) for
+    the life of the process. A per-account lock serializes uploads on one
+    account (instagrapi clients are not thread-safe) while different
+    accounts upload in parallel.
+    """
+
+    def __init__(self, accounts: Dict[str, dict], sessions_dir: str = "sessions",
+                 save_interval: float = 3600,
+                 client_factory: Optional[Callable[[], object]] = None):
+        """
+        Initialize session pool (clients are created on first use or by warm())
+
+        Args:
+            accounts: {name: {'username', 'password', 'session_file' (optional)}}
+            sessions_dir: Directory for per-account session files
+            save_interval: Seconds between session file refreshes after use
+            client_factory: Creates an instagrapi Client (defaults to instagrapi.Client)
+        """
+        self.accounts = accounts
+        self.sessions_dir = sessions_dir
+        self.save_interval = save_interval
+        self.client_factory = client_factory
+        self._clients = {}
+        self._saved_at = {}
+        self._locks = {name: threading.Lock() for name in accounts}
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, instagram_config: dict) -> 'InstagramSessionPool':
+        """
+        Build a pool from the 'instagram' section of config.yaml
+
+        Accounts are listed under instagram.accounts; the legacy top-level
+        username/password become an account named after the username that
+        keeps using instagram_session.json.
+        """
+        accounts = {}
+        for account in instagram_config.get('accounts', []):
+            name = account.get('name') or account.get('username')
+            if name and account.get('username') and account.get('password'):
+                accounts[name] = account
+            else:
+                logger.warning(f"Skipping Instagram account without credentials: {name}")
+
+        username = instagram_config.get('username')
+        if username and instagram_config.get('password') and username not in accounts:
+            accounts[username] = {'username': username,
+                                  'password': instagram_config['password'],
+                                  'session_file': LEGACY_SESSION_FILE}
+
+        return cls(accounts,
+                   sessions_dir=instagram_config.get('sessions_dir', 'sessions'),
+                   save_interval=instagram_config.get('session_save_interval', 3600))
+
+    @property
+    def names(self) -> List[str]:
+        """Account names in config order"""
+        return list(self.accounts)
+
+    @property
+    def default_account(self) -> Optional[str]:
+        """First configured account"""
+        return next(iter(self.accounts), None)
+
+    def session_file(self, name: str) -> str:
+        """Path of an account's session file"""
+        account = self.accounts[name]
+        return account.get('session_file') or os.path.join(self.sessions_dir, f"{name}.json")
+
+    def _new_client(self):
+        if self.client_factory:
+            return self.client_factory()
+        from instagrapi import Client
+        return Client()
+
+    def _save(self, name: str, client):
+        path = self.session_file(name)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        client.dump_settings(path)
+        self._saved_at[name] = time.monotonic()
+
+    def _login(self, name: str):
+        """Create a client from the session file, logging in only if there is none"""
+        account = self.accounts[name]
+        client = self._new_client()
+        path = self.session_file(name)
+
+        if os.path.exists(path):
+            # Reuses the stored cookies and device ids; no login request is made
+            client.load_settings(path)
+            client.login(account['username'], account['password'])
+            logger.info(f"Loaded Instagram session for {name}")
+        else:
+            client.login(account['username'], account['password'])
+            logger.info(f"Instagram login successful for {name}")
+        self._save(name, client)
+        return client
+
+    def get(self, name: Optional[str] = None):
+        """
+        Get the warm client for an account, creating it on first use
+
+        Args:
+            name: Account name (defaults to the first account)
+
+        Returns:
+            instagrapi Client
+        """
+        name = name or self.default_account
+        if name not in self.accounts:
+            raise KeyError(f"Unknown Instagram account: {name}")
+
+        with self._locks[name]:
+            if name not in self._clients:
+                self._clients[name] = self._login(name)
+            return self._clients[name]
+
+    def warm(self, max_workers: int = 4) -> Dict[str, bool]:
+        """
+        Create every account's client in parallel
+
+        Returns:
+            {account: True if the client is ready}
+        """
+        def warm_one(name):
+            try:
+                self.get(name)
+                return True
+            except Exception as e:
+                logger.error(f"Instagram initialization error for {name}: {e}")
+                return False
+
+        if not self.accounts:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(self.accounts))) as executor:
+            return dict(zip(self.names, executor.map(warm_one, self.names)))
+
+    def refresh(self, name: str):
+        """
+        Log an account in again after its session expired
+
+        Keeps the stored device ids, so Instagram sees the same device
+        rather than a new one (which is what triggers challenges).
+        """
+        account = self.accounts[name]
+        client = self._clients.get(name)
+        if client is None:
+            self._clients[name] = self._login(name)
+            return
+
+        logger.info(f"Refreshing Instagram session for {name}")
+        client.login(account['username'], account['password'], relogin=True)
+        self._save(name, client)
+
+    @contextmanager
+    def session(self, name: Optional[str] = None):
+        """
+        Hold an account's client exclusively
+
+        Args:
+            name: Account name (defaults to the first account)
+
+        Yields:
+            instagrapi Client
+        """
+        name = name or self.default_account
+        client = self.get(name)
+        with self._locks[name]:
+            yield client
+            if time.monotonic() - self._saved_at.get(name, 0) > self.save_interval:
+                # Persist refreshed cookies so a restart does not need a login
+                self._save(name, client)
+
+    def run(self, name: Optional[str], action: Callable):
+        """
+        Run action(client) on an account, re-logging in once if the session expired
+
+        Args:
+            name: Account name (defaults to the first account)
+            action: Callable taking the instagrapi Client
+
+        Returns:
+            Whatever action returns
+        """
+        name = name or self.default_account
+        try:
+            with self.session(name) as client:
+                return action(client)
+        except Exception as e:
+            if type(e).__name__ != 'LoginRequired':
+                raise
+            with self._locks[name]:
+                self.refresh(name)
+            with self.session(name) as client:
+                return action(client)
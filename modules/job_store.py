@@ -0,0 +1,346 @@
+"""
+Job Store Module
+Durable upload jobs and caption rotation in SQLite (WAL mode)
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+PREPARING = 'preparing'
+UPLOADING = 'uploading'
+PUBLISHED = 'published'
+FAILED = 'failed'
+
+# Allowed state changes; a job in UPLOADING after a crash may already be
+# live on the platform, so it is never moved back to PENDING automatically
+TRANSITIONS = {
+    PENDING: {PREPARING, UPLOADING, FAILED},
+    PREPARING: {UPLOADING, FAILED, PENDING},
+    UPLOADING: {PUBLISHED, FAILED},
+    FAILED: {PENDING, PREPARING, UPLOADING},
+    PUBLISHED: set(),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    video TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    state TEXT NOT NULL,
+    caption_index INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    media_id TEXT,
+    error TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    published_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_slot ON jobs (fingerprint, slot);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, updated_at);
+CREATE INDEX IF NOT EXISTS jobs_by_video ON jobs (video, platform, published_at);
+
+CREATE TABLE IF NOT EXISTS caption_rotation (
+    video TEXT PRIMARY KEY,
+    last_caption_index INTEGER NOT NULL DEFAULT -1,
+    upload_count INTEGER NOT NULL DEFAULT 0,
+    last_upload TEXT,
+    fingerprint TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def make_key(fingerprint: str, platform: str, slot: str) -> str:
+    """Idempotency key of one post: the same video on the same platform in the same slot"""
+    return f"{fingerprint}|{platform}|{slot}"
+
+
+class JobStore:
+    """
+    Upload jobs, one row per (video fingerprint, platform, slot)
+
+    Every state change is its own committed transaction, so a crash
+    after a platform accepted a post leaves that job PUBLISHED (or at
+    worst UPLOADING) and the next run does not post it again.
+    """
+
+    def __init__(self, db_path: str = "upload_jobs.db"):
+        """
+        Initialize job store, creating the schema if needed
+
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; fan-out workers record their own results
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get a job by idempotency key"""
+        row = self._connection().execute(
+            "SELECT * FROM jobs WHERE idempotency_key = ?", (key,)).fetchone()
+        return self._row(row)
+
+    def create(self, video: str, fingerprint: str, platform: str, slot: str,
+               caption_index: Optional[int] = None) -> dict:
+        """
+        Create a job, or return the existing one for the same key
+
+        Args:
+            video: Video filename
+            fingerprint: Content fingerprint of the source video
+            platform: Upload target
+            slot: Slot identifier (e.g. '2026-01-08T09:00')
+            caption_index: Caption used for the post
+
+        Returns:
+            Job dictionary (check 'state' to see whether it still needs work)
+        """
+        key = make_key(fingerprint, platform, slot)
+        now = datetime.now().isoformat()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO jobs (idempotency_key, video, fingerprint, platform, slot, "
+                "state, caption_index, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, video, fingerprint, platform, slot, PENDING, caption_index, now, now)
+            )
+        return self.get(key)
+
+    def slot_jobs(self, fingerprint: str, slot: str) -> List[dict]:
+        """All jobs of one video in one slot"""
+        rows = self._connection().execute(
+            "SELECT * FROM jobs WHERE fingerprint = ? AND slot = ? ORDER BY id",
+            (fingerprint, slot)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def transition(self, key: str, state: str, **fields) -> bool:
+        """
+        Move a job to a new state if the transition is allowed
+
+        Args:
+            key: Idempotency key
+            state: Target state
+            **fields: Extra columns to set (error, media_id, result)
+
+        Returns:
+            True if the job moved, False if it was not in a state that allows it
+        """
+        sources = [source for source, targets in TRANSITIONS.items() if state in targets]
+        if not sources:
+            return False
+
+        now = datetime.now().isoformat()
+        updates = {'state': state, 'updated_at': now, **fields}
+        if 'result' in updates and updates['result'] is not None:
+            updates['result'] = json.dumps(updates['result'], default=str)
+        if state == UPLOADING:
+            assignments = ', '.join(f"{column} = ?" for column in updates) + ", attempts = attempts + 1"
+        else:
+            assignments = ', '.join(f"{column} = ?" for column in updates)
+        placeholders = ', '.join('?' for _ in sources)
+
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE jobs SET {assignments} WHERE idempotency_key = ? AND state IN ({placeholders})",
+                (*updates.values(), key, *sources)
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, key: str) -> bool:
+        """Atomically take a job for uploading; False if another run already has or did it"""
+        return self.transition(key, UPLOADING)
+
+    def mark_failed(self, key: str, error: str, result: Optional[dict] = None) -> bool:
+        """Record a failed upload (it will be retried on the next run of its slot)"""
+        return self.transition(key, FAILED, error=error, result=result)
+
+    def mark_unconfirmed(self, key: str, error: str, result: Optional[dict] = None) -> bool:
+        """
+        Record an upload that failed after the platform was handed the media
+
+        The job stays UPLOADING, like an interrupted upload: the post may be
+        live, so later runs report it for manual checking instead of retrying.
+
+        Returns:
+            True if the job was UPLOADING
+        """
+        now = datetime.now().isoformat()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET error = ?, result = ?, updated_at = ? WHERE idempotency_key = ? AND state = ?",
+                (f"Verify manually, the post may be live: {error}",
+                 json.dumps(result, default=str) if result else None, now, key, UPLOADING)
+            )
+            return cursor.rowcount == 1
+
+    def mark_published(self, key: str, result: Optional[dict] = None) -> bool:
+        """
+        Record a published post, advancing caption rotation once its slot is complete
+
+        Args:
+            key: Idempotency key
+            result: Upload result dictionary
+
+        Returns:
+            True if the job moved to PUBLISHED
+        """
+        now = datetime.now().isoformat()
+        with self._transaction() as db:
+            job = db.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (key,)).fetchone()
+            if job is None or job['state'] != UPLOADING:
+                return False
+
+            db.execute(
+                "UPDATE jobs SET state = ?, media_id = ?, result = ?, error = NULL, "
+                "updated_at = ?, published_at = ? WHERE idempotency_key = ?",
+                (PUBLISHED, str((result or {}).get('media_id') or '') or None,
+                 json.dumps(result, default=str) if result else None, now, now, key)
+            )
+
+            # The last platform of the slot to publish advances the rotation,
+            # inside the same transaction so it happens exactly once
+            remaining = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE fingerprint = ? AND slot = ? AND state != ?",
+                (job['fingerprint'], job['slot'], PUBLISHED)).fetchone()[0]
+            if remaining == 0 and job['caption_index'] is not None:
+                db.execute(
+                    "INSERT INTO caption_rotation (video, last_caption_index, upload_count, last_upload, fingerprint) "
+                    "VALUES (?, ?, 1, ?, ?) ON CONFLICT(video) DO UPDATE SET "
+                    "last_caption_index = excluded.last_caption_index, upload_count = upload_count + 1, "
+                    "last_upload = excluded.last_upload, fingerprint = excluded.fingerprint",
+                    (job['video'], job['caption_index'], now, job['fingerprint'])
+                )
+        return True
+
+    def jobs(self, state: Optional[str] = None, video: Optional[str] = None,
+             limit: int = 100) -> List[dict]:
+        """
+        List jobs, newest first
+
+        Args:
+            state: Only jobs in this state (optional)
+            video: Only jobs of this video (optional)
+            limit: Maximum number of jobs
+        """
+        clauses, params = [], []
+        if state:
+            clauses.append("state = ?")
+            params.append(state)
+        if video:
+            clauses.append("video = ?")
+            params.append(video)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT * FROM jobs {where} ORDER BY updated_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def state_counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        rows = self._connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    def rotation(self, video: str) -> dict:
+        """
+        Caption rotation state of a video
+
+        Returns:
+            Dictionary with last_caption_index, upload_count, last_upload and fingerprint
+        """
+        row = self._connection().execute(
+            "SELECT * FROM caption_rotation WHERE video = ?", (video,)).fetchone()
+        if row is None:
+            return {'video': video, 'last_caption_index': -1, 'upload_count': 0,
+                    'last_upload': None, 'fingerprint': None}
+        return dict(row)
+
+    def next_caption_index(self, video: str, num_captions: int) -> int:
+        """Caption index after the last one published for a video"""
+        return (self.rotation(video)['last_caption_index'] + 1) % max(num_captions, 1)
+
+    def import_history(self, history_path: str = "upload_history.json") -> int:
+        """
+        Import caption rotation from the legacy upload_history.json (once)
+
+        Args:
+            history_path: Path of the JSON history file
+
+        Returns:
+            Number of videos imported (0 if already imported or no file)
+        """
+        if not os.path.exists(history_path):
+            return 0
+
+        with self._transaction() as db:
+            done = db.execute("SELECT value FROM meta WHERE key = 'history_imported'").fetchone()
+            if done:
+                return 0
+
+            try:
+                with open(history_path, 'r') as f:
+                    history = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not import {history_path}: {e}")
+                return 0
+
+            for video, entry in history.items():
+                db.execute(
+                    "INSERT OR IGNORE INTO caption_rotation "
+                    "(video, last_caption_index, upload_count, last_upload, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    (video, entry.get('last_caption_index', -1), entry.get('upload_count', 0),
+                     entry.get('last_upload'), entry.get('fingerprint'))
+                )
+            db.execute("INSERT INTO meta (key, value) VALUES ('history_imported', ?)",
+                       (datetime.now().isoformat(),))
+
+        logger.info(f"Imported upload history for {len(history)} videos from {history_path}")
+        return len(history)
@@ -0,0 +1,210 @@
+"""
+LLM Cache Module
+Disk-backed cache of LLM completions keyed by model, prompt and generation parameters
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS completions_by_access ON completions (accessed_at);
+
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _normalize(text: str) -> str:
+    # Trailing spaces and runs of blank lines do not change what the model is asked
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+
+
+def make_key(model: str, messages: List[dict], params: Optional[dict] = None) -> str:
+    """
+    Cache key of one completion request
+
+    Args:
+        model: Model name (backend-qualified, e.g. 'ollama:llama3')
+        messages: Chat messages [{'role', 'content'}]
+        params: Generation parameters that change the output (max_tokens, temperature, ...)
+
+    Returns:
+        Hex SHA-256 of the normalized request
+    """
+    request = {
+        'model': model,
+        'messages': [{'role': message['role'], 'content': _normalize(message['content'])}
+                     for message in messages],
+        'params': params or {}
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Completions cache in SQLite with a TTL and least-recently-used eviction
+
+    Entries older than `ttl` seconds are treated as misses and dropped;
+    past `max_entries`, the least recently read entries are evicted.
+    """
+
+    def __init__(self, db_path: str = "cache/llm_cache.db", ttl: float = 7 * 86400,
+                 max_entries: int = 2000):
+        """
+        Initialize cache, creating the database if needed
+
+        Args:
+            db_path: SQLite database file
+            ttl: Seconds an entry stays valid (0 keeps entries until evicted)
+            max_entries: Entries kept before least recently used ones are evicted
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, cache_config: dict) -> Optional['LLMCache']:
+        """
+        Build a cache from the 'ai.cache' section of config.yaml
+
+        Returns:
+            LLMCache or None if caching is disabled
+        """
+        if not cache_config.get('enabled', True):
+            return None
+        return cls(
+            db_path=cache_config.get('path', 'cache/llm_cache.db'),
+            ttl=cache_config.get('ttl_hours', 168) * 3600,
+            max_entries=cache_config.get('max_entries', 2000)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, db: sqlite3.Connection, name: str, amount: int = 1):
+        db.execute("INSERT INTO stats (name, value) VALUES (?, ?) "
+                   "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached response text or None on a miss (or an expired entry)
+        """
+        db = self._connection()
+        now = time.time()
+        row = db.execute("SELECT response, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+
+        if row is not None and self._expired(row[1], now):
+            db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._count(db, 'expired')
+            row = None
+
+        if row is None:
+            self._count(db, 'misses')
+            with self._lock:
+                self.misses += 1
+            return None
+
+        db.execute("UPDATE completions SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count(db, 'hits')
+        with self._lock:
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str, model: str = ""):
+        """
+        Store a completion, evicting least recently used entries past max_entries
+
+        Args:
+            key: Key from make_key()
+            response: Response text
+            model: Model name (informational)
+        """
+        db = self._connection()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("INSERT OR REPLACE INTO completions (key, model, response, created_at, accessed_at) "
+                       "VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            excess = db.execute("SELECT COUNT(*) FROM completions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute("DELETE FROM completions WHERE key IN "
+                           "(SELECT key FROM completions ORDER BY accessed_at LIMIT ?)", (excess,))
+                self._count(db, 'evictions', excess)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups in this process that were hits"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """
+        Get cache counters and usage
+
+        Returns:
+            Dictionary with all-time hits, misses, expired and evictions,
+            this process's session_hits/session_misses, and entries
+        """
+        db = self._connection()
+        counters = dict(db.execute("SELECT name, value FROM stats").fetchall())
+        entries = db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        with self._lock:
+            session = {'session_hits': self.hits, 'session_misses': self.misses}
+        return {
+            **{name: counters.get(name, 0) for name in ('hits', 'misses', 'expired', 'evictions')},
+            **session,
+            'entries': entries,
+            'max_entries': self.max_entries
+        }
+
+    def clear(self) -> int:
+        """Delete every entry; returns how many were removed"""
+        cursor = self._connection().execute("DELETE FROM completions")
+        return cursor.rowcount
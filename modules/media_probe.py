@@ -0,0 +1,288 @@
+"""
+Media Probe Module
+Header-only video inspection with ffprobe and a persistent probe cache
+"""
+
+import os
+import json
+import shutil
+import logging
+import subprocess
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def find_ffprobe(configured: Optional[str] = None) -> Optional[str]:
+    """
+    Locate the ffprobe binary
+
+    Args:
+        configured: Explicit path from config (optional)
+
+    Returns:
+        Path to ffprobe or None if it is not available
+    """
+    if configured:
+        return configured if os.path.exists(configured) else shutil.which(configured)
+    return shutil.which('ffprobe')
+
+
+def find_ffmpeg(configured: Optional[str] = None) -> Optional[str]:
+    """
+    Locate the ffmpeg binary (falls back to the one bundled with moviepy)
+
+    Args:
+        configured: Explicit path from config (optional)
+
+    Returns:
+        Path to ffmpeg or None if it is not available
+    """
+    if configured:
+        return configured if os.path.exists(configured) else shutil.which(configured)
+
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe frame rate such as '30000/1001'"""
+    if not rate or rate == '0/0':
+        return None
+    try:
+        if '/' in rate:
+            num, den = rate.split('/', 1)
+            return round(float(num) / float(den), 3) if float(den) else None
+        return float(rate)
+    except ValueError:
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rotation(stream: dict) -> int:
+    """Read rotation from the legacy 'rotate' tag or the display matrix side data"""
+    rotate = stream.get('tags', {}).get('rotate')
+    if rotate is not None:
+        return _to_int(rotate) or 0
+
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            # The display matrix stores counter-clockwise rotation
+            return int(-float(side_data['rotation'])) % 360
+    return 0
+
+
+def parse_probe_output(data: dict) -> dict:
+    """
+    Turn raw ffprobe JSON into the video info dictionary
+
+    Args:
+        data: Parsed output of ffprobe -show_format -show_streams
+
+    Returns:
+        Dictionary with duration, fps, resolution, codecs, bitrates and rotation
+    """
+    streams = data.get('streams', [])
+    fmt = data.get('format', {})
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    info = {
+        'container': fmt.get('format_name'),
+        'duration': _to_float(fmt.get('duration')),
+        'bitrate_kbps': (_to_int(fmt.get('bit_rate')) or 0) // 1000 or None,
+        'has_audio': audio is not None,
+    }
+
+    if video:
+        width, height = video.get('width'), video.get('height')
+        info.update({
+            'fps': _parse_rate(video.get('avg_frame_rate')) or _parse_rate(video.get('r_frame_rate')),
+            'resolution': [width, height] if width and height else None,
+            'video_codec': video.get('codec_name'),
+            'video_profile': video.get('profile'),
+            'video_level': video.get('level'),
+            'pix_fmt': video.get('pix_fmt'),
+            'video_bitrate_kbps': (_to_int(video.get('bit_rate')) or 0) // 1000 or None,
+            'rotation': _rotation(video),
+        })
+        if info['duration'] is None:
+            info['duration'] = _to_float(video.get('duration'))
+
+    if audio:
+        info.update({
+            'audio_codec': audio.get('codec_name'),
+            'audio_bitrate_kbps': (_to_int(audio.get('bit_rate')) or 0) // 1000 or None,
+            'sample_rate': _to_int(audio.get('sample_rate')),
+            'channels': audio.get('channels'),
+        })
+
+    return info
+
+
+def probe_video(video_path: str, ffprobe_path: Optional[str] = None,
+                timeout: float = 30) -> Optional[dict]:
+    """
+    Read container and stream headers with ffprobe (no decoding)
+
+    Args:
+        video_path: Path to video file
+        ffprobe_path: Path to ffprobe binary (optional, looked up on PATH)
+        timeout: Seconds to wait for ffprobe
+
+    Returns:
+        Dictionary with video info or None if ffprobe is unavailable or fails
+    """
+    ffprobe = ffprobe_path or find_ffprobe()
+    if not ffprobe:
+        return None
+
+    cmd = [ffprobe, '-v', 'error', '-print_format', 'json',
+           '-show_format', '-show_streams', video_path]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, timeout=timeout, check=True)
+        return parse_probe_output(json.loads(completed.stdout or b'{}'))
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logger.error(f"ffprobe failed for {video_path}: {e}")
+        return None
+
+
+class ProbeCache:
+    """On-disk cache of probe results keyed by (path, size, mtime)"""
+
+    def __init__(self, cache_path: str = "cache/probe_cache.json", max_entries: int = 2000):
+        """
+        Initialize probe cache, loading existing entries from disk
+
+        Args:
+            cache_path: JSON file for cached probe results
+            max_entries: Entries kept; the oldest are dropped past it
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = self._prune(self._load())
+
+    def _load(self) -> dict:
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load probe cache: {e}")
+        return {}
+
+    def _prune(self, entries: dict) -> dict:
+        """Drop entries whose file is gone or changed, then the oldest past max_entries"""
+        kept = {}
+        for path, entry in entries.items():
+            key = self._stat_key(path)
+            if key and isinstance(entry, dict) and key[1:] == (entry.get('size'), entry.get('mtime_ns')):
+                kept[path] = entry
+        return dict(list(kept.items())[-self.max_entries:])
+
+    def _save(self, path: str, entry: dict):
+        """
+        Write one entry, merged with what other processes saved meanwhile
+
+        Batch workers share the cache file, so it is re-read under a file
+        lock and only this entry is replaced before writing it back.
+        """
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(f"{self.cache_path}.lock", 'a')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            entries.pop(path, None)
+            entries[path] = entry
+            entries = self._prune(entries)
+            # Per-process temp name so writers never share a half-written file
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        self._entries = entries
+
+    @staticmethod
+    def _stat_key(video_path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(video_path)
+        except OSError:
+            return None
+        return os.path.abspath(video_path), st.st_size, st.st_mtime_ns
+
+    def get(self, video_path: str) -> Optional[dict]:
+        """
+        Get cached probe info if the file is unchanged
+
+        Args:
+            video_path: Path to video file
+
+        Returns:
+            Cached info dictionary or None on a miss
+        """
+        key = self._stat_key(video_path)
+        if not key:
+            return None
+
+        path, size, mtime_ns = key
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+            return dict(entry['info'])
+        return None
+
+    def put(self, video_path: str, info: dict):
+        """
+        Store probe info for a file
+
+        Args:
+            video_path: Path to video file
+            info: Probe info dictionary
+        """
+        key = self._stat_key(video_path)
+        if not key:
+            return
+
+        path, size, mtime_ns = key
+        entry = {'size': size, 'mtime_ns': mtime_ns, 'info': info}
+        with self._lock:
+            self._entries[path] = entry
+            try:
+                self._save(path, entry)
+            except OSError as e:
+                logger.warning(f"Could not save probe cache: {e}")
@@ -0,0 +1,163 @@
+"""
+Platform Profiles Module
+Declarative per-platform encoding limits and encode-once grouping
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# What each platform accepts without re-encoding, and its hard limits.
+# Override any field per platform with platform_profiles.<name> in config.
+# Videos longer than max_duration_s are refused for that platform unless
+# its profile sets trim: true, which cuts them to the limit instead.
+PLATFORM_PROFILES = {
+    'instagram': {
+        'container': 'mp4',
+        'video_codecs': ['h264'],
+        'video_profiles': ['Constrained Baseline', 'Baseline', 'Main', 'High'],
+        'max_level': 42,
+        'pix_fmts': ['yuv420p', 'yuvj420p'],
+        'audio_codecs': ['aac'],
+        'max_size_mb': 100,
+        'max_duration_s': 900,
+        'max_video_kbps': 25000
+    },
+    'youtube': {
+        'container': 'mp4',
+        'video_codecs': ['h264', 'hevc', 'vp9'],
+        'video_profiles': ['Constrained Baseline', 'Baseline', 'Main', 'High', 'Main 10'],
+        'max_level': 52,
+        'pix_fmts': ['yuv420p', 'yuvj420p', 'yuv420p10le'],
+        'audio_codecs': ['aac', 'opus'],
+        'max_size_mb': 256 * 1024,
+        'max_duration_s': 12 * 3600,  # Regular uploads; Shorts stop at 180s
+        'max_video_kbps': 68000
+    },
+    'tiktok': {
+        'container': 'mp4',
+        'video_codecs': ['h264', 'hevc'],
+        'video_profiles': ['Constrained Baseline', 'Baseline', 'Main', 'High'],
+        'max_level': 42,
+        'pix_fmts': ['yuv420p', 'yuvj420p'],
+        'audio_codecs': ['aac'],
+        'max_size_mb': 287,
+        'max_duration_s': 600,
+        'max_video_kbps': 20000
+    }
+}
+
+# Fields merged by intersection (lists) or minimum (numbers)
+_LIST_FIELDS = ('video_codecs', 'video_profiles', 'pix_fmts', 'audio_codecs')
+_LIMIT_FIELDS = ('max_level', 'max_size_mb', 'max_duration_s', 'max_video_kbps')
+
+
+def get_profile(platform: str, overrides: Optional[Dict[str, dict]] = None) -> dict:
+    """
+    Get the encoding profile for a platform
+
+    Args:
+        platform: Platform name, optionally as 'platform:account'
+        overrides: {platform: {field: value}} from config (optional)
+
+    Returns:
+        Profile dictionary (with a 'platforms' list naming who it serves)
+    """
+    name = platform.split(':', 1)[0]
+    base = PLATFORM_PROFILES.get(name)
+    if base is None:
+        logger.warning(f"No encoding profile for {name}, using instagram limits")
+        base = PLATFORM_PROFILES['instagram']
+    overrides = overrides or {}
+    return {**base, **overrides.get(name, {}), **overrides.get(platform, {}), 'platforms': [platform]}
+
+
+def merge_profiles(a: dict, b: dict) -> Optional[dict]:
+    """
+    Combine two profiles into the constraints one artifact must meet for both
+
+    Args:
+        a: First profile
+        b: Second profile
+
+    Returns:
+        Merged profile or None if no single artifact can satisfy both
+    """
+    if a['container'] != b['container']:
+        return None
+    # One artifact cannot be both trimmed and kept whole
+    if bool(a.get('trim')) != bool(b.get('trim')):
+        return None
+
+    merged = {'container': a['container'], 'trim': bool(a.get('trim')),
+              'platforms': a['platforms'] + b['platforms']}
+    for field in _LIST_FIELDS:
+        merged[field] = [value for value in a.get(field, []) if value in b.get(field, [])]
+    for field in _LIMIT_FIELDS:
+        values = [p[field] for p in (a, b) if p.get(field) is not None]
+        merged[field] = min(values) if values else None
+
+    # We always transcode to H.264/AAC, so both sides must accept those
+    if 'h264' not in merged['video_codecs'] or 'aac' not in merged['audio_codecs']:
+        return None
+    return merged
+
+
+def _costs_quality(member: dict, merged: dict, source_info: dict, tolerance: float) -> bool:
+    """True if sharing the merged artifact would noticeably degrade member's upload"""
+    duration = source_info.get('duration')
+    if duration and merged.get('max_duration_s'):
+        own_duration = min(duration, member.get('max_duration_s') or duration)
+        # Never trim a video for a platform that would take it whole
+        if min(duration, merged['max_duration_s']) < own_duration:
+            return True
+
+    size_mb = source_info.get('size_mb')
+    if size_mb and merged.get('max_size_mb'):
+        own_size = min(size_mb, member.get('max_size_mb') or size_mb)
+        if min(size_mb, merged['max_size_mb']) < own_size * tolerance:
+            return True
+
+    return False
+
+
+def group_platforms(platforms: List[str], source_info: Optional[dict] = None,
+                    overrides: Optional[Dict[str, dict]] = None,
+                    tolerance: float = 0.5) -> List[dict]:
+    """
+    Group platforms that one prepared artifact can serve
+
+    Platforms share an encode when their profiles merge and the merged
+    limits do not cost any member more than `tolerance` of the size it
+    would get on its own (or force a trim it would not need).
+
+    Args:
+        platforms: Target platform names
+        source_info: Video info of the source (optional, enables quality checks)
+        overrides: Profile overrides from config
+        tolerance: Minimum fraction of its own size budget a member keeps
+
+    Returns:
+        List of merged profiles, each with a 'platforms' list
+    """
+    source_info = source_info or {}
+    groups = []
+
+    for platform in platforms:
+        profile = get_profile(platform, overrides)
+        for i, group in enumerate(groups):
+            merged = merge_profiles(group, profile)
+            if not merged:
+                continue
+
+            members = [get_profile(name, overrides) for name in merged['platforms']]
+            if any(_costs_quality(member, merged, source_info, tolerance) for member in members):
+                continue
+
+            groups[i] = merged
+            break
+        else:
+            groups.append(profile)
+
+    return groups
@@ -0,0 +1,296 @@
+"""
+Slot Prefetcher Module
+Prepares videos for upcoming schedule slots in the background
+"""
+
+import os
+import json
+import heapq
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrepareTimeEstimator:
+    """Estimates preparation time from past runs (seconds per MB, per action)"""
+
+    # Used until we have history for an action
+    DEFAULT_SECONDS_PER_MB = {'transcode': 1.0, 'remux': 0.05, 'passthrough': 0.0}
+
+    def __init__(self, history_path: str = "cache/prepare_timings.json", smoothing: float = 0.3):
+        """
+        Initialize estimator
+
+        Args:
+            history_path: JSON file the per-action rates are persisted to
+            smoothing: Weight of the newest run in the moving average
+        """
+        self.history_path = history_path
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self.rates = {}
+        if os.path.exists(history_path):
+            try:
+                with open(history_path, 'r') as f:
+                    self.rates = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load prepare timings: {e}")
+
+    def record(self, action: str, size_mb: Optional[float], seconds: float):
+        """
+        Record a completed preparation
+
+        Args:
+            action: Plan action that ran (transcode, remux, passthrough)
+            size_mb: Source size in MB
+            seconds: Wall time the preparation took
+        """
+        if not size_mb:
+            return
+
+        rate = seconds / size_mb
+        with self._lock:
+            previous = self.rates.get(action)
+            self.rates[action] = rate if previous is None else (
+                self.smoothing * rate + (1 - self.smoothing) * previous)
+            try:
+                directory = os.path.dirname(self.history_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.history_path, 'w') as f:
+                    json.dump(self.rates, f, indent=2)
+            except OSError as e:
+                logger.warning(f"Could not save prepare timings: {e}")
+
+    def estimate(self, action: str, size_mb: Optional[float]) -> float:
+        """
+        Estimate seconds needed to prepare a video
+
+        Args:
+            action: Planned action
+            size_mb: Source size in MB
+
+        Returns:
+            Estimated seconds
+        """
+        rate = self.rates.get(action, self.DEFAULT_SECONDS_PER_MB.get(action, 1.0))
+        return rate * (size_mb or 0)
+
+
+class SlotPrefetcher:
+    """Background worker that prepares the videos of the next N upload slots"""
+
+    def __init__(self, processor, daily_schedule: Dict[int, List[str]], upload_times: List[str],
+                 platforms: List[str], videos_folder: str = "videos", lookahead: int = 4,
+                 safety_margin_minutes: float = 10,
+                 timings_path: str = "cache/prepare_timings.json"):
+        """
+        Initialize prefetcher
+
+        Args:
+            processor: VideoProcessor used to prepare videos
+            daily_schedule: {weekday: [video filename per slot]}
+            upload_times: Slot times in HH:MM format
+            platforms: Platforms each video is prepared for
+            videos_folder: Folder holding the source videos
+            lookahead: Number of upcoming slots to prepare
+            safety_margin_minutes: How early an artifact should be ready before its slot
+            timings_path: Where past preparation timings are stored
+        """
+        self.processor = processor
+        self.daily_schedule = daily_schedule
+        self.upload_times = upload_times
+        self.platforms = platforms
+        self.videos_folder = videos_folder
+        self.lookahead = lookahead
+        self.safety_margin = timedelta(minutes=safety_margin_minutes)
+        self.estimator = PrepareTimeEstimator(timings_path)
+
+        self._queue = []  # heap of (latest start time, slot_id, slot)
+        self._known_slots = {}  # slot_id -> deadline
+        self._ready = {}  # source path -> {platform: prepared path}
+        self._cond = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def upcoming_slots(self, now: Optional[datetime] = None,
+                       count: Optional[int] = None) -> List[dict]:
+        """
+        List the next upload slots from the weekly schedule
+
+        Args:
+            now: Reference time (defaults to the current time)
+            count: Number of slots (defaults to lookahead)
+
+        Returns:
+            List of slot dictionaries ordered by deadline
+        """
+        now = now or datetime.now()
+        count = count or self.lookahead
+        slots = []
+
+        for day_offset in range(8):
+            day = (now + timedelta(days=day_offset)).date()
+            video_list = self.daily_schedule.get(day.weekday(), [])
+            for slot_index, upload_time in enumerate(self.upload_times[:len(video_list)]):
+                hour, minute = map(int, upload_time.split(':'))
+                deadline = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+                if deadline <= now:
+                    continue
+                video_filename = video_list[slot_index]
+                slots.append({
+                    'slot_id': f"{day.isoformat()}#{slot_index}",
+                    'slot_index': slot_index,
+                    'deadline': deadline,
+                    'video_filename': video_filename,
+                    'video_path': os.path.join(self.videos_folder, video_filename)
+                })
+                if len(slots) >= count:
+                    return slots
+
+        return slots
+
+    def refresh(self, now: Optional[datetime] = None):
+        """
+        Queue preparation for upcoming slots that are not queued yet
+
+        Slots are worked on least-slack first: the deadline minus the
+        estimated preparation time from past runs.
+
+        Args:
+            now: Reference time (defaults to the current time)
+        """
+        now = now or datetime.now()
+        with self._cond:
+            self._known_slots = {slot_id: deadline for slot_id, deadline in self._known_slots.items()
+                                 if deadline > now}
+            candidates = [slot for slot in self.upcoming_slots(now)
+                          if slot['slot_id'] not in self._known_slots]
+
+        # Probing runs ffprobe; keep it outside the lock so uploads and the worker are not held up
+        planned = []
+        for slot in candidates:
+            if not os.path.exists(slot['video_path']):
+                continue
+            info = self.processor.get_video_info(slot['video_path']) or {}
+            action = self.processor.plan_encode(slot['video_path'], info)['action']
+            estimate = self.estimator.estimate(action, info.get('size_mb'))
+            slot['estimate_seconds'] = estimate
+            planned.append((slot['deadline'] - self.safety_margin - timedelta(seconds=estimate), slot))
+
+        queued = []
+        with self._cond:
+            for latest_start, slot in planned:
+                # Another refresh may have queued it meanwhile
+                if slot['slot_id'] in self._known_slots:
+                    continue
+                heapq.heappush(self._queue, (latest_start, slot['slot_id'], slot))
+                self._known_slots[slot['slot_id']] = slot['deadline']
+                queued.append((latest_start, slot))
+            self._cond.notify()
+
+        for latest_start, slot in queued:
+            if latest_start < now:
+                logger.warning(f"Prefetch: {slot['video_filename']} for {slot['deadline']:%a %H:%M} "
+                               f"may not be ready in time (estimated {slot['estimate_seconds']:.0f}s)")
+            logger.info(f"Prefetch queued: {slot['video_filename']} for {slot['deadline']:%a %H:%M} "
+                        f"(~{slot['estimate_seconds']:.0f}s)")
+
+    def get_prepared(self, video_path: str) -> Optional[Dict[str, str]]:
+        """
+        Get the prepared artifacts for a video if the prefetcher produced them
+
+        Args:
+            video_path: Source video path
+
+        Returns:
+            Dictionary mapping platform to prepared video path (None where
+            the video was refused), or None
+        """
+        with self._cond:
+            prepared = self._ready.get(video_path)
+        # None marks a platform the video was refused for
+        if prepared and all(path is None or os.path.exists(path) for path in prepared.values()):
+            return dict(prepared)
+        return None
+
+    @contextmanager
+    def foreground(self):
+        """Pause background preparation while an upload runs"""
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._idle.set()
+
+    def start(self):
+        """Start the background worker thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slot-prefetcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Prefetcher started (lookahead {self.lookahead} slots)")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background worker (waits for the current preparation)"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                _, _, slot = heapq.heappop(self._queue)
+
+            # Only use idle time - wait while a slot upload is in progress
+            self._idle.wait()
+            self._prepare_slot(slot)
+
+    def _forget(self, slot: dict):
+        """Let the next refresh() queue a slot again after a failed preparation"""
+        with self._cond:
+            self._known_slots.pop(slot['slot_id'], None)
+
+    def _prepare_slot(self, slot: dict):
+        video_path = slot['video_path']
+        try:
+            reports = self.processor.prepare_for_platforms(video_path, self.platforms)
+        except Exception as e:
+            logger.error(f"Prefetch failed for {slot['video_filename']}: {e}")
+            self._forget(slot)
+            return
+
+        # Platforms sharing an artifact share one report - record each encode once
+        unique_reports = {id(report): report for report in reports.values()}.values()
+        # A refused platform (e.g. video too long) is final, not a failure to retry
+        if not all(report['success'] or report.get('refused') for report in unique_reports):
+            logger.error(f"Prefetch failed for {slot['video_filename']}")
+            self._forget(slot)
+            return
+
+        for report in unique_reports:
+            if not report['cached'] and not report.get('refused'):
+                self.estimator.record(report['action'], report['size_mb'], report['seconds'])
+
+        with self._cond:
+            self._ready[video_path] = {platform: None if report.get('refused') else report['path']
+                                       for platform, report in reports.items()}
+
+        seconds = sum(report['seconds'] for report in unique_reports)
+        actions = ', '.join(sorted({report['action'] for report in unique_reports}))
+        slack = (slot['deadline'] - datetime.now()).total_seconds()
+        logger.info(f"Prefetch ready: {slot['video_filename']} for {slot['deadline']:%a %H:%M} "
+                    f"({actions}, {seconds:.1f}s, {slack / 60:.0f} min to spare)")
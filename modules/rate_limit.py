@@ -0,0 +1,213 @@
+"""
+Rate Limit Module
+Token buckets for per-account platform actions and upload bandwidth
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Conservative action limits when config.yaml has no rate_limits entry
+DEFAULT_RATE_LIMITS = {
+    'instagram': {'per_hour': 20, 'burst': 4},
+    'youtube': {'per_day': 6, 'burst': 6},   # 10k quota units / ~1600 per upload
+    'tiktok': {'per_day': 15, 'burst': 5}
+}
+
+_PERIODS = {'per_second': 1, 'per_minute': 60, 'per_hour': 3600, 'per_day': 86400}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    A request larger than what is available reserves it anyway and
+    waits off the debt, so big requests are paced rather than starved.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize bucket (starts full)
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take tokens, going into debt if needed
+
+        Args:
+            tokens: Tokens to take
+            max_wait: Do not reserve if the wait would be longer (optional)
+
+        Returns:
+            Seconds the caller must wait before acting, or None if over max_wait
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (tokens - self.tokens) / self.rate) if self.rate > 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= tokens
+            return wait
+
+    def acquire(self, tokens: float = 1, max_wait: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available
+
+        Args:
+            tokens: Tokens to take
+            max_wait: Give up (without taking tokens) if the wait would be longer
+
+        Returns:
+            True once acquired, False if the wait exceeded max_wait
+        """
+        wait = self.reserve(tokens, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def available(self) -> float:
+        """Tokens available right now"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class RateLimiter:
+    """Action limits per (account, platform), one token bucket each"""
+
+    def __init__(self, limits: Optional[Dict[str, dict]] = None, max_wait: float = 600):
+        """
+        Initialize rate limiter
+
+        Args:
+            limits: {platform: {'per_hour' | 'per_day' | ...: count, 'burst': n}},
+                each merged key by key over the platform's DEFAULT_RATE_LIMITS
+            max_wait: Longest an upload waits for a token before failing fast
+
+        Raises:
+            ValueError: If a platform's rate is not positive
+        """
+        limits = limits or {}
+        self.limits = {
+            platform: self._merge(DEFAULT_RATE_LIMITS.get(platform, {}), limits.get(platform, {}))
+            for platform in {**DEFAULT_RATE_LIMITS, **limits}
+        }
+        for platform, limit in self.limits.items():
+            if limit and self._rate(limit)[1] <= 0:
+                raise ValueError(f"rate_limits.{platform}: rate must be positive, got {limit}")
+        self.max_wait = max_wait
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _merge(default: dict, override: dict) -> dict:
+        """Override a platform's default limit; a new period replaces the default one"""
+        if any(name in override for name in _PERIODS):
+            default = {key: value for key, value in default.items() if key not in _PERIODS}
+        return {**default, **override}
+
+    @staticmethod
+    def _rate(limit: dict) -> Tuple[float, float]:
+        """(count per period, tokens per second) of a limit"""
+        period, count = next(((name, limit[name]) for name in _PERIODS if name in limit),
+                             ('per_hour', 0))
+        return count, count / _PERIODS[period]
+
+    @classmethod
+    def from_config(cls, rate_config: dict) -> 'RateLimiter':
+        """Build a limiter from the 'rate_limits' section of config.yaml"""
+        limits = {platform: value for platform, value in rate_config.items()
+                  if isinstance(value, dict)}
+        return cls(limits, max_wait=rate_config.get('max_wait', 600))
+
+    def bucket(self, platform: str, account: str = 'default') -> Optional[TokenBucket]:
+        """
+        Get the bucket for an account on a platform
+
+        Returns:
+            TokenBucket or None if the platform is unlimited
+        """
+        limit = self.limits.get(platform)
+        if not limit:
+            return None
+
+        with self._lock:
+            key = (platform, account)
+            if key not in self._buckets:
+                count, rate = self._rate(limit)
+                self._buckets[key] = TokenBucket(rate, limit.get('burst', max(1, count)))
+            return self._buckets[key]
+
+    def acquire(self, platform: str, account: str = 'default') -> bool:
+        """
+        Wait for permission to perform one action
+
+        Args:
+            platform: Platform name
+            account: Account name
+
+        Returns:
+            True if the action may proceed, False if the wait exceeds max_wait
+        """
+        bucket = self.bucket(platform, account)
+        if bucket is None:
+            return True
+
+        wait = bucket.reserve(1, self.max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            logger.info(f"Rate limit: waiting {wait:.0f}s before {platform} ({account})")
+            time.sleep(wait)
+        return True
+
+
+class BandwidthShaper:
+    """Caps upload throughput across all uploads sharing it"""
+
+    def __init__(self, bytes_per_second: float, burst_bytes: Optional[float] = None):
+        """
+        Initialize shaper
+
+        Args:
+            bytes_per_second: Sustained upload rate
+            burst_bytes: Bytes that may go out at once (defaults to one second's worth)
+        """
+        self.bytes_per_second = bytes_per_second
+        self.bucket = TokenBucket(bytes_per_second, burst_bytes or bytes_per_second)
+
+    @classmethod
+    def from_config(cls, rate_config: dict) -> Optional['BandwidthShaper']:
+        """
+        Build a shaper from rate_limits.bandwidth_mbps (megabits per second)
+
+        Returns:
+            BandwidthShaper or None if no cap is configured
+        """
+        mbps = rate_config.get('bandwidth_mbps')
+        if not mbps:
+            return None
+        return cls(mbps * 1_000_000 / 8)
+
+    def throttle(self, nbytes: int):
+        """Block until nbytes may be sent"""
+        self.bucket.acquire(nbytes)
@@ -0,0 +1,239 @@
+"""
+Retry Module
+Error classification, exponential backoff with jitter and per-platform circuit breakers
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT = 'transient'
+RATE_LIMITED = 'rate_limited'
+FATAL = 'fatal'
+
+# instagrapi exception class names (matched by name so instagrapi stays optional)
+_RATE_LIMITED_ERRORS = {'PleaseWaitFewMinutes', 'RateLimitError', 'FeedbackRequired',
+                        'ClientThrottledError', 'SentryBlock'}
+_TRANSIENT_ERRORS = {'ClientConnectionError', 'ClientRequestTimeout', 'ClientIncompleteReadError',
+                     'ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout',
+                     'ChunkedEncodingError', 'RemoteDisconnected', 'ProtocolError'}
+_FATAL_ERRORS = {'BadPassword', 'ChallengeRequired', 'LoginRequired', 'TwoFactorRequired',
+                 'VideoTooLongException', 'VideoNotUpload', 'ClientForbiddenError'}
+
+_RATE_LIMITED_HINTS = ('rate limit', 'too many requests', 'please wait', 'quota', 'throttl')
+_TRANSIENT_HINTS = ('timed out', 'timeout', 'connection', 'temporarily', 'unavailable',
+                    'reset by peer', 'broken pipe', 'try again')
+
+
+class UnconfirmedPostError(Exception):
+    """
+    Upload failed after the platform was handed the finished media
+
+    The post may be live (e.g. the publish request timed out), so it must
+    not be retried; the original error is the __cause__.
+    """
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status attached to an exception, if any"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header attached to an exception, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify an upload error
+
+    Args:
+        error: Exception raised by an upload
+
+    Returns:
+        TRANSIENT (retry soon), RATE_LIMITED (retry much later) or FATAL (do not retry)
+    """
+    # Walk the class hierarchy so subclasses of known errors are recognized
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & _RATE_LIMITED_ERRORS:
+        return RATE_LIMITED
+    if names & _FATAL_ERRORS:
+        return FATAL
+    if names & _TRANSIENT_ERRORS or isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+
+    status = error_status(error)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMITED
+        if status >= 500 or status == 408:
+            return TRANSIENT
+        if status >= 400:
+            return FATAL
+
+    # Wrapped errors (raise ... from e) are classified by their cause
+    if error.__cause__ is not None:
+        return classify_error(error.__cause__)
+
+    message = str(error).lower()
+    if any(hint in message for hint in _RATE_LIMITED_HINTS):
+        return RATE_LIMITED
+    if any(hint in message for hint in _TRANSIENT_HINTS):
+        return TRANSIENT
+    return FATAL
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; rate limits back off from a longer base"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 5,
+                 max_delay: float = 300, rate_limit_delay: float = 120,
+                 max_elapsed: float = 600):
+        """
+        Initialize retry policy
+
+        Args:
+            max_attempts: Attempts per upload, including the first
+            base_delay: Backoff base for transient errors (seconds)
+            max_delay: Cap on a single backoff (seconds)
+            rate_limit_delay: Backoff base for rate-limited errors (seconds)
+            max_elapsed: Give up rather than sleep past this many seconds in total
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.max_elapsed = max_elapsed
+
+    @classmethod
+    def from_config(cls, retry_config: dict) -> 'RetryPolicy':
+        """Build a policy from the 'retry' section of config.yaml"""
+        return cls(
+            max_attempts=retry_config.get('max_attempts', 3),
+            base_delay=retry_config.get('base_delay', 5),
+            max_delay=retry_config.get('max_delay', 300),
+            rate_limit_delay=retry_config.get('rate_limit_delay', 120),
+            max_elapsed=retry_config.get('max_elapsed', 600)
+        )
+
+    def delay(self, attempt: int, error_type: str, hint: Optional[float] = None) -> float:
+        """
+        Seconds to wait before the next attempt
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first failure)
+            error_type: Classification of the last error
+            hint: Server-provided Retry-After (optional, used as a floor)
+
+        Returns:
+            Backoff in seconds
+        """
+        base = self.rate_limit_delay if error_type == RATE_LIMITED else self.base_delay
+        ceiling = min(self.max_delay, base * 2 ** (attempt - 1))
+        # Full jitter spreads retries from concurrent uploads apart
+        delay = random.uniform(0, ceiling)
+        if error_type == RATE_LIMITED:
+            # Never retry a rate limit sooner than half the backoff
+            delay = ceiling / 2 + delay / 2
+        return max(delay, hint or 0)
+
+
+class CircuitBreaker:
+    """
+    Per-platform circuit breaker
+
+    Opens after `failure_threshold` consecutive retryable failures (rate
+    limits included) and rejects uploads until `reset_timeout` (or a longer
+    Retry-After) has passed; then one trial upload is let through
+    (half-open) to decide whether to close it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, platform: str, failure_threshold: int = 3, reset_timeout: float = 1800):
+        """
+        Initialize circuit breaker
+
+        Args:
+            platform: Platform name (for logging)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open
+        """
+        self.platform = platform
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.open_for = reset_timeout
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if an upload may be attempted now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_for:
+                    return False
+                self.state = self.HALF_OPEN
+                logger.info(f"{self.platform} circuit half-open, trying one upload")
+                return True
+            # Only one trial upload while half-open
+            return self.state == self.CLOSED
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets an upload through"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            return max(0.0, self.open_for - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        """Close the circuit"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.platform} circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self, error_type: str, hint: Optional[float] = None):
+        """
+        Count a failed attempt
+
+        Args:
+            error_type: Classification of the error (fatal errors do not count)
+            hint: Server-provided Retry-After for rate limits (optional)
+        """
+        if error_type == FATAL:
+            # A bad file or bad credentials says nothing about the endpoint,
+            # but a half-open trial must not stay pending forever
+            with self._lock:
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+            return
+
+        with self._lock:
+            self.failures += 1
+            # Rate limits count like other failures so the retry policy's
+            # longer backoff gets a chance before the circuit opens
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.open_for = max(self.reset_timeout, hint or 0)
+                logger.warning(f"{self.platform} circuit open for {self.open_for:.0f}s "
+                               f"after {self.failures} failures ({error_type})")
@@ -0,0 +1,170 @@
+"""
+Upload Body Module
+Streams a video file to HTTP clients from a memory map in fixed-size chunks
+"""
+
+import os
+import mmap
+import socket
+import logging
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class UploadBody:
+    """
+    Read-only, memory-mapped view of a file (or a byte range of it)
+
+    Iterating yields memoryviews straight into the page cache, so the
+    resident memory of an upload stays at one chunk regardless of file
+    size. Works as a `data=` argument for requests: it has a length (sent
+    as Content-Length) and iterates its chunks. It deliberately has no
+    read(), which HTTP clients would prefer and use to copy small blocks.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1024 * 1024,
+                 progress: Optional[ProgressCallback] = None,
+                 throttle: Optional[Callable[[int], None]] = None,
+                 start: int = 0, end: Optional[int] = None, _parent: 'UploadBody' = None):
+        """
+        Initialize upload body
+
+        Args:
+            path: Path to the file to send
+            chunk_size: Bytes per yielded chunk
+            progress: Called with (bytes sent, total bytes) after every chunk
+            throttle: Called with each chunk's size before it is sent and may
+                block (e.g. BandwidthShaper.throttle)
+            start: First byte of the range to send
+            end: Byte after the last one to send (defaults to end of file)
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.throttle = throttle
+        self._parent = _parent
+        self._file = None
+        self._mmap = None
+
+        size = _parent.size if _parent else os.path.getsize(path)
+        self.size = size
+        self.start = max(0, min(start, size))
+        self.end = size if end is None else max(self.start, min(end, size))
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def open(self) -> 'UploadBody':
+        """Map the file (a slice shares its parent's mapping)"""
+        if self._parent is None and self._file is None:
+            self._file = open(self.path, 'rb')
+            if self.size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self._mmap, 'madvise'):
+                    self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        return self
+
+    def close(self):
+        """Unmap the file (a slice leaves its parent's mapping open)"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'UploadBody':
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def _map(self) -> Optional[mmap.mmap]:
+        owner = self._parent or self
+        if owner._file is None:
+            owner.open()
+        return owner._mmap
+
+    def slice(self, start: int, end: int) -> 'UploadBody':
+        """
+        Byte range of this body, relative to its start (for chunked protocols)
+
+        Args:
+            start: First byte of the range
+            end: Byte after the last one
+
+        Returns:
+            UploadBody over the range, sharing this body's mapping and callbacks
+        """
+        owner = self._parent or self
+        return UploadBody(self.path, self.chunk_size, self.progress, self.throttle,
+                          start=self.start + start, end=self.start + end, _parent=owner)
+
+    @staticmethod
+    def _drop_pages(mapped: mmap.mmap, start: int, stop: int):
+        """Unmap sent pages from this process (they stay in the page cache)"""
+        if not hasattr(mapped, 'madvise') or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        start -= start % mmap.PAGESIZE
+        try:
+            mapped.madvise(mmap.MADV_DONTNEED, start, stop - start)
+        except OSError:
+            pass
+
+    def __iter__(self) -> Iterator[memoryview]:
+        """Yield the range as memoryviews of at most chunk_size bytes"""
+        self.sent = 0
+        if not len(self):
+            return
+
+        mapped = self._map
+        offset = self.start
+        while offset < self.end:
+            stop = min(offset + self.chunk_size, self.end)
+            if self.throttle:
+                self.throttle(stop - offset)
+            view = memoryview(mapped)[offset:stop]
+            try:
+                yield view
+            finally:
+                # A live export would keep the mapping from closing
+                view.release()
+            self._drop_pages(mapped, offset, stop)
+            self.sent += stop - offset
+            offset = stop
+            if self.progress:
+                self.progress(self.sent, len(self))
+
+    def sendfile(self, sock: socket.socket) -> int:
+        """
+        Write the range to a connected socket with sendfile (no user-space copy)
+
+        Args:
+            sock: Connected socket
+
+        Returns:
+            Bytes sent
+        """
+        owner = self._parent or self
+        if owner._file is None:
+            owner.open()
+
+        self.sent = 0
+        offset = self.start
+        while offset < self.end:
+            count = min(self.chunk_size, self.end - offset)
+            if self.throttle:
+                self.throttle(count)
+            sent = sock.sendfile(owner._file, offset=offset, count=count)
+            if not sent:
+                break
+            offset += sent
+            self.sent += sent
+            if self.progress:
+                self.progress(self.sent, len(self))
+        return self.sent
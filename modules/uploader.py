@@ -4,15 +4,30 @@ Handles uploading videos to different social media platforms
 """
 
 import os
+import time
 import yaml
 import logging
+import threading
+from pathlib import Path
 from typing import Dict, Optional
 from datetime import datetime
 
+from .retry import (RetryPolicy, CircuitBreaker, UnconfirmedPostError, classify_error,
+                    error_status, retry_after, FATAL, RATE_LIMITED, TRANSIENT)
+from .rate_limit import RateLimiter, BandwidthShaper
+
 logger = logging.getLogger(__name__)
 
 
 class VideoUploader:
+    # Platform -> method creating its client; run on first use of the platform
+    # so that commands which never upload never import or log in to anything
+    BACKENDS = {
+        'instagram': '_init_instagram',
+        'tiktok': '_init_tiktok',
+        'youtube': '_init_youtube',
+    }
+    
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize uploader with config"""
         with open(config_path, 'r') as f:
@@ -22,81 +37,175 @@ class VideoUploader:
         self.tiktok_config = self.config.get('tiktok', {})
         self.youtube_config = self.config.get('youtube', {})
         
-        # Initialize clients
-        self._init_instagram()
-        self._init_tiktok()
-        self._init_youtube()
+        self.retry_config = self.config.get('retry', {})
+        self.retry_policy = RetryPolicy.from_config(self.retry_config)
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        
+        rate_config = self.config.get('rate_limits', {})
+        self.rate_limiter = RateLimiter.from_config(rate_config)
+        self.bandwidth = BandwidthShaper.from_config(rate_config)
+        
+        # Clients are created lazily by backend()
+        self._backends = {}
+        self._backend_locks = {platform: threading.Lock() for platform in self.BACKENDS}
+    
+    def backend(self, platform: str):
+        """
+        Get a platform's client, initializing it on first use
+        
+        Args:
+            platform: Platform name
+            
+        Returns:
+            Client object or None if the platform is disabled or unavailable
+        """
+        if platform not in self.BACKENDS:
+            return None
+        with self._backend_locks[platform]:
+            if platform not in self._backends:
+                self._backends[platform] = getattr(self, self.BACKENDS[platform])()
+            return self._backends[platform]
+    
+    def register_backend(self, platform: str, client):
+        """
+        Use a ready-made client for a platform instead of its initializer
+        
+        Args:
+            platform: Platform name (a BACKENDS key)
+            client: Client object (e.g. an InstagramSessionPool with a custom client_factory)
+        """
+        if platform not in self.BACKENDS:
+            raise ValueError(f"Unknown platform: {platform}")
+        with self._backend_locks[platform]:
+            self._backends[platform] = client
+    
+    @property
+    def instagram_sessions(self):
+        """Instagram session pool (created on first use)"""
+        return self.backend('instagram')
+    
+    @property
+    def tiktok_client(self):
+        """TikTok client (created on first use)"""
+        return self.backend('tiktok')
+    
+    @property
+    def youtube_client(self):
+        """YouTube resumable uploader (created on first use)"""
+        return self.backend('youtube')
     
     def _init_instagram(self):
-        """Initialize Instagram client"""
+        """Initialize the Instagram session pool (one client per account)"""
         if not self.instagram_config.get('enabled', False):
-            self.instagram_client = None
             logger.info("Instagram is disabled")
-            return
+            return None
+        
+        from .instagram_sessions import InstagramSessionPool
+        
+        sessions = InstagramSessionPool.from_config(self.instagram_config)
+        if not sessions.accounts:
+            logger.warning("Instagram credentials not configured")
+            return None
         
         try:
-            from instagrapi import Client
-            self.instagram_client = Client()
-            
-            username = self.instagram_config.get('username')
-            password = self.instagram_config.get('password')
-            
-            if username and password:
-                # Try to load session
-                session_file = "instagram_session.json"
-                if os.path.exists(session_file):
-                    self.instagram_client.load_settings(session_file)
-                    logger.info("Loaded Instagram session")
-                else:
-                    self.instagram_client.login(username, password)
-                    self.instagram_client.dump_settings(session_file)
-                    logger.info("Instagram login successful")
-            else:
-                logger.warning("Instagram credentials not configured")
-                self.instagram_client = None
-                
+            import instagrapi  # noqa: F401
         except ImportError:
             logger.error("instagrapi not installed. Run: pip install instagrapi")
-            self.instagram_client = None
-        except Exception as e:
-            logger.error(f"Instagram initialization error: {e}")
-            self.instagram_client = None
+            return None
+        
+        # Log every account in at once, in parallel
+        ready = sessions.warm()
+        return sessions if any(ready.values()) else None
     
     def _init_tiktok(self):
         """Initialize TikTok client"""
         if not self.tiktok_config.get('enabled', False):
-            self.tiktok_client = None
             logger.info("TikTok is disabled")
-            return
+            return None
         
         # TikTok API implementation would go here
         # Note: TikTok's official API for posting is limited
         logger.warning("TikTok upload not fully implemented - requires API approval")
-        self.tiktok_client = None
+        return None
     
     def _init_youtube(self):
         """Initialize YouTube client"""
         if not self.youtube_config.get('enabled', False):
-            self.youtube_client = None
             logger.info("YouTube is disabled")
-            return
+            return None
         
         try:
-            from googleapiclient.discovery import build
-            from google.oauth2.credentials import Credentials
-            from google_auth_oauthlib.flow import InstalledAppFlow
+            from .youtube_upload import ResumableUploader, UPLOAD_URL
             
-            # YouTube API implementation
-            # Note: Requires OAuth2 setup
-            logger.warning("YouTube upload not fully implemented - requires OAuth2 setup")
-            self.youtube_client = None
+            upload_url = self.youtube_config.get('upload_url', UPLOAD_URL)
+            # A custom endpoint (e.g. the local fake platform) needs no OAuth
+            token_provider = self._youtube_token_provider() if upload_url == UPLOAD_URL else None
+            if upload_url == UPLOAD_URL and token_provider is None:
+                return None
             
+            client = ResumableUploader(
+                upload_url=upload_url,
+                chunk_size=int(self.youtube_config.get('chunk_size_mb', 8) * 1024 * 1024),
+                token_provider=token_provider,
+                max_resumes=self.youtube_config.get('max_resumes', 10),
+                timeout=self.youtube_config.get('request_timeout', 60),
+                throttle=self.bandwidth.throttle if self.bandwidth else None,
+                # Resuming one session gets the same budget as retrying the upload
+                max_resume_delay=self.retry_policy.max_delay,
+                resume_budget=self.retry_policy.max_elapsed
+            )
+            logger.info(f"YouTube resumable uploads ready ({upload_url})")
+            return client
+            
+        except ImportError:
+            logger.error("requests not installed. Run: pip install requests")
+            return None
+    
+    def _youtube_token_provider(self):
+        """Load OAuth2 credentials and return a callable giving a fresh access token"""
+        try:
+            from google.oauth2.credentials import Credentials
+            from google.auth.transport.requests import Request
         except ImportError:
-            logger.error("Google API client not installed")
-            self.youtube_client = None
+            logger.error("Google auth libraries not installed. Run: pip install google-auth-oauthlib")
+            return None
+        
+        scopes = ['https://www.googleapis.com/auth/youtube.upload']
+        credentials_file = self.youtube_config.get('credentials_file', 'youtube_credentials.json')
+        secrets_file = self.youtube_config.get('client_secrets_file', 'client_secrets.json')
+        
+        try:
+            if os.path.exists(credentials_file):
+                credentials = Credentials.from_authorized_user_file(credentials_file, scopes)
+            elif os.path.exists(secrets_file):
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                flow = InstalledAppFlow.from_client_secrets_file(secrets_file, scopes)
+                credentials = flow.run_local_server(port=0)
+                with open(credentials_file, 'w') as f:
+                    f.write(credentials.to_json())
+                logger.info("YouTube authorization saved")
+            else:
+                logger.warning(f"YouTube credentials not configured ({secrets_file} not found)")
+                return None
+        except Exception as e:
+            logger.error(f"YouTube authorization error: {e}")
+            return None
+        
+        refresh_lock = threading.Lock()
+        
+        def token_provider():
+            # Called before every upload request; refreshes only once the token expired
+            with refresh_lock:
+                if not credentials.valid:
+                    credentials.refresh(Request())
+                return credentials.token
+        
+        return token_provider
     
     def upload_to_instagram(self, video_path: str, caption: str, 
-                           hashtags: list) -> Optional[Dict]:
+                           hashtags: list, thumbnail: Optional[str] = None,
+                           account: Optional[str] = None) -> Optional[Dict]:
         """
         Upload video to Instagram
         
@@ -104,53 +213,103 @@ class VideoUploader:
             video_path: Path to video file
             caption: Post caption
             hashtags: List of hashtags
+            thumbnail: Path to cover image (optional, instagrapi generates one if missing)
+            account: Account name (optional, defaults to the first account)
             
         Returns:
             Upload result dictionary or None
         """
-        if not self.instagram_client:
+        if not self.instagram_sessions:
             logger.error("Instagram client not initialized")
             return None
         
+        account = account or self.instagram_sessions.default_account
+        if account not in self.instagram_sessions.accounts:
+            logger.error(f"Unknown Instagram account: {account}")
+            return None
+        
         try:
             # Combine caption and hashtags
             full_caption = f"{caption}\n\n" + ' '.join([f'#{tag}' for tag in hashtags])
             
             # Upload video as Instagram Reel
             # Note: Instagram's "trial reels" feature may be deprecated or requires specific account settings
-            # Using feed_show="0" keeps reel out of main feed (reels tab only)
-            logger.info(f"Uploading to Instagram as Reel: {os.path.basename(video_path)}")
-            media = self.instagram_client.clip_upload(
-                video_path,
-                caption=full_caption,
-                feed_show="0",  # "0" = reels tab only (no feed preview)
-                extra_data={
-                    "audience": "besties"  # Try to limit to close friends/trial mode
-                }
-            )
+            logger.info(f"Uploading to Instagram ({account}) as Reel: {os.path.basename(video_path)}")
+            media = self.instagram_sessions.run(
+                account, lambda client: self._post_reel(client, video_path, full_caption, thumbnail))
             
             result = {
                 'platform': 'instagram',
+                'account': account,
                 'media_type': 'trial_reel',
-                'media_id': media.pk,
+                'media_id': media['pk'],
                 'timestamp': datetime.now().isoformat(),
                 'video_path': video_path,
                 'caption': full_caption,
                 'success': True
             }
             
-            logger.info(f"Successfully uploaded Instagram Trial Reel: {media.pk}")
+            logger.info(f"Successfully uploaded Instagram Trial Reel: {media['pk']}")
             return result
             
         except Exception as e:
-            logger.error(f"Instagram upload error: {e}")
+            logger.error(f"Instagram upload error ({account}): {e}")
             return {
                 'platform': 'instagram',
+                'account': account,
                 'success': False,
                 'error': str(e),
+                'error_type': classify_error(e),
+                'status': error_status(e),
+                'retry_after': retry_after(e),
+                'handed_off': isinstance(e, UnconfirmedPostError),
                 'timestamp': datetime.now().isoformat()
             }
     
+    def _post_reel(self, client, video_path: str, caption: str,
+                   thumbnail: Optional[str] = None) -> dict:
+        """
+        Upload a Reel's media, then publish it (instagrapi's clip_upload in two steps)
+        
+        The media upload can be retried freely; once the configure request
+        is sent the Reel may be live, so its failures (other than an
+        explicit 4xx refusal) are raised as UnconfirmedPostError instead.
+        
+        Returns:
+            Published media dictionary (with 'pk')
+        """
+        upload_id, width, height, duration, cover = client.clip_rupload(
+            Path(video_path), Path(thumbnail) if thumbnail else None)
+        
+        attempts = self.instagram_config.get('configure_attempts', 10)
+        try:
+            for attempt in range(attempts):
+                try:
+                    configured = client.clip_configure(
+                        upload_id, width, height, duration, cover, caption,
+                        feed_show="0",  # "0" = reels tab only (no feed preview)
+                        extra_data={
+                            "audience": "besties"  # Try to limit to close friends/trial mode
+                        }
+                    )
+                except Exception as e:
+                    # Instagram refuses to publish until it has transcoded the video
+                    if 'transcode not finished' not in str(e).lower() or attempt + 1 >= attempts:
+                        raise
+                    time.sleep(self.instagram_config.get('configure_wait', 10))
+                    continue
+                media = (configured or {}).get('media')
+                if media:
+                    return media
+                raise RuntimeError("Instagram did not return the published media")
+        except Exception as e:
+            status = error_status(e)
+            if status is not None and 400 <= status < 500:
+                # An explicit refusal (e.g. 429): nothing was published
+                raise
+            raise UnconfirmedPostError(f"Instagram may have published the Reel but did not "
+                                       f"confirm it: {e}") from e
+    
     def upload_to_tiktok(self, video_path: str, caption: str, 
                         hashtags: list) -> Optional[Dict]:
         """
@@ -163,53 +322,196 @@ class VideoUploader:
             'platform': 'tiktok',
             'success': False,
             'error': 'Not implemented - requires TikTok API approval',
+            'error_type': FATAL,
             'timestamp': datetime.now().isoformat()
         }
     
-    def upload_to_youtube(self, video_path: str, title: str, 
-                         description: str, tags: list) -> Optional[Dict]:
+    def upload_to_youtube(self, video_path: str, caption: str, 
+                         hashtags: list) -> Optional[Dict]:
         """
-        Upload video to YouTube
+        Upload video to YouTube with the resumable upload protocol
         
-        Note: Requires OAuth2 authentication
+        Args:
+            video_path: Path to video file
+            caption: Post caption (first line becomes the title)
+            hashtags: List of hashtags (become tags)
+            
+        Returns:
+            Upload result dictionary or None
         """
-        logger.warning("YouTube upload not implemented - requires OAuth2 setup")
-        return {
-            'platform': 'youtube',
-            'success': False,
-            'error': 'Not implemented - requires OAuth2 setup',
-            'timestamp': datetime.now().isoformat()
-        }
+        if not self.youtube_client:
+            logger.error("YouTube client not initialized")
+            return None
+        
+        from .youtube_upload import build_video_metadata
+        
+        try:
+            logger.info(f"Uploading to YouTube: {os.path.basename(video_path)}")
+            upload = self.youtube_client.upload(
+                video_path,
+                # Built while the access token refreshes
+                lambda: build_video_metadata(
+                    caption, hashtags,
+                    privacy_status=self.youtube_config.get('privacy_status', 'public'),
+                    category_id=str(self.youtube_config.get('category_id', '22'))
+                )
+            )
+            
+            resource = upload['resource']
+            result = {
+                'platform': 'youtube',
+                'media_type': 'short',
+                'media_id': resource.get('id'),
+                'timestamp': datetime.now().isoformat(),
+                'video_path': video_path,
+                'title': resource.get('snippet', {}).get('title'),
+                'bytes': upload['bytes'],
+                'upload_seconds': round(upload['seconds'], 2),
+                'resumes': upload['resumes'],
+                'success': True
+            }
+            
+            logger.info(f"Successfully uploaded YouTube video: {resource.get('id')}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"YouTube upload error: {e}")
+            return {
+                'platform': 'youtube',
+                'success': False,
+                'error': str(e),
+                'error_type': classify_error(e),
+                'status': error_status(e),
+                'retry_after': retry_after(e),
+                'handed_off': isinstance(e, UnconfirmedPostError),
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    def _breaker(self, platform: str) -> CircuitBreaker:
+        """Get the circuit breaker for a platform"""
+        # Fan-out threads ask for breakers concurrently
+        with self._breakers_lock:
+            if platform not in self._breakers:
+                self._breakers[platform] = CircuitBreaker(
+                    platform,
+                    failure_threshold=self.retry_config.get('failure_threshold', 3),
+                    reset_timeout=self.retry_config.get('reset_timeout', 1800)
+                )
+            return self._breakers[platform]
+    
+    def _account(self, platform: str, account: Optional[str] = None) -> str:
+        """Account name used for a platform's sessions and rate limits"""
+        if account:
+            return account
+        if platform == 'instagram' and self.instagram_sessions:
+            return self.instagram_sessions.default_account
+        config = {'instagram': self.instagram_config, 'tiktok': self.tiktok_config,
+                  'youtube': self.youtube_config}.get(platform, {})
+        return config.get('username') or 'default'
+    
+    def _upload_once(self, platform: str, video_path: str, caption: str,
+                     hashtags: list, thumbnail: Optional[str] = None,
+                     account: Optional[str] = None) -> Optional[Dict]:
+        """Make a single upload attempt to a platform"""
+        if platform == 'instagram':
+            return self.upload_to_instagram(video_path, caption, hashtags,
+                                            thumbnail=thumbnail, account=account)
+        elif platform == 'tiktok':
+            return self.upload_to_tiktok(video_path, caption, hashtags)
+        elif platform == 'youtube':
+            return self.upload_to_youtube(video_path, caption, hashtags)
+        else:
+            logger.error(f"Unknown platform: {platform}")
+            return None
     
     def upload(self, platform: str, video_path: str, caption: str, 
-              hashtags: list) -> Optional[Dict]:
+              hashtags: list, thumbnail: Optional[str] = None,
+              account: Optional[str] = None) -> Optional[Dict]:
         """
-        Upload video to specified platform
+        Upload video to specified platform, retrying transient failures
+        
+        Transient errors are retried with jittered exponential backoff and
+        rate limits with a longer one; fatal errors are not retried, and
+        neither is anything that failed after the platform was handed the
+        media ('handed_off': the post may be live). While a platform's
+        circuit is open, uploads to it fail immediately.
         
         Args:
-            platform: Platform name (instagram, tiktok, youtube)
+            platform: Platform name (instagram, tiktok, youtube), optionally
+                with an account as 'platform:account'
             video_path: Path to video file
             caption: Post caption
             hashtags: List of hashtags
+            thumbnail: Path to cover image (optional)
+            account: Account to post as (optional, overrides 'platform:account')
             
         Returns:
-            Upload result dictionary
+            Upload result dictionary (with 'attempts')
         """
         if not os.path.exists(video_path):
             logger.error(f"Video file not found: {video_path}")
             return None
         
+        platform, _, target_account = platform.partition(':')
         platform = platform.lower()
+        account = self._account(platform, account or target_account or None)
+        # Rate limits on one account must not trip the circuit for the others
+        breaker = self._breaker(f"{platform}:{account}")
+        if not breaker.allow():
+            logger.warning(f"Skipping {platform}: circuit open for another {breaker.retry_in():.0f}s")
+            return {
+                'platform': platform,
+                'success': False,
+                'error': f"Circuit open after repeated failures (retry in {breaker.retry_in():.0f}s)",
+                'error_type': 'circuit_open',
+                'attempts': 0,
+                'timestamp': datetime.now().isoformat()
+            }
         
-        if platform == 'instagram':
-            return self.upload_to_instagram(video_path, caption, hashtags)
-        elif platform == 'tiktok':
-            return self.upload_to_tiktok(video_path, caption, hashtags)
-        elif platform == 'youtube':
-            return self.upload_to_youtube(video_path, caption, hashtags)
-        else:
-            logger.error(f"Unknown platform: {platform}")
-            return None
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if not self.rate_limiter.acquire(platform, account):
+                logger.warning(f"Skipping {platform}: action limit would delay the upload "
+                               f"more than {self.rate_limiter.max_wait:.0f}s")
+                return {
+                    'platform': platform,
+                    'success': False,
+                    'error': 'Action rate limit reached',
+                    'error_type': RATE_LIMITED,
+                    'attempts': attempt - 1,
+                    'timestamp': datetime.now().isoformat()
+                }
+            result = self._upload_once(platform, video_path, caption, hashtags,
+                                       thumbnail=thumbnail, account=account)
+            if result is None:
+                # No client: settle a half-open trial instead of leaving it pending
+                breaker.record_failure(TRANSIENT)
+                return None
+            result['attempts'] = attempt
+            
+            if result['success']:
+                breaker.record_success()
+                return result
+            
+            error_type = result.get('error_type', FATAL)
+            breaker.record_failure(error_type, result.get('retry_after'))
+            if result.get('handed_off'):
+                logger.error(f"Not retrying {platform}: the post may already be live, verify it manually")
+                return result
+            if error_type == FATAL or attempt >= self.retry_policy.max_attempts \
+                    or breaker.state == CircuitBreaker.OPEN:
+                return result
+            
+            delay = self.retry_policy.delay(attempt, error_type, result.get('retry_after'))
+            if time.monotonic() - start + delay > self.retry_policy.max_elapsed:
+                logger.warning(f"Not retrying {platform}: backoff of {delay:.0f}s exceeds the retry budget")
+                return result
+            
+            logger.warning(f"{platform} upload failed ({error_type}), "
+                           f"retrying in {delay:.0f}s (attempt {attempt + 1}/{self.retry_policy.max_attempts})")
+            time.sleep(delay)
 
 
 if __name__ == "__main__":
@@ -218,6 +520,8 @@ if __name__ == "__main__":
     
     uploader = VideoUploader()
     print("Uploader initialized")
-    print(f"Instagram enabled: {uploader.instagram_client is not None}")
+    print(f"Instagram enabled: {uploader.instagram_sessions is not None}")
+    if uploader.instagram_sessions:
+        print(f"Instagram accounts: {', '.join(uploader.instagram_sessions.names)}")
     print(f"TikTok enabled: {uploader.tiktok_client is not None}")
     print(f"YouTube enabled: {uploader.youtube_client is not None}")
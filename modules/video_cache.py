@@ -0,0 +1,261 @@
+"""
+Prepared Video Cache Module
+Content-addressed store for converted/compressed videos with LRU eviction
+"""
+
+import os
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to in-process locking only
+    fcntl = None
+
+from .fingerprint import Fingerprinter
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedVideoCache:
+    """Cache of prepared videos keyed by source content + encode parameters"""
+
+    def __init__(self, cache_dir: str = "cache/prepared", max_bytes: int = 5 * 1024 ** 3,
+                 fingerprinter: Optional[Fingerprinter] = None):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding cached files and the index
+            max_bytes: Disk budget; least recently used files are evicted past it
+            fingerprinter: Source identity provider (optional, in-memory if missing)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprinter = fingerprinter or Fingerprinter(cache_path=None)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, holders] for preparations in flight
+        # Reads are not written back one by one; they are folded into the next index write
+        self._touched = {}  # key -> last access time
+        self._pending = {'hits': 0, 'misses': 0}
+        os.makedirs(os.path.join(cache_dir, "locks"), exist_ok=True)
+        # A run that only hits the cache still saves its reads on the way out
+        atexit.register(self.close)
+
+    @contextmanager
+    def _locked_index(self, write: bool = True):
+        """
+        Load the index under a lock and save it on exit
+
+        The index is re-read on every operation and guarded by a file lock,
+        so several processes can share one cache directory. Lookups pass
+        write=False; their LRU touches and counters are saved with the
+        next write instead of rewriting the index on every hit.
+        """
+        with self._lock:
+            lock_file = open(os.path.join(self.cache_dir, "index.lock"), 'a')
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                index = self._read_index()
+                if write:
+                    # Before the caller runs, so eviction sees recent use
+                    self._flush_reads(index)
+                yield index
+                if write:
+                    self._write_index(index)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _read_index(self) -> dict:
+        index = {'entries': {}, 'stats': {'hits': 0, 'misses': 0, 'evictions': 0}}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    index.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load prepared video cache index: {e}")
+        return index
+
+    def _flush_reads(self, index: dict):
+        """Apply LRU touches and hit/miss counts recorded since the last write"""
+        for key, accessed in self._touched.items():
+            entry = index['entries'].get(key)
+            if entry:
+                entry['last_access'] = max(entry['last_access'], accessed)
+        for name, count in self._pending.items():
+            index['stats'][name] += count
+        self._touched.clear()
+        self._pending = {'hits': 0, 'misses': 0}
+
+    def flush(self):
+        """Save LRU touches and hit/miss counts recorded since the last index write"""
+        with self._lock:
+            if not self._touched and not any(self._pending.values()):
+                return
+        with self._locked_index():
+            pass
+
+    def close(self):
+        """Flush pending reads (also run at interpreter exit)"""
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Could not save prepared video cache reads: {e}")
+
+    def _write_index(self, index: dict):
+        # Per-process temp name so writers never share a half-written file
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    @contextmanager
+    def preparing(self, key: str):
+        """
+        Hold a cache key while its file is being prepared
+
+        A second caller for the same key (the prefetcher and a slot upload,
+        or another process) waits until the first is done and then finds
+        the file in the cache instead of encoding to the same paths.
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Keys share one of 256 lock files so the directory stays small
+                lock_file = open(os.path.join(self.cache_dir, "locks", f"{key[:2]}.lock"), 'a')
+                try:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def make_key(self, source_path: str, params: dict) -> str:
+        """
+        Build a cache key from source content and encode parameters
+
+        Args:
+            source_path: Path to the source video
+            params: Encode parameters that affect the output
+
+        Returns:
+            Hex cache key
+        """
+        digest = hashlib.sha256(self.fingerprinter.fingerprint(source_path).encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def path_for(self, key: str, ext: str = ".mp4") -> str:
+        """Path a cached file with this key is stored at"""
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a prepared file and mark it as recently used
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Path to the cached file or None on a miss
+        """
+        with self._locked_index(write=False) as index:
+            entry = index['entries'].get(key)
+            if entry and os.path.exists(entry['file']):
+                self._touched[key] = time.time()
+                self._pending['hits'] += 1
+                return entry['file']
+            self._pending['misses'] += 1
+
+        if entry:
+            # File was removed behind our back
+            with self._locked_index() as index:
+                index['entries'].pop(key, None)
+        return None
+
+    def put(self, key: str, file_path: str, source_path: Optional[str] = None) -> str:
+        """
+        Add a prepared file to the cache (moved in if it lives elsewhere)
+
+        Args:
+            key: Cache key from make_key
+            file_path: Path to the prepared file
+            source_path: Original video, recorded for status output (optional)
+
+        Returns:
+            Path to the cached file
+        """
+        cached_path = self.path_for(key, os.path.splitext(file_path)[1] or ".mp4")
+        if os.path.abspath(file_path) != os.path.abspath(cached_path):
+            shutil.move(file_path, cached_path)
+
+        with self._locked_index() as index:
+            now = time.time()
+            index['entries'][key] = {
+                'file': cached_path,
+                'size': os.path.getsize(cached_path),
+                'source': source_path,
+                'created': now,
+                'last_access': now
+            }
+            self._evict(index, keep=key)
+
+        return cached_path
+
+    def _evict(self, index: dict, keep: Optional[str] = None):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+
+        for key in sorted(entries, key=lambda k: entries[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            entry = entries.pop(key)
+            total -= entry['size']
+            index['stats']['evictions'] += 1
+            try:
+                os.remove(entry['file'])
+            except OSError:
+                pass
+            logger.info(f"Evicted cached video: {os.path.basename(entry['file'])} "
+                        f"({entry['size'] / (1024 * 1024):.1f}MB)")
+
+    def stats(self) -> dict:
+        """
+        Get cache counters and usage
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries, bytes and max_bytes
+        """
+        self.flush()
+        with self._lock:
+            index = self._read_index()
+        return {
+            **index['stats'],
+            'entries': len(index['entries']),
+            'bytes': sum(entry['size'] for entry in index['entries'].values()),
+            'max_bytes': self.max_bytes
+        }
@@ -4,9 +4,17 @@ Handles video optimization and preprocessing
 """
 
 import os
+import time
 import yaml
 import logging
-from typing import Optional, Tuple
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from .media_probe import ProbeCache, probe_video, find_ffprobe, find_ffmpeg
+from .video_cache import PreparedVideoCache
+from .fingerprint import Fingerprinter
+from .platform_profiles import get_profile, group_platforms
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +28,61 @@ class VideoProcessor:
         self.video_config = self.config.get('video', {})
         self.max_size_mb = self.video_config.get('max_size_mb', 100)
         self.auto_compress = self.video_config.get('auto_compress', True)
+        
+        # Header-only probing (ffprobe) with a persistent cache
+        self.ffprobe_path = find_ffprobe(self.video_config.get('ffprobe_path'))
+        self.probe_cache = ProbeCache(self.video_config.get('probe_cache', 'cache/probe_cache.json'),
+                                      max_entries=self.video_config.get('max_probe_entries', 2000))
+        
+        # Single-pass encoding settings
+        self.ffmpeg_path = find_ffmpeg(self.video_config.get('ffmpeg_path'))
+        self.audio_bitrate_kbps = self.video_config.get('audio_bitrate_kbps', 128)
+        self.min_video_bitrate_kbps = self.video_config.get('min_video_bitrate_kbps', 300)
+        self.x264_preset = self.video_config.get('preset', 'medium')
+        self.crf = self.video_config.get('crf', 20)
+        self.threads = self.video_config.get('threads')  # None lets ffmpeg decide
+        
+        # Size-targeted encoding (sample encodes + verified full encode)
+        self.size_margin = self.video_config.get('size_margin', 0.03)
+        self.size_tolerance = self.video_config.get('size_tolerance', 0.08)
+        self.size_sample_seconds = self.video_config.get('size_sample_seconds', 4)
+        self.size_sample_count = self.video_config.get('size_sample_count', 3)
+        self.size_max_sample_passes = self.video_config.get('size_max_sample_passes', 4)
+        self.size_max_full_passes = self.video_config.get('size_max_full_passes', 2)
+        
+        # Per-platform encoding profiles; video.max_size_mb caps every platform when set
+        self.profile_overrides = self.config.get('platform_profiles', {})
+        self.profile_merge_tolerance = self.video_config.get('profile_merge_tolerance', 0.5)
+        self.target = {**get_profile('instagram', self.profile_overrides),
+                       **self.video_config.get('target', {}),
+                       'max_size_mb': self.max_size_mb, 'platforms': []}
+        
+        # Prepared outputs are cached by source content + encode parameters
+        self.cache_config = self.config.get('cache', {})
+        self.fingerprinter = Fingerprinter(
+            self.cache_config.get('fingerprints', 'cache/fingerprints.json'),
+            fast=self.cache_config.get('fast_fingerprint', False),
+            max_entries=self.cache_config.get('max_fingerprints', 5000)
+        )
+        self.cache = PreparedVideoCache(
+            self.cache_config.get('prepared_dir', 'cache/prepared'),
+            int(self.cache_config.get('max_size_mb', 5120) * 1024 * 1024),
+            fingerprinter=self.fingerprinter
+        )
+        self.thumbnails_dir = self.cache_config.get('thumbnails_dir', 'cache/thumbnails')
+        self.cover_time = self.video_config.get('cover_time', 0.0)
+        
+        # Running totals for this processor (encodes done vs. avoided)
+        self.stats = {'encode_passes': 0, 'encode_passes_skipped': 0, 'remuxes': 0,
+                      'size_sample_passes': 0, 'size_full_passes': 0}
+        self._stats_lock = threading.Lock()
     
     def get_video_info(self, video_path: str) -> Optional[dict]:
         """
-        Get video information (duration, size, format, etc.)
+        Get video information (duration, size, format, codecs, etc.)
+        
+        Uses a cached ffprobe header read; falls back to moviepy when
+        ffprobe is not installed.
         
         Args:
             video_path: Path to video file
@@ -35,34 +94,47 @@ class VideoProcessor:
             logger.error(f"Video file not found: {video_path}")
             return None
         
+        size_mb = os.path.getsize(video_path) / (1024 * 1024)
+        base_info = {
+            'path': video_path,
+            'size_mb': round(size_mb, 2),
+            'format': os.path.splitext(video_path)[1]
+        }
+        
+        cached = self.probe_cache.get(video_path)
+        if cached is not None:
+            logger.debug(f"Probe cache hit: {os.path.basename(video_path)}")
+            return {**cached, **base_info}
+        
+        if self.ffprobe_path:
+            probed = probe_video(video_path, self.ffprobe_path)
+            if probed is not None:
+                self.probe_cache.put(video_path, probed)
+                info = {**probed, **base_info}
+                logger.info(f"Video info: {info}")
+                return info
+        
         try:
             from moviepy.editor import VideoFileClip
             
             clip = VideoFileClip(video_path)
-            size_mb = os.path.getsize(video_path) / (1024 * 1024)
             
-            info = {
-                'path': video_path,
+            probed = {
                 'duration': clip.duration,
-                'size_mb': round(size_mb, 2),
                 'fps': clip.fps,
-                'resolution': clip.size,
-                'format': os.path.splitext(video_path)[1]
+                'resolution': list(clip.size)
             }
             
             clip.close()
+            self.probe_cache.put(video_path, probed)
+            info = {**probed, **base_info}
             logger.info(f"Video info: {info}")
             return info
             
         except ImportError:
             logger.error("moviepy not installed. Run: pip install moviepy")
             # Return basic info without moviepy
-            size_mb = os.path.getsize(video_path) / (1024 * 1024)
-            return {
-                'path': video_path,
-                'size_mb': round(size_mb, 2),
-                'format': os.path.splitext(video_path)[1]
-            }
+            return base_info
         except Exception as e:
             logger.error(f"Error getting video info: {e}")
             return None
@@ -80,24 +152,43 @@ class VideoProcessor:
         Returns:
             Path to compressed video or None
         """
-        try:
-            from moviepy.editor import VideoFileClip
+        if not output_path:
+            name, ext = os.path.splitext(video_path)
+            output_path = f"{name}_compressed{ext}"
+        
+        if not target_size_mb:
+            target_size_mb = self.max_size_mb
+        
+        if self.ffmpeg_path:
+            # Size-targeted encode: converges on the limit and verifies the output
+            info = self.get_video_info(video_path) or {}
+            plan = self.plan_encode(video_path, info)
+            if plan['action'] == 'refuse':
+                logger.error(f"Not compressing {os.path.basename(video_path)}: {plan['error']}")
+                return None
+            plan.update({'action': 'transcode', 'video_codec': 'libx264', 'output_path': output_path,
+                         'audio_codec': 'aac' if info.get('has_audio', True) else None})
             
-            if not output_path:
-                name, ext = os.path.splitext(video_path)
-                output_path = f"{name}_compressed{ext}"
+            logger.info(f"Compressing video to ~{target_size_mb}MB")
+            # Planned duration: what is actually encoded when the profile trims
+            result = self.encode_to_size(plan, output_path, target_size_mb, plan['duration'])
+            if not result:
+                return None
             
-            if not target_size_mb:
-                target_size_mb = self.max_size_mb
+            logger.info(f"Compressed video saved: {output_path} ({result['size_mb']}MB)")
+            return output_path
+        
+        try:
+            from moviepy.editor import VideoFileClip
             
             logger.info(f"Compressing video to ~{target_size_mb}MB")
             
             clip = VideoFileClip(video_path)
             
-            # Calculate target bitrate (reserve 128kbps for audio)
+            # Calculate target bitrate (reserve audio, never below the minimum)
             duration = clip.duration
-            audio_bitrate = 128  # kbps for audio
-            target_video_bitrate = int((target_size_mb * 8192) / duration) - audio_bitrate
+            audio_bitrate = self.audio_bitrate_kbps
+            target_video_bitrate = self._target_video_bitrate(duration, target_size_mb)
             
             clip.write_videofile(
                 output_path,
@@ -136,11 +227,12 @@ class VideoProcessor:
         if not self.auto_compress:
             return False
         
-        info = self.get_video_info(video_path)
-        if not info:
+        # Size is all we need here - a stat is enough, no probe required
+        if not os.path.exists(video_path):
             return False
         
-        return info['size_mb'] > self.max_size_mb
+        size_mb = os.path.getsize(video_path) / (1024 * 1024)
+        return size_mb > self.max_size_mb
     
     def convert_to_mp4(self, video_path: str, output_path: Optional[str] = None) -> Optional[str]:
         """
@@ -154,8 +246,6 @@ class VideoProcessor:
             Path to converted video or None
         """
         try:
-            from moviepy.editor import VideoFileClip
-            
             if not output_path:
                 name, _ = os.path.splitext(video_path)
                 output_path = f"{name}.mp4"
@@ -164,6 +254,17 @@ class VideoProcessor:
             if video_path.lower().endswith('.mp4'):
                 return video_path
             
+            # Compatible streams only need a new container, not a re-encode
+            info = self.get_video_info(video_path)
+            if info and self.is_stream_copy_compatible(info)[0]:
+                logger.info(f"Remuxing {os.path.basename(video_path)} to MP4 (stream copy)...")
+                if self._remux(video_path, output_path):
+                    logger.info(f"Converted to MP4: {output_path}")
+                    return output_path
+            
+            # moviepy is only needed when the stream copy is not possible
+            from moviepy.editor import VideoFileClip
+            
             logger.info(f"Converting {os.path.basename(video_path)} to MP4...")
             
             clip = VideoFileClip(video_path)
@@ -189,33 +290,590 @@ class VideoProcessor:
             logger.error(f"Error converting video: {e}")
             return None
     
-    def prepare_video(self, video_path: str) -> str:
+    def profile_for(self, platform: str) -> dict:
+        """
+        Get the encoding profile for a platform, capped by video.max_size_mb if set
+        
+        Args:
+            platform: Platform name
+            
+        Returns:
+            Profile dictionary
+        """
+        profile = get_profile(platform, self.profile_overrides)
+        if 'max_size_mb' in self.video_config:
+            profile['max_size_mb'] = min(profile['max_size_mb'], self.max_size_mb)
+        return profile
+    
+    def is_stream_copy_compatible(self, info: dict, target: Optional[dict] = None) -> Tuple[bool, str]:
+        """
+        Check whether the streams can be copied into MP4 without re-encoding
+        
+        Args:
+            info: Video info from get_video_info
+            target: Profile to check against (optional, uses the default target)
+            
+        Returns:
+            Tuple of (compatible, reason) - reason explains a rejection
+        """
+        target = target or self.target
+        codec = info.get('video_codec')
+        if not codec:
+            return False, "video codec unknown"
+        if codec not in target['video_codecs']:
+            return False, f"video codec {codec} not accepted"
+        
+        profile = info.get('video_profile')
+        if target.get('video_profiles') and profile not in target['video_profiles']:
+            return False, f"profile {profile} not accepted"
+        
+        level = info.get('video_level')
+        if target.get('max_level') and (level is None or level > target['max_level']):
+            return False, f"level {level} above {target['max_level']}"
+        
+        pix_fmt = info.get('pix_fmt')
+        if target.get('pix_fmts') and pix_fmt not in target['pix_fmts']:
+            return False, f"pixel format {pix_fmt} not accepted"
+        
+        if info.get('has_audio') and info.get('audio_codec') not in target['audio_codecs']:
+            return False, f"audio codec {info.get('audio_codec')} not accepted"
+        
+        return True, "streams compatible"
+    
+    def _target_video_bitrate(self, duration: float, target_size_mb: float) -> int:
+        """
+        Video bitrate (kbps) that fits duration into target size after audio
+        
+        Clamped so very short clips never get a zero or negative bitrate.
+        """
+        total_kbps = int((target_size_mb * 8192) / max(duration, 0.1))
+        return max(total_kbps - self.audio_bitrate_kbps, self.min_video_bitrate_kbps)
+    
+    def plan_encode(self, video_path: str, info: Optional[dict] = None,
+                    profile: Optional[dict] = None) -> dict:
+        """
+        Decide container, codecs and bitrate for a video in one look
+        
+        Args:
+            video_path: Path to video file
+            info: Video info from get_video_info (optional, probed if missing)
+            profile: Encoding profile to meet (optional, uses the default target)
+            
+        Returns:
+            Plan dictionary with 'action' ('passthrough', 'remux',
+            'transcode' or 'refuse' with an 'error' when the video is too
+            long and the profile does not allow trimming), encode settings,
+            'output_path' and 'legacy_passes' (the number of encodes the old
+            convert-then-compress flow would have run)
+        """
+        if info is None:
+            info = self.get_video_info(video_path) or {}
+        profile = profile or self.target
+        max_size_mb = profile.get('max_size_mb') or self.max_size_mb
+        duration = info.get('duration')
+        
+        needs_container = not video_path.lower().endswith('.mp4')
+        over_size = self.auto_compress and info.get('size_mb', 0) > max_size_mb
+        max_duration = profile.get('max_duration_s')
+        too_long = bool(duration and max_duration and duration > max_duration)
+        trim_to = max_duration if too_long and profile.get('trim') else None
+        max_video_kbps = profile.get('max_video_kbps')
+        over_bitrate = bool(max_video_kbps and (info.get('video_bitrate_kbps') or 0) > max_video_kbps)
+        
+        plan = {
+            'source': video_path,
+            'action': 'passthrough',
+            'container': profile.get('container', 'mp4'),
+            'video_codec': 'libx264',
+            'audio_codec': 'aac' if info.get('has_audio', True) else None,
+            'audio_bitrate_kbps': self.audio_bitrate_kbps,
+            'video_bitrate_kbps': None,
+            'max_video_kbps': max_video_kbps,
+            'output_path': video_path,
+            'reasons': [],
+            'platforms': profile.get('platforms', []),
+            'duration': min(duration, trim_to) if trim_to else duration,
+            'trim_to': trim_to,
+            'target_size_mb': max_size_mb if over_size else None,
+            'legacy_passes': int(needs_container) + int(over_size)
+        }
+        
+        if too_long and not trim_to:
+            # Cutting a video short is never done silently
+            plan['action'] = 'refuse'
+            plan['error'] = (f"duration {duration:.0f}s > {max_duration}s allowed on "
+                             f"{', '.join(plan['platforms']) or 'the target'}; not uploading it there "
+                             f"(set platform_profiles.<platform>.trim: true to trim instead)")
+            return plan
+        
+        if needs_container:
+            plan['reasons'].append(f"container {info.get('format') or 'unknown'} -> mp4")
+        if trim_to:
+            plan['reasons'].append(f"duration {duration:.0f}s > {max_duration}s, trimming")
+        if over_bitrate:
+            plan['reasons'].append(f"bitrate {info.get('video_bitrate_kbps')}k > {max_video_kbps}k")
+            plan['video_bitrate_kbps'] = max_video_kbps
+        if over_size:
+            plan['reasons'].append(f"size {info.get('size_mb')}MB > {max_size_mb}MB")
+            if plan['duration']:
+                bitrate = self._target_video_bitrate(plan['duration'], max_size_mb)
+                plan['video_bitrate_kbps'] = min(bitrate, max_video_kbps or bitrate)
+            else:
+                plan['reasons'].append("duration unknown, using CRF")
+        
+        if needs_container or over_size or trim_to or over_bitrate:
+            name, _ = os.path.splitext(video_path)
+            suffix = '_compressed' if over_size else ''
+            plan['action'] = 'transcode'
+            plan['output_path'] = f"{name}{suffix}.mp4"
+        
+        # Only the container (or length) is wrong: copy the streams instead of re-encoding
+        if (needs_container or trim_to) and not over_size and not over_bitrate:
+            compatible, reason = self.is_stream_copy_compatible(info, profile)
+            if compatible:
+                plan['action'] = 'remux'
+                plan['video_codec'] = 'copy'
+                if plan['audio_codec']:
+                    plan['audio_codec'] = 'copy'
+            plan['reasons'].append(reason)
+        
+        return plan
+    
+    def _run_ffmpeg(self, args: list) -> bool:
+        """Run ffmpeg with the given arguments, logging stderr on failure"""
+        if not self.ffmpeg_path:
+            logger.error("ffmpeg not found. Install ffmpeg or set video.ffmpeg_path in config")
+            return False
+        
+        cmd = [self.ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error'] + args
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"ffmpeg failed: {e.stderr.decode(errors='replace').strip()[-500:]}")
+            return False
+        except OSError as e:
+            logger.error(f"Could not run ffmpeg: {e}")
+            return False
+    
+    def _transcode(self, plan: dict, output_path: str, bitrate: Optional[int] = None,
+                   segment: Optional[Tuple[float, float]] = None) -> bool:
+        """
+        Encode plan['source'] to output_path in a single ffmpeg pass
+        
+        Args:
+            plan: Plan dictionary from plan_encode
+            output_path: Where to write the encode
+            bitrate: Video bitrate override in kbps (optional)
+            segment: (start, length) in seconds to encode only part of the source
+        """
+        args = []
+        if segment:
+            # Input seeking jumps to the nearest keyframe instead of decoding from the start
+            args += ['-ss', f"{segment[0]:.3f}", '-t', f"{segment[1]:.3f}"]
+        args += ['-i', plan['source'], '-map', '0:v:0', '-map', '0:a:0?',
+                 '-c:v', plan['video_codec'], '-preset', self.x264_preset, '-pix_fmt', 'yuv420p']
+        if plan.get('trim_to') and not segment:
+            args += ['-t', f"{plan['trim_to']:.3f}"]
+        
+        bitrate = bitrate or plan['video_bitrate_kbps']
+        if bitrate:
+            args += ['-b:v', f"{bitrate}k", '-maxrate', f"{int(bitrate * 1.5)}k",
+                     '-bufsize', f"{bitrate * 2}k"]
+        else:
+            args += ['-crf', str(self.crf)]
+        
+        if plan['audio_codec']:
+            args += ['-c:a', plan['audio_codec'], '-b:a', f"{plan['audio_bitrate_kbps']}k"]
+        
+        if self.threads:
+            args += ['-threads', str(self.threads)]
+        
+        # Write to a temporary name so a crash never leaves a truncated .mp4 behind
+        tmp_path = f"{output_path}.part"
+        args += ['-movflags', '+faststart', '-f', plan['container'], tmp_path]
+        
+        if not self._run_ffmpeg(args):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        
+        os.replace(tmp_path, output_path)
+        return True
+    
+    def encode_to_size(self, plan: dict, output_path: str, target_size_mb: float,
+                       duration: Optional[float]) -> Optional[dict]:
+        """
+        Encode so the output lands just under target_size_mb
+        
+        Short sample encodes spread across the video predict the full size
+        for a bitrate; the bitrate is bisected until the prediction is
+        within tolerance, then one full encode runs and is verified. If
+        the verified file is still too big, the bitrate is scaled down and
+        the full encode repeated, up to size_max_full_passes times.
+        
+        Args:
+            plan: Plan dictionary from plan_encode
+            output_path: Where to write the encode
+            target_size_mb: Hard size limit in MB
+            duration: Source duration in seconds (None falls back to CRF)
+            
+        Returns:
+            Dictionary with 'bitrate_kbps', 'sample_passes', 'full_passes'
+            and 'size_mb', or None if encoding failed
+        """
+        if not duration:
+            # Nothing to size a bitrate by - a single CRF pass, still counted
+            logger.warning("Unknown duration, encoding once at CRF without a size target")
+            if not self._transcode(plan, output_path):
+                return None
+            with self._stats_lock:
+                self.stats['size_full_passes'] += 1
+            return {'bitrate_kbps': None, 'sample_passes': 0, 'full_passes': 1,
+                    'size_mb': round(os.path.getsize(output_path) / (1024 * 1024), 2)}
+        
+        limit_bytes = target_size_mb * 1024 * 1024
+        goal_bytes = limit_bytes * (1 - self.size_margin)
+        low_bytes = goal_bytes * (1 - self.size_tolerance)
+        aim_bytes = (goal_bytes + low_bytes) / 2
+        
+        bitrate = self._target_video_bitrate(duration, goal_bytes / (1024 * 1024))
+        lo, hi = self.min_video_bitrate_kbps, bitrate * 4
+        if plan.get('max_video_kbps'):
+            # Never go above the platform's bitrate ceiling
+            bitrate = min(bitrate, plan['max_video_kbps'])
+            hi = min(hi, plan['max_video_kbps'] + 1)
+        sample_passes = 0
+        
+        sample_seconds = self.size_sample_seconds
+        sample_count = self.size_sample_count
+        sampled = duration > sample_seconds * sample_count * 2
+        
+        # Bisect the bitrate on short samples (skipped for clips too short to sample)
+        while sampled and sample_passes < self.size_max_sample_passes:
+            predicted = self._predict_size(plan, bitrate, duration)
+            sample_passes += 1
+            if predicted is None:
+                break
+            
+            logger.info(f"Size sample #{sample_passes}: {bitrate}k -> ~{predicted / (1024 * 1024):.1f}MB")
+            if low_bytes <= predicted <= goal_bytes or bitrate <= self.min_video_bitrate_kbps:
+                break
+            if predicted > goal_bytes:
+                hi = bitrate
+            else:
+                lo = bitrate
+            
+            # Step proportionally, but stay inside the bracket (plain bisection otherwise)
+            proposed = int(bitrate * aim_bytes / predicted)
+            bitrate = proposed if lo < proposed < hi else (lo + hi) // 2
+        
+        # Full encode(s), verified against the hard limit
+        full_passes = 0
+        while True:
+            full_passes += 1
+            if not self._transcode(plan, output_path, bitrate=bitrate):
+                return None
+            
+            size_bytes = os.path.getsize(output_path)
+            if size_bytes <= limit_bytes or full_passes >= self.size_max_full_passes \
+                    or bitrate <= self.min_video_bitrate_kbps:
+                break
+            
+            logger.info(f"Output {size_bytes / (1024 * 1024):.1f}MB over {target_size_mb}MB, re-encoding")
+            bitrate = max(int(bitrate * aim_bytes / size_bytes), self.min_video_bitrate_kbps)
+        
+        if size_bytes > limit_bytes:
+            logger.warning(f"Could not fit under {target_size_mb}MB "
+                           f"({size_bytes / (1024 * 1024):.1f}MB after {full_passes} full passes)")
+        
+        with self._stats_lock:
+            self.stats['size_sample_passes'] += sample_passes
+            self.stats['size_full_passes'] += full_passes
+        
+        result = {
+            'bitrate_kbps': bitrate,
+            'sample_passes': sample_passes,
+            'full_passes': full_passes,
+            'size_mb': round(size_bytes / (1024 * 1024), 2)
+        }
+        logger.info(f"Size-targeted encode: {result['size_mb']}MB at {bitrate}k "
+                    f"({sample_passes} sample passes, {full_passes} full)")
+        return result
+    
+    def _predict_size(self, plan: dict, bitrate: int, duration: float) -> Optional[float]:
+        """Predict full output size in bytes from short sample encodes at bitrate"""
+        sample_seconds = self.size_sample_seconds
+        count = self.size_sample_count
+        sample_path = f"{plan['output_path']}.sample"
+        total_bytes = 0
+        
+        try:
+            for i in range(count):
+                # Spread samples evenly, away from the very start and end
+                start = (duration - sample_seconds) * (i + 1) / (count + 1)
+                if not self._transcode(plan, sample_path, bitrate=bitrate,
+                                       segment=(start, sample_seconds)):
+                    return None
+                total_bytes += os.path.getsize(sample_path)
+        finally:
+            if os.path.exists(sample_path):
+                os.remove(sample_path)
+        
+        return total_bytes / (sample_seconds * count) * duration
+    
+    def _remux(self, video_path: str, output_path: str, trim_to: Optional[float] = None) -> bool:
+        """Copy video/audio streams into an MP4 container with the moov atom up front"""
+        tmp_path = f"{output_path}.part"
+        args = ['-i', video_path, '-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy']
+        if trim_to:
+            args += ['-t', f"{trim_to:.3f}"]
+        args += ['-map_metadata', '0', '-movflags', '+faststart', '-f', 'mp4', tmp_path]
+        
+        if not self._run_ffmpeg(args):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        
+        os.replace(tmp_path, output_path)
+        return True
+    
+    def execute_plan(self, plan: dict) -> Optional[str]:
+        """
+        Run an encode plan (at most one encode)
+        
+        plan['action'] is updated to what actually ran if a remux has to
+        fall back to a transcode.
+        
+        Args:
+            plan: Plan dictionary from plan_encode
+            
+        Returns:
+            Path to the prepared video or None on failure
+        """
+        if plan['action'] == 'passthrough':
+            return plan['source']
+        
+        start = time.time()
+        if plan['action'] == 'remux':
+            logger.info(f"Remuxing {os.path.basename(plan['source'])} to MP4 (stream copy)")
+            if self._remux(plan['source'], plan['output_path'], plan.get('trim_to')):
+                with self._stats_lock:
+                    self.stats['remuxes'] += 1
+            else:
+                # Fall back to a real transcode if the copy is rejected by the muxer
+                logger.warning("Remux failed, falling back to transcode")
+                self._as_transcode(plan)
+        
+        if plan['action'] == 'transcode':
+            logger.info(f"Encoding {os.path.basename(plan['source'])} in one pass ({'; '.join(plan['reasons'])})")
+            if plan.get('target_size_mb'):
+                plan['size_encode'] = self.encode_to_size(plan, plan['output_path'],
+                                                          plan['target_size_mb'], plan.get('duration'))
+                if not plan['size_encode']:
+                    return None
+            elif not self._transcode(plan, plan['output_path']):
+                return None
+        
+        new_size_mb = os.path.getsize(plan['output_path']) / (1024 * 1024)
+        logger.info(f"Prepared video saved: {plan['output_path']} ({new_size_mb:.2f}MB, {time.time() - start:.1f}s)")
+        return plan['output_path']
+    
+    @staticmethod
+    def _as_transcode(plan: dict) -> dict:
+        """Turn a remux plan into the transcode it falls back to (in place)"""
+        plan.update({'action': 'transcode', 'video_codec': 'libx264',
+                     'audio_codec': 'aac' if plan['audio_codec'] else None})
+        return plan
+    
+    def _cache_params(self, plan: dict) -> dict:
+        """Encode parameters that determine the prepared output"""
+        params = {key: plan[key] for key in ('action', 'container', 'video_codec', 'audio_codec',
+                                             'audio_bitrate_kbps', 'video_bitrate_kbps',
+                                             'max_video_kbps', 'target_size_mb', 'trim_to')}
+        if plan['action'] == 'transcode':
+            params.update({'preset': self.x264_preset, 'crf': self.crf})
+        return params
+    
+    def _fingerprint_digest(self, video_path: str) -> str:
+        """Fingerprint without its mode prefix, safe to use in file names"""
+        return self.fingerprinter.fingerprint(video_path).split(':', 1)[-1]
+    
+    def extract_cover(self, video_path: str, timestamp: Optional[float] = None) -> Optional[str]:
+        """
+        Extract a cover frame, cached by video content and timestamp
+        
+        Seeks on the input (nearest keyframe) so only a few frames are
+        decoded, regardless of where in the video the cover is taken.
+        
+        Args:
+            video_path: Path to video file
+            timestamp: Cover position in seconds (optional, uses video.cover_time)
+            
+        Returns:
+            Path to the cover JPEG or None
+        """
+        if not os.path.exists(video_path):
+            logger.error(f"Video file not found: {video_path}")
+            return None
+        
+        if timestamp is None:
+            timestamp = self.cover_time
+        info = self.get_video_info(video_path) or {}
+        if info.get('duration'):
+            timestamp = min(max(timestamp, 0.0), max(info['duration'] - 0.1, 0.0))
+        
+        cover_path = os.path.join(self.thumbnails_dir,
+                                  f"{self._fingerprint_digest(video_path)}_{int(timestamp * 1000)}.jpg")
+        if os.path.exists(cover_path):
+            return cover_path
+        
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        tmp_path = f"{cover_path}.part"
+        args = ['-ss', f"{timestamp:.3f}", '-i', video_path, '-frames:v', '1', '-q:v', '2',
+                '-f', 'image2', '-update', '1', tmp_path]
+        if not self._run_ffmpeg(args):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        
+        os.replace(tmp_path, cover_path)
+        logger.info(f"Extracted cover at {timestamp:.1f}s: {cover_path}")
+        return cover_path
+    
+    def prepare(self, video_path: str, profile: Optional[dict] = None) -> dict:
+        """
+        Prepare video for upload and report what was done
+        
+        The source is probed once and container, codec and bitrate are
+        chosen together, so at most one encode runs. Results are kept in
+        the prepared video cache and reused on later calls.
+        
+        Args:
+            video_path: Path to video file
+            profile: Encoding profile to meet (optional, uses the default target)
+            
+        Returns:
+            Report dictionary with 'path' (prepared file, or the source if
+            preparation failed), 'action', 'cached', 'success', 'seconds',
+            'size_mb' and 'duration'; a refused video has 'refused' and
+            'error' instead of a usable path
+        """
+        start = time.time()
+        info = self.get_video_info(video_path) or {}
+        plan = self.plan_encode(video_path, info, profile)
+        report = {
+            'source': video_path,
+            'platforms': plan['platforms'],
+            'path': video_path,
+            'action': plan['action'],
+            'cached': False,
+            'success': True,
+            'size_mb': info.get('size_mb'),
+            'duration': info.get('duration'),
+            'fps': info.get('fps')
+        }
+        
+        if plan['action'] == 'refuse':
+            logger.error(f"Not preparing {os.path.basename(video_path)}: {plan['error']}")
+            report.update({'success': False, 'refused': True, 'error': plan['error'],
+                           'seconds': time.time() - start})
+            return report
+        
+        if plan['action'] == 'passthrough':
+            return self._finish_prepare(plan, report, None, start)
+        
+        cache_key = self.cache.make_key(video_path, self._cache_params(plan))
+        # Concurrent callers for the same output wait here, then hit the cache
+        with self.cache.preparing(cache_key):
+            cached_path = self.cache.get(cache_key)
+            if not cached_path and plan['action'] == 'remux':
+                # An earlier remux of this source may have fallen back to a transcode
+                fallback = self._as_transcode(dict(plan))
+                cached_path = self.cache.get(self.cache.make_key(video_path, self._cache_params(fallback)))
+            if not cached_path:
+                plan['output_path'] = self.cache.path_for(cache_key)
+                return self._finish_prepare(plan, report, cache_key, start)
+        
+        logger.info(f"Using cached prepared video: {cached_path}")
+        with self._stats_lock:
+            self.stats['encode_passes_skipped'] += plan['legacy_passes']
+        # Save the hit so other processes see this file as recently used
+        self.cache.flush()
+        report.update({'path': cached_path, 'cached': True, 'seconds': time.time() - start})
+        return report
+    
+    def _finish_prepare(self, plan: dict, report: dict, cache_key: Optional[str], start: float) -> dict:
+        """Run a plan, cache its output and complete prepare()'s report"""
+        video_path = plan['source']
+        action = plan['action']
+        prepared_path = self.execute_plan(plan)
+        report['action'] = plan['action']
+        report['size_encode'] = plan.get('size_encode')
+        report['seconds'] = time.time() - start
+        if not prepared_path:
+            report['success'] = False
+            return report
+        if cache_key:
+            if plan['action'] != action:
+                # Cache a fallback under what actually ran, never under the remux key
+                cache_key = self.cache.make_key(video_path, self._cache_params(plan))
+            prepared_path = self.cache.put(cache_key, prepared_path, source_path=video_path)
+        report['path'] = prepared_path
+        
+        passes = 1 if plan['action'] == 'transcode' else 0
+        if plan.get('size_encode'):
+            passes = plan['size_encode']['full_passes']
+        skipped = max(plan['legacy_passes'] - passes, 0)
+        with self._stats_lock:
+            self.stats['encode_passes'] += passes
+            self.stats['encode_passes_skipped'] += skipped
+            total_skipped = self.stats['encode_passes_skipped']
+        if skipped:
+            logger.info(f"Encode passes: {passes} (skipped {skipped}; {total_skipped} skipped in total)")
+        
+        return report
+    
+    def prepare_video(self, video_path: str, platform: Optional[str] = None) -> str:
         """
         Prepare video for upload (convert format and compress if needed)
         
         Args:
             video_path: Path to video file
+            platform: Target platform (optional, uses the default target)
             
         Returns:
             Path to prepared video (may be original, converted, or compressed)
         """
-        current_path = video_path
+        profile = self.profile_for(platform) if platform else None
+        return self.prepare(video_path, profile)['path']
+    
+    def prepare_for_platforms(self, video_path: str, platforms: List[str]) -> Dict[str, dict]:
+        """
+        Prepare one artifact per group of platforms whose limits it can satisfy
         
-        # Convert MOV and other formats to MP4
-        if not video_path.lower().endswith('.mp4'):
-            logger.info(f"Converting non-MP4 file to MP4 format...")
-            converted_path = self.convert_to_mp4(video_path)
-            if converted_path:
-                current_path = converted_path
+        Args:
+            video_path: Path to video file
+            platforms: Target platform names
+            
+        Returns:
+            Dictionary mapping each platform to its prepare report
+        """
+        info = self.get_video_info(video_path) or {}
+        profiles = [self.profile_for(platform) for platform in platforms]
+        overrides = {profile['platforms'][0]: profile for profile in profiles}
+        groups = group_platforms(platforms, info, overrides, self.profile_merge_tolerance)
         
-        # Compress if needed
-        if self.should_compress(current_path):
-            logger.info(f"Video exceeds size limit, compressing...")
-            compressed_path = self.compress_video(current_path)
-            if compressed_path:
-                return compressed_path
+        if len(groups) < len(platforms):
+            logger.info(f"Encode once, share many: {len(platforms)} platforms -> {len(groups)} artifacts "
+                        f"({'; '.join('+'.join(group['platforms']) for group in groups)})")
         
-        return current_path
+        reports = {}
+        for group in groups:
+            report = self.prepare(video_path, group)
+            for platform in group['platforms']:
+                reports[platform] = report
+        return reports
 
 
 if __name__ == "__main__":
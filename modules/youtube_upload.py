@@ -0,0 +1,330 @@
+"""
+YouTube Resumable Upload Module
+Chunked uploads over the YouTube Data API resumable protocol
+"""
+
+import os
+import re
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Union
+
+import requests
+
+from .upload_body import UploadBody
+from .retry import UnconfirmedPostError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+
+# Chunks must be a multiple of 256 KiB (except the last one)
+CHUNK_MULTIPLE = 256 * 1024
+
+
+class ResumableUploadError(Exception):
+    """Upload was rejected or could not be resumed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def build_video_metadata(caption: str, hashtags: list, privacy_status: str = "public",
+                         category_id: str = "22", shorts: bool = True) -> dict:
+    """
+    Build the YouTube video resource from a caption and hashtags
+
+    Args:
+        caption: Post caption (first line becomes the title)
+        hashtags: Hashtags without '#'
+        privacy_status: public, unlisted or private
+        category_id: YouTube category id
+        shorts: Add #Shorts to the description
+
+    Returns:
+        Video resource dictionary with snippet and status
+    """
+    first_line = next((line for line in caption.splitlines() if line.strip()), "")
+    title = re.sub(r'#\w+', '', first_line).replace('<', '').replace('>', '').strip()
+    title = title[:100] or "Untitled"
+
+    tags = []
+    tags_length = 0
+    for tag in hashtags:
+        # YouTube caps the combined tag length at 500 characters
+        if tags_length + len(tag) + 1 > 500:
+            break
+        tags.append(tag)
+        tags_length += len(tag) + 1
+
+    description = caption.replace('<', '').replace('>', '')
+    if hashtags:
+        description += "\n\n" + ' '.join(f'#{tag}' for tag in hashtags)
+    if shorts and '#shorts' not in description.lower():
+        description += "\n#Shorts"
+
+    return {
+        'snippet': {
+            'title': title,
+            'description': description[:5000],
+            'tags': tags,
+            'categoryId': category_id
+        },
+        'status': {
+            'privacyStatus': privacy_status,
+            'selfDeclaredMadeForKids': False
+        }
+    }
+
+
+class ResumableUploader:
+    """Uploads a file in chunks and resumes from the last acknowledged byte"""
+
+    def __init__(self, upload_url: str = UPLOAD_URL, chunk_size: int = 8 * 1024 * 1024,
+                 token_provider: Optional[Callable[[], Optional[str]]] = None,
+                 max_resumes: int = 10, timeout: float = 60,
+                 session: Optional[requests.Session] = None,
+                 throttle: Optional[Callable[[int], None]] = None,
+                 resume_delay: float = 0.1, max_resume_delay: float = 30,
+                 resume_budget: float = 600):
+        """
+        Initialize uploader
+
+        Args:
+            upload_url: Resumable upload endpoint (point at a local fake for tests)
+            chunk_size: Bytes per PUT, rounded down to a multiple of 256 KiB
+            token_provider: Returns an OAuth2 access token (refreshing if needed)
+            max_resumes: Connection drops tolerated per upload
+            timeout: Seconds per HTTP request
+            session: requests session to reuse connections (optional)
+            throttle: Blocks before each body chunk is sent (bandwidth cap, optional)
+            resume_delay: First backoff before asking the server where to resume (seconds)
+            max_resume_delay: Cap on one backoff between status queries (seconds)
+            resume_budget: Keep querying an unreachable server this long before giving up
+        """
+        self.upload_url = upload_url
+        self.chunk_size = max(CHUNK_MULTIPLE, chunk_size // CHUNK_MULTIPLE * CHUNK_MULTIPLE)
+        self.token_provider = token_provider or (lambda: None)
+        self.max_resumes = max_resumes
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.throttle = throttle
+        self.resume_delay = resume_delay
+        self.max_resume_delay = max_resume_delay
+        self.resume_budget = resume_budget
+
+    def _auth_headers(self) -> Dict[str, str]:
+        # Asked before every request so uploads outlasting the token keep working
+        token = self.token_provider()
+        return {'Authorization': f"Bearer {token}"} if token else {}
+
+    def start_session(self, size: int, metadata: dict, auth_headers: Dict[str, str],
+                      content_type: str = "video/mp4") -> str:
+        """
+        Create a resumable upload session
+
+        Args:
+            size: Total bytes to upload
+            metadata: Video resource (snippet, status)
+            auth_headers: Authorization headers
+            content_type: MIME type of the video
+
+        Returns:
+            Session URI to PUT chunks to
+        """
+        response = self.session.post(
+            self.upload_url,
+            params={'uploadType': 'resumable', 'part': ','.join(metadata.keys())},
+            json=metadata,
+            headers={**auth_headers,
+                     'X-Upload-Content-Length': str(size),
+                     'X-Upload-Content-Type': content_type},
+            timeout=self.timeout
+        )
+        if response.status_code != 200 or 'Location' not in response.headers:
+            raise ResumableUploadError(f"Could not start upload session: {response.status_code} "
+                                       f"{response.text[:200]}", response.status_code)
+        return response.headers['Location']
+
+    @staticmethod
+    def _acknowledged(response: requests.Response) -> int:
+        """Bytes the server has, from a 308 response's Range header ('bytes=0-N')"""
+        match = re.match(r'bytes=0-(\d+)', response.headers.get('Range', ''))
+        return int(match.group(1)) + 1 if match else 0
+
+    def query_offset(self, session_uri: str, size: int,
+                     auth_headers: Optional[Dict[str, str]] = None) -> Union[int, dict]:
+        """
+        Ask the server how much of the upload it has
+
+        Args:
+            session_uri: Upload session URI
+            size: Total bytes of the upload
+            auth_headers: Authorization headers (optional, fetched if missing)
+
+        Returns:
+            Next byte offset to send, or the video resource if already complete
+        """
+        if auth_headers is None:
+            auth_headers = self._auth_headers()
+        response = self.session.put(session_uri, headers={**auth_headers,
+                                                          'Content-Length': '0',
+                                                          'Content-Range': f"bytes */{size}"},
+                                    timeout=self.timeout)
+        if response.status_code in (200, 201):
+            return response.json()
+        if response.status_code == 308:
+            return self._acknowledged(response)
+        raise ResumableUploadError(f"Could not query upload status: {response.status_code}",
+                                   response.status_code)
+
+    def _resume_offset(self, session_uri: str, size: int) -> Union[int, dict]:
+        """
+        Query the upload status after an interruption, backing off while the server is unreachable
+
+        Waits grow exponentially (with jitter) from resume_delay up to
+        max_resume_delay, for at most resume_budget seconds in total, so a
+        longer outage still resumes the same session instead of starting over.
+
+        Returns:
+            Next byte offset to send, or the video resource if already complete
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = min(self.resume_delay * 2 ** (attempt - 1), self.max_resume_delay)
+            time.sleep(random.uniform(delay / 2, delay))
+            try:
+                return self.query_offset(session_uri, size)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except ResumableUploadError as e:
+                # Only server-side trouble is worth waiting out
+                if e.status_code is not None and e.status_code < 500 and e.status_code != 429:
+                    raise
+                error = e
+
+            next_delay = min(self.resume_delay * 2 ** attempt, self.max_resume_delay)
+            if time.monotonic() - start + next_delay > self.resume_budget:
+                raise ResumableUploadError(f"Could not query upload status for "
+                                           f"{time.monotonic() - start:.0f}s: {error}") from error
+            logger.warning(f"Upload status query failed ({error}), retrying")
+
+    def _send(self, body: UploadBody, session_uri: str,
+              progress: Optional[Callable[[int, int], None]]) -> tuple:
+        """
+        PUT the body chunk by chunk until the server returns the video resource
+
+        Once the final chunk has gone out the server may have created the
+        video, so failures from then on (until the server reports a missing
+        range again) are raised as UnconfirmedPostError.
+        """
+        size = len(body)
+        offset = 0
+        resumes = 0
+        resource = None
+        final_sent = False
+
+        try:
+            while resource is None:
+                end = min(offset + self.chunk_size, size)
+                try:
+                    if offset >= size:
+                        # Everything was acknowledged but the final response was lost
+                        status = self.query_offset(session_uri, size)
+                        if isinstance(status, dict):
+                            resource = status
+                            break
+                        offset = status
+                        final_sent = False
+                        continue
+
+                    final_sent = final_sent or end == size
+                    response = self.session.put(
+                        session_uri,
+                        data=body.slice(offset, end),
+                        headers={**self._auth_headers(),
+                                 'Content-Length': str(end - offset),
+                                 'Content-Range': f"bytes {offset}-{end - 1}/{size}"},
+                        timeout=self.timeout
+                    )
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    response = None
+                    error = e
+
+                if response is not None and response.status_code in (200, 201):
+                    resource = response.json()
+                    offset = size
+                elif response is not None and response.status_code == 308:
+                    offset = self._acknowledged(response)
+                    final_sent = False
+                elif response is not None and response.status_code < 500:
+                    # An explicit rejection: nothing was published
+                    final_sent = False
+                    raise ResumableUploadError(f"Upload rejected: {response.status_code} "
+                                               f"{response.text[:200]}", response.status_code)
+                else:
+                    # Dropped connection or server error: ask where to pick up
+                    resumes += 1
+                    if resumes > self.max_resumes:
+                        raise ResumableUploadError(
+                            f"Gave up after {resumes - 1} resumes",
+                            response.status_code if response is not None else None
+                        ) from (error if response is None else None)
+                    reason = f"HTTP {response.status_code}" if response is not None else error
+                    status = self._resume_offset(session_uri, size)
+                    if isinstance(status, dict):
+                        resource = status
+                        offset = size
+                    else:
+                        logger.warning(f"Upload interrupted ({reason}), resuming at byte {status} of {size}")
+                        offset = status
+                        final_sent = False
+
+                if progress:
+                    progress(offset, size)
+        except Exception as e:
+            if final_sent:
+                raise UnconfirmedPostError(f"YouTube may have received the whole video but did not "
+                                           f"confirm it: {e}") from e
+            raise
+
+        return resource, resumes
+
+    def upload(self, video_path: str, metadata: Union[dict, Callable[[], dict]],
+               progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Upload a video, resuming after dropped connections
+
+        Metadata may be a callable; it is then built in parallel with the
+        access token refresh before the session starts.
+
+        Args:
+            video_path: Path to video file
+            metadata: Video resource or a callable returning it
+            progress: Called with (bytes acknowledged, total bytes)
+
+        Returns:
+            Result dictionary with the video resource, bytes, seconds and resumes
+        """
+        size = os.path.getsize(video_path)
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            auth_future = executor.submit(self._auth_headers)
+            metadata_future = executor.submit(metadata) if callable(metadata) else None
+            auth_headers = auth_future.result()
+            metadata = metadata_future.result() if metadata_future else metadata
+
+        session_uri = self.start_session(size, metadata, auth_headers)
+        with UploadBody(video_path, throttle=self.throttle) as body:
+            resource, resumes = self._send(body, session_uri, progress)
+
+        seconds = time.time() - start
+        logger.info(f"Uploaded {size / (1024 * 1024):.1f}MB in {seconds:.1f}s "
+                    f"({size / (1024 * 1024) / max(seconds, 1e-6):.1f} MB/s, {resumes} resumes)")
+        return {'resource': resource, 'bytes': size, 'seconds': seconds, 'resumes': resumes}
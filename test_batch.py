@@ -0,0 +1,28 @@
+"""Tests for batch catalog preparation"""
+
+from modules.batch import prepare_catalog
+
+
+SUMMARY_KEYS = {'results', 'files', 'failed', 'cached', 'encoded', 'wall_seconds',
+                'worker_seconds', 'mb_per_second', 'encoded_fps'}
+
+
+def test_empty_catalog_has_the_full_summary(tmp_path):
+    summary = prepare_catalog([str(tmp_path / "missing.mp4")])
+    assert set(summary) == SUMMARY_KEYS
+    assert (summary['files'], summary['failed'], summary['encoded']) == (0, 0, 0)
+
+
+def test_worker_startup_failure_is_reported_per_file(tmp_path):
+    videos = []
+    for name in ("a.mp4", "b.mp4"):
+        path = tmp_path / name
+        path.write_bytes(b'video')
+        videos.append(str(path))
+
+    summary = prepare_catalog(videos, config_path=str(tmp_path / "no-config.yaml"), cores=2, nice=0)
+
+    assert set(summary) == SUMMARY_KEYS
+    assert summary['files'] == summary['failed'] == 2
+    assert sorted(report['source'] for report in summary['results']) == videos
+    assert all(report['error'].startswith("Worker failed") for report in summary['results'])
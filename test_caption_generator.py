@@ -0,0 +1,177 @@
+"""Tests for caption generation: parsing, batching and length limits"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+import yaml
+
+from modules.caption_generator import CaptionGenerator, _cut_at_sentence, _parse_post
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    # The Ollama client is only touched through the stubbed completion methods
+    monkeypatch.setitem(sys.modules, 'ollama', types.ModuleType('ollama'))
+    config = {
+        'ai': {'use_local_ai': True, 'model': 'llama3', 'cache': {'enabled': False}},
+        'hashtags': {'max_count': 5, 'custom_tags': ['mybrand']}
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return CaptionGenerator(str(config_path), style_path=str(tmp_path / "none.yaml"),
+                            video_descriptions_path=str(tmp_path / "none.yaml"))
+
+
+@pytest.mark.parametrize('text', [
+    '{"caption": "Sunset run", "hashtags": ["running", "sunset"]}',
+    '```json\n{"caption": "Sunset run", "hashtags": ["running", "sunset"]}\n```',
+    'Here you go:\n{"caption": " Sunset run ", "hashtags": "#running, #sunset"}\nEnjoy!',
+])
+def test_parse_post(text):
+    assert _parse_post(text) == ("Sunset run", ["running", "sunset"])
+
+
+def test_parse_post_cleans_hashtags():
+    caption, hashtags = _parse_post('{"caption": "x", "hashtags": ["1. #Run", "run", "ok", "- trail_life"]}')
+    assert hashtags == ["Run", "trail_life"]
+
+
+@pytest.mark.parametrize('text', [
+    'no json here',
+    '["caption", "hashtags"]',
+    '{"hashtags": ["running"]}',
+    '{"caption": "  ", "hashtags": ["running"]}',
+    '{"caption": "Sunset run"}',
+    '{"caption": "Sunset run", "hashtags": [1, 2]}',
+    '{"caption": "Sunset run", "hashtags": [',
+])
+def test_parse_post_rejects_bad_shapes(text):
+    with pytest.raises(ValueError):
+        _parse_post(text)
+
+
+def test_combined_post_uses_one_request(generator, monkeypatch):
+    calls = []
+
+    def complete(prompt, system, max_tokens, purpose="completion", **kwargs):
+        calls.append(purpose)
+        return '{"caption": "Sunset run", "hashtags": ["running", "sunset"]}'
+
+    monkeypatch.setattr(generator, '_complete', complete)
+    post = generator.generate_full_post("videos/run.mp4")
+
+    assert calls == ["post"]
+    assert post['caption'] == "Sunset run"
+    assert post['hashtags'] == ["running", "sunset", "mybrand"]
+    assert post['full_text'] == "Sunset run\n\n#running #sunset #mybrand"
+
+
+def test_missing_keys_fall_back_to_two_requests(generator, monkeypatch):
+    responses = {'post': '{"caption": "Sunset run"}', 'caption': "Sunset run, again.",
+                 'hashtags': "running\nsunset"}
+    calls = []
+
+    def complete(prompt, system, max_tokens, purpose="completion", validate=None, **kwargs):
+        calls.append(purpose)
+        text = responses[purpose]
+        if validate:
+            validate(text)
+        return text
+
+    monkeypatch.setattr(generator, '_complete', complete)
+    post = generator.generate_full_post("videos/run.mp4")
+
+    assert calls == ["post", "caption", "hashtags"]
+    assert post['caption'] == "Sunset run, again."
+    assert post['hashtags'] == ["running", "sunset", "mybrand"]
+
+
+def test_batch_limits_concurrency_and_keeps_order(generator, monkeypatch):
+    in_flight = {'now': 0, 'peak': 0}
+    delays = iter([0.05, 0.04, 0.03, 0.02, 0.01, 0.0] * 2)
+
+    async def acomplete(client, prompt, system, max_tokens, purpose="completion", **kwargs):
+        in_flight['now'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        # Later requests finish first
+        await asyncio.sleep(next(delays))
+        in_flight['now'] -= 1
+        variation = "alternative caption #2" in prompt
+        video = prompt.split("Video file: ")[1].split("\n")[0]
+        return f'{{"caption": "{video} {int(variation)}", "hashtags": ["tag"]}}'
+
+    monkeypatch.setattr(generator, '_async_client', lambda: None)
+    monkeypatch.setattr(generator, '_acomplete', acomplete)
+    batch = generator.generate_batch(["a.mp4", "b.mp4", "c.mp4"], variants=2, concurrency=2)
+
+    assert in_flight['peak'] == 2
+    assert list(batch) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert [[post['caption'] for post in posts] for posts in batch.values()] == \
+        [["a.mp4 0", "a.mp4 1"], ["b.mp4 0", "b.mp4 1"], ["c.mp4 0", "c.mp4 1"]]
+
+
+@pytest.mark.parametrize('text, limit, expected', [
+    ("Great run today!", 16, "Great run today!"),
+    ("Great run today! Felt strong.", 29, "Great run today! Felt strong."),
+    ("Great run today! Felt strong.", 20, "Great run today!"),
+    ("Line one ends here\n", 18, "Line one ends here"),
+    ("Line one ends here\nand line two goes on", 25, "Line one ends here"),
+    ("one two three four five six", 12, "one two..."),
+    # A sentence end in the first half of the budget would waste too much of it
+    ("Hi. this is a long sentence without end", 20, "Hi. this is a..."),
+    ("Supercalifragilistic", 10, "Superca..."),
+])
+def test_cut_at_sentence(text, limit, expected):
+    assert _cut_at_sentence(text, limit) == expected
+    assert len(_cut_at_sentence(text, limit)) <= limit
+
+
+class FakeStream:
+    """Ollama-style chunk stream that records how far it was read and whether it was closed"""
+
+    def __init__(self, pieces, eval_data=None):
+        self.pieces = pieces
+        self.eval_data = eval_data
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.read += 1
+            yield {'message': {'content': piece}, 'done': False}
+        yield {'message': {'content': ''}, 'done': True, **(self.eval_data or {})}
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_stops_at_the_limit_and_hangs_up(generator):
+    stream = FakeStream(["Great run today! ", "Felt strong the whole way. ", "More ", "text ", "here."])
+    generator.client = types.SimpleNamespace(chat=lambda **kwargs: stream)
+    text = generator._complete("prompt", "system", max_tokens=100, purpose="caption", stop_at=30)
+
+    assert stream.read == 2
+    assert stream.closed
+    assert generator._fit(text, 30) == "Great run today!"
+    assert generator.stream_stats()['early_stops'] == 1
+    # Stopped before the final chunk: no eval data to record
+    assert generator.prompt_stats()['unmeasured'] == 1
+
+
+def test_full_stream_records_eval_data(generator):
+    stream = FakeStream(["Short caption."], {'prompt_eval_count': 40, 'prompt_eval_duration': 2e7})
+    generator.client = types.SimpleNamespace(chat=lambda **kwargs: stream)
+    text = generator._complete("prompt", "system", max_tokens=100, purpose="caption", stop_at=100)
+
+    assert text == "Short caption."
+    stats = generator.prompt_stats()
+    assert (stats['requests'], stats['prompt_tokens'], stats['unmeasured']) == (1, 40, 0)
+
+
+def test_stop_at_is_part_of_the_cache_key(generator):
+    generator.cache = object()
+    model, messages, params = generator._request("prompt", "system", 100)
+    keys = {generator._cache_key(model, messages, params, stop_at) for stop_at in (None, 100, 200)}
+    assert len(keys) == 3
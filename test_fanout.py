@@ -0,0 +1,84 @@
+"""Tests for concurrent per-platform uploads"""
+
+import threading
+import time
+
+from modules.fanout import UploadFanout
+
+
+class FakeUploader:
+    """Uploader stand-in: per-platform delay, error or missing result"""
+
+    def __init__(self, delays=None, errors=None, empty=()):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.empty = empty
+        self.active = {}
+        self.peak = {}
+        self._lock = threading.Lock()
+
+    def upload(self, platform, **kwargs):
+        with self._lock:
+            self.active[platform] = self.active.get(platform, 0) + 1
+            self.peak[platform] = max(self.peak.get(platform, 0), self.active[platform])
+        try:
+            time.sleep(self.delays.get(platform, 0))
+            if platform in self.errors:
+                raise self.errors[platform]
+            if platform in self.empty:
+                return None
+            return {'platform': platform, 'success': True, 'video_path': kwargs['video_path']}
+        finally:
+            with self._lock:
+                self.active[platform] -= 1
+
+
+def test_platforms_upload_concurrently():
+    fanout = UploadFanout(FakeUploader(delays={'instagram': 0.3, 'youtube': 0.3, 'tiktok': 0.3}))
+    start = time.monotonic()
+    results = fanout.run({platform: {'video_path': f"{platform}.mp4"}
+                          for platform in ('instagram', 'youtube', 'tiktok')})
+
+    assert time.monotonic() - start < 0.8
+    assert all(result['success'] for result in results.values())
+    assert results['youtube']['video_path'] == "youtube.mp4"
+    assert all('elapsed' in result and 'timestamp' in result for result in results.values())
+
+
+def test_per_platform_concurrency_limit():
+    uploader = FakeUploader(delays={'instagram': 0.1, 'youtube': 0.1})
+    fanout = UploadFanout(uploader, max_workers=8, platform_concurrency={'youtube': 2})
+
+    runs = [threading.Thread(target=fanout.run,
+                             args=({'instagram': {'video_path': 'a'}, 'youtube': {'video_path': 'a'}},))
+            for _ in range(4)]
+    for run in runs:
+        run.start()
+    for run in runs:
+        run.join()
+
+    assert uploader.peak == {'instagram': 1, 'youtube': 2}
+
+
+def test_slow_platform_times_out_alone():
+    recorded = []
+    fanout = UploadFanout(FakeUploader(delays={'tiktok': 1.0}), platform_timeouts={'tiktok': 0.2})
+    start = time.monotonic()
+    results = fanout.run({'instagram': {'video_path': 'a'}, 'tiktok': {'video_path': 'a'}},
+                         on_result=lambda platform, result: recorded.append(platform))
+
+    assert time.monotonic() - start < 0.8
+    assert results['instagram']['success']
+    assert results['tiktok']['timed_out'] and not results['tiktok']['success']
+    assert recorded == ['instagram']
+    fanout.shutdown(wait=True)
+
+
+def test_errors_and_missing_results_are_failures():
+    fanout = UploadFanout(FakeUploader(errors={'instagram': RuntimeError("boom")}, empty=('youtube',)))
+    results = fanout.run({platform: {'video_path': 'a'} for platform in ('instagram', 'youtube', 'tiktok')})
+
+    assert not results['instagram']['success']
+    assert results['instagram']['error'] == "boom"
+    assert results['youtube']['error'] == "No result"
+    assert results['tiktok']['success']
@@ -0,0 +1,51 @@
+"""Tests for content fingerprints and their shared cache file"""
+
+import hashlib
+import json
+
+from modules.fingerprint import Fingerprinter, fingerprint_file
+
+
+def make_file(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_full_fingerprint_is_the_sha256(tmp_path):
+    data = bytes(range(256)) * 5000
+    path = make_file(tmp_path, "a.mp4", data)
+    assert fingerprint_file(path, chunk_size=65536) == f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+def test_instances_sharing_a_file_keep_each_others_entries(tmp_path):
+    cache_path = str(tmp_path / "fingerprints.json")
+    first = Fingerprinter(cache_path)
+    second = Fingerprinter(cache_path)
+
+    a = first.fingerprint(make_file(tmp_path, "a.mp4", b'a' * 1000))
+    b = second.fingerprint(make_file(tmp_path, "b.mp4", b'b' * 1000))
+
+    with open(cache_path) as f:
+        saved = {entry['fingerprint'] for entry in json.load(f).values()}
+    assert saved == {a, b}
+    assert len(Fingerprinter(cache_path)._entries) == 2
+
+
+def test_cache_file_is_capped(tmp_path):
+    cache_path = str(tmp_path / "fingerprints.json")
+    fingerprinter = Fingerprinter(cache_path, max_entries=2)
+    for name in ("a", "b", "c"):
+        fingerprinter.fingerprint(make_file(tmp_path, f"{name}.mp4", name.encode() * 100))
+
+    with open(cache_path) as f:
+        assert [entry['path'] for entry in json.load(f).values()] == \
+            [str(tmp_path / "b.mp4"), str(tmp_path / "c.mp4")]
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    fingerprinter = Fingerprinter(str(tmp_path / "fingerprints.json"))
+    path = make_file(tmp_path, "a.mp4", b'a' * 1000)
+    before = fingerprinter.fingerprint(path)
+    make_file(tmp_path, "a.mp4", b'b' * 2000)
+    assert fingerprinter.fingerprint(path) != before
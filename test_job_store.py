@@ -0,0 +1,93 @@
+"""Tests for durable upload jobs and caption rotation"""
+
+from modules.job_store import JobStore, PENDING, PREPARING, UPLOADING, PUBLISHED, FAILED
+
+
+def make_store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def test_create_is_idempotent(tmp_path):
+    store = make_store(tmp_path)
+    job = store.create("a.mp4", "fp", "instagram", "slot1", caption_index=0)
+    again = store.create("a.mp4", "fp", "instagram", "slot1", caption_index=3)
+
+    assert job['state'] == PENDING
+    assert again['idempotency_key'] == job['idempotency_key']
+    assert again['caption_index'] == 0
+
+
+def test_claim_only_once(tmp_path):
+    store = make_store(tmp_path)
+    key = store.create("a.mp4", "fp", "instagram", "slot1")['idempotency_key']
+
+    assert store.transition(key, PREPARING)
+    assert store.claim(key)
+    assert not store.claim(key)
+    assert store.get(key)['attempts'] == 1
+
+
+def test_published_is_final(tmp_path):
+    store = make_store(tmp_path)
+    key = store.create("a.mp4", "fp", "instagram", "slot1")['idempotency_key']
+    store.claim(key)
+
+    assert store.mark_published(key, {'media_id': 42})
+    assert store.get(key)['state'] == PUBLISHED
+    assert store.get(key)['media_id'] == '42'
+    assert not store.transition(key, PENDING)
+    assert not store.mark_failed(key, "late error")
+
+
+def test_failed_job_can_be_retried(tmp_path):
+    store = make_store(tmp_path)
+    key = store.create("a.mp4", "fp", "instagram", "slot1")['idempotency_key']
+    store.claim(key)
+
+    assert store.mark_failed(key, "boom")
+    assert store.get(key)['state'] == FAILED
+    assert store.claim(key)
+    assert store.get(key)['attempts'] == 2
+
+
+def test_unconfirmed_upload_stays_uploading(tmp_path):
+    store = make_store(tmp_path)
+    key = store.create("a.mp4", "fp", "instagram", "slot1")['idempotency_key']
+
+    assert not store.mark_unconfirmed(key, "timed out")
+    store.claim(key)
+    assert store.mark_unconfirmed(key, "timed out")
+
+    job = store.get(key)
+    assert job['state'] == UPLOADING
+    assert "may be live" in job['error']
+    assert not store.transition(key, PENDING)
+
+
+def test_rotation_advances_once_the_slot_is_complete(tmp_path):
+    store = make_store(tmp_path)
+    keys = [store.create("a.mp4", "fp", platform, "slot1", caption_index=2)['idempotency_key']
+            for platform in ("instagram", "youtube")]
+    for key in keys:
+        store.claim(key)
+
+    store.mark_published(keys[0])
+    assert store.rotation("a.mp4")['upload_count'] == 0
+    assert store.next_caption_index("a.mp4", 5) == 0
+
+    store.mark_published(keys[1])
+    rotation = store.rotation("a.mp4")
+    assert rotation['upload_count'] == 1
+    assert rotation['last_caption_index'] == 2
+    assert store.next_caption_index("a.mp4", 5) == 3
+    assert store.next_caption_index("a.mp4", 3) == 0
+
+
+def test_slot_jobs_lists_every_platform(tmp_path):
+    store = make_store(tmp_path)
+    for platform in ("instagram", "youtube"):
+        store.create("a.mp4", "fp", platform, "slot1")
+    store.create("a.mp4", "fp", "instagram", "slot2")
+
+    assert [job['platform'] for job in store.slot_jobs("fp", "slot1")] == ["instagram", "youtube"]
+    assert store.state_counts() == {PENDING: 3}
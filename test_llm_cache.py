@@ -0,0 +1,64 @@
+"""Tests for the LLM completions cache"""
+
+from modules import llm_cache
+from modules.llm_cache import LLMCache, make_key
+
+
+def messages(prompt):
+    return [{'role': 'system', 'content': 'You write captions.'},
+            {'role': 'user', 'content': prompt}]
+
+
+def test_key_ignores_whitespace_but_not_params():
+    key = make_key('ollama:llama3', messages("Caption for cat.mp4"), {'max_tokens': 100})
+    assert key == make_key('ollama:llama3', messages("Caption for cat.mp4  \n\n\n"), {'max_tokens': 100})
+    assert key != make_key('ollama:llama3', messages("Caption for cat.mp4"), {'max_tokens': 50})
+    assert key != make_key('openai:gpt-4o', messages("Caption for cat.mp4"), {'max_tokens': 100})
+
+
+def test_hit_and_miss(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.db"))
+    assert cache.get('k') is None
+    cache.put('k', "A caption", model='m')
+    assert cache.get('k') == "A caption"
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert cache.hit_rate() == 0.5
+
+
+def test_expired_entries_are_dropped(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    cache = LLMCache(str(tmp_path / "llm.db"), ttl=60)
+    cache.put('k', "A caption")
+
+    now[0] += 59
+    assert cache.get('k') == "A caption"
+    now[0] += 2
+    assert cache.get('k') is None
+    assert cache.stats()['expired'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_read_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    cache = LLMCache(str(tmp_path / "llm.db"), ttl=0, max_entries=2)
+    for key in ('a', 'b'):
+        cache.put(key, key.upper())
+        now[0] += 1
+    cache.get('a')
+    now[0] += 1
+
+    cache.put('c', "C")
+    assert cache.get('b') is None
+    assert cache.get('a') == "A"
+    assert cache.get('c') == "C"
+    assert cache.stats()['evictions'] == 1
+
+
+def test_from_config_can_disable(tmp_path):
+    assert LLMCache.from_config({'enabled': False}) is None
+    cache = LLMCache.from_config({'path': str(tmp_path / "llm.db"), 'ttl_hours': 1, 'max_entries': 10})
+    assert (cache.ttl, cache.max_entries) == (3600, 10)
@@ -0,0 +1,58 @@
+"""Tests for the persistent probe cache"""
+
+import json
+import os
+
+from modules.media_probe import ProbeCache
+
+
+def make_file(tmp_path, name, data=b'video'):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def saved_paths(cache_path):
+    with open(cache_path) as f:
+        return [os.path.basename(path) for path in json.load(f)]
+
+
+def test_hit_until_the_file_changes(tmp_path):
+    cache = ProbeCache(str(tmp_path / "probe.json"))
+    path = make_file(tmp_path, "a.mp4")
+    cache.put(path, {'duration': 10})
+    assert cache.get(path) == {'duration': 10}
+
+    make_file(tmp_path, "a.mp4", b'edited video')
+    assert cache.get(path) is None
+
+
+def test_instances_sharing_a_file_keep_each_others_entries(tmp_path):
+    cache_path = str(tmp_path / "probe.json")
+    first, second = ProbeCache(cache_path), ProbeCache(cache_path)
+    first.put(make_file(tmp_path, "a.mp4"), {'duration': 1})
+    second.put(make_file(tmp_path, "b.mp4"), {'duration': 2})
+
+    assert saved_paths(cache_path) == ["a.mp4", "b.mp4"]
+
+
+def test_stale_entries_are_dropped(tmp_path):
+    cache_path = str(tmp_path / "probe.json")
+    cache = ProbeCache(cache_path)
+    for name in ("gone.mp4", "edited.mp4", "kept.mp4"):
+        cache.put(make_file(tmp_path, name), {'duration': 1})
+    os.remove(tmp_path / "gone.mp4")
+    make_file(tmp_path, "edited.mp4", b'edited video')
+
+    assert list(map(os.path.basename, ProbeCache(cache_path)._entries)) == ["kept.mp4"]
+    cache.put(make_file(tmp_path, "new.mp4"), {'duration': 1})
+    assert saved_paths(cache_path) == ["kept.mp4", "new.mp4"]
+
+
+def test_entry_count_is_capped(tmp_path):
+    cache_path = str(tmp_path / "probe.json")
+    cache = ProbeCache(cache_path, max_entries=2)
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        cache.put(make_file(tmp_path, name), {'duration': 1})
+
+    assert saved_paths(cache_path) == ["b.mp4", "c.mp4"]
@@ -0,0 +1,74 @@
+"""Tests for the staged prepare/upload pipeline"""
+
+import threading
+import time
+
+from modules.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_every_stage():
+    pipeline = Pipeline([Stage('double', lambda x: x * 2, workers=2),
+                         Stage('label', lambda x: f"#{x}")])
+    summary = pipeline.run(range(5))
+
+    assert sorted(summary['results']) == ['#0', '#2', '#4', '#6', '#8']
+    assert summary['stages']['double']['items'] == 5
+    assert summary['stages']['label']['items'] == 5
+
+
+def test_stages_overlap():
+    pipeline = Pipeline([Stage('prepare', lambda x: time.sleep(0.1) or x),
+                         Stage('upload', lambda x: time.sleep(0.1) or x)])
+    start = time.monotonic()
+    pipeline.run(range(4))
+
+    # Back to back would take 0.8s; overlapped it is about 0.5s
+    assert time.monotonic() - start < 0.7
+
+
+def test_bounded_queue_holds_back_a_fast_stage():
+    prepared = []
+    release = threading.Event()
+
+    def prepare(item):
+        prepared.append(item)
+        return item
+
+    pipeline = Pipeline([Stage('prepare', prepare), Stage('upload', lambda x: release.wait(5) and x)],
+                        queue_size=1)
+    run = threading.Thread(target=pipeline.run, args=(range(10),))
+    run.start()
+    time.sleep(0.2)
+    try:
+        # One item uploading, one waiting in the queue, one blocked on the put
+        assert len(prepared) == 3
+    finally:
+        release.set()
+        run.join(5)
+    assert not run.is_alive()
+    assert len(prepared) == 10
+
+
+def test_failures_and_none_are_dropped_without_stopping_the_run():
+    def prepare(item):
+        if item == 2:
+            raise ValueError("bad video")
+        return None if item == 3 else item
+
+    summary = Pipeline([Stage('prepare', prepare), Stage('upload', lambda x: x)]).run(range(5))
+
+    assert sorted(summary['results']) == [0, 1, 4]
+    assert summary['stages']['prepare']['errors'] == 1
+    assert summary['stages']['upload']['items'] == 3
+
+
+def test_run_returns_with_every_worker_stopped():
+    before = threading.active_count()
+    Pipeline([Stage('a', lambda x: x, workers=3), Stage('b', lambda x: x, workers=2)]).run(range(3))
+    assert threading.active_count() == before
+
+
+def test_empty_input():
+    summary = Pipeline([Stage('a', lambda x: x)]).run([])
+    assert summary['results'] == []
+    assert summary['stages']['a']['items'] == 0
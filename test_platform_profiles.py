@@ -0,0 +1,65 @@
+"""Tests for per-platform encoding profiles and encode-once grouping"""
+
+import pytest
+
+from modules.platform_profiles import PLATFORM_PROFILES, get_profile, group_platforms, merge_profiles
+
+
+def test_overrides_by_platform_and_account():
+    overrides = {'instagram': {'max_size_mb': 50}, 'instagram:brand': {'max_size_mb': 20}}
+    assert get_profile('instagram', overrides)['max_size_mb'] == 50
+    assert get_profile('instagram:brand', overrides)['max_size_mb'] == 20
+    assert get_profile('instagram:brand', overrides)['platforms'] == ['instagram:brand']
+    assert PLATFORM_PROFILES['instagram']['max_size_mb'] == 100
+
+
+def test_unknown_platform_gets_instagram_limits():
+    profile = get_profile('threads')
+    assert profile['max_duration_s'] == PLATFORM_PROFILES['instagram']['max_duration_s']
+    assert profile['platforms'] == ['threads']
+
+
+def test_merge_takes_the_strictest_limits():
+    merged = merge_profiles(get_profile('instagram'), get_profile('tiktok'))
+    assert merged['platforms'] == ['instagram', 'tiktok']
+    assert merged['max_size_mb'] == 100
+    assert merged['max_duration_s'] == 600
+    assert merged['video_codecs'] == ['h264']
+    assert merged['trim'] is False
+
+
+@pytest.mark.parametrize('override', [
+    {'container': 'mov'},
+    {'trim': True},
+    {'audio_codecs': ['opus']},
+    {'video_codecs': ['hevc']},
+])
+def test_conflicting_profiles_do_not_merge(override):
+    youtube = {**get_profile('youtube'), **override}
+    assert merge_profiles(get_profile('instagram'), youtube) is None
+
+
+@pytest.mark.parametrize('source, overrides, groups', [
+    # No source info: anything that merges shares one encode
+    ({}, None, [['instagram', 'youtube', 'tiktok']]),
+    # Short and small: no member loses anything by sharing
+    ({'duration': 60, 'size_mb': 50}, None, [['instagram', 'youtube', 'tiktok']]),
+    # 20 minutes: any pair would cut the platform with the longer limit short
+    ({'duration': 1200, 'size_mb': 50}, None, [['instagram'], ['youtube'], ['tiktok']]),
+    # 250MB: under Instagram's 100MB, YouTube and TikTok would keep less than half their size
+    ({'duration': 60, 'size_mb': 250}, None, [['instagram'], ['youtube', 'tiktok']]),
+    # Trimming is per profile and never shared with a platform that refuses
+    ({'duration': 60, 'size_mb': 50}, {'tiktok': {'trim': True}}, [['instagram', 'youtube'], ['tiktok']]),
+])
+def test_grouping(source, overrides, groups):
+    result = group_platforms(['instagram', 'youtube', 'tiktok'], source, overrides)
+    assert [group['platforms'] for group in result] == groups
+
+
+def test_group_limits_cover_every_member():
+    for group in group_platforms(['instagram', 'youtube', 'tiktok'], {'duration': 60, 'size_mb': 50}):
+        for platform in group['platforms']:
+            profile = get_profile(platform)
+            assert group['max_size_mb'] <= profile['max_size_mb']
+            assert group['max_duration_s'] <= profile['max_duration_s']
+            assert set(group['video_codecs']) <= set(profile['video_codecs'])
@@ -0,0 +1,63 @@
+"""Tests for background slot preparation"""
+
+import threading
+from datetime import datetime
+
+from modules.prefetcher import SlotPrefetcher
+
+
+class SlowProbeProcessor:
+    """Processor stand-in whose probe blocks until released"""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.probing = threading.Event()
+        self.release = threading.Event()
+
+    def get_video_info(self, video_path):
+        self.probing.set()
+        self.release.wait(5)
+        return {'size_mb': self.sizes[video_path.rsplit('/', 1)[-1]]}
+
+    def plan_encode(self, video_path, info):
+        return {'action': 'transcode'}
+
+
+def make_prefetcher(tmp_path, processor):
+    for name in processor.sizes:
+        (tmp_path / name).write_bytes(b'video')
+    # Monday 2026-10-12: a small video at 12:00, a large one at 13:00
+    return SlotPrefetcher(processor, {0: ["small.mp4", "large.mp4"]}, ["12:00", "13:00"],
+                          ['instagram'], videos_folder=str(tmp_path), lookahead=2,
+                          safety_margin_minutes=0, timings_path=str(tmp_path / "timings.json"))
+
+
+def test_probing_does_not_block_lookups(tmp_path):
+    processor = SlowProbeProcessor({"small.mp4": 1, "large.mp4": 1})
+    prefetcher = make_prefetcher(tmp_path, processor)
+    refresh = threading.Thread(target=prefetcher.refresh, args=(datetime(2026, 10, 12, 8, 0),))
+    refresh.start()
+    try:
+        assert processor.probing.wait(5)
+        looked_up = threading.Thread(target=prefetcher.get_prepared, args=(str(tmp_path / "small.mp4"),))
+        looked_up.start()
+        looked_up.join(1)
+        assert not looked_up.is_alive()
+    finally:
+        processor.release.set()
+        refresh.join(5)
+    assert len(prefetcher._queue) == 2
+
+
+def test_least_slack_first_and_no_duplicates(tmp_path):
+    # The large video's estimate (2h at 1s/MB) makes it due before the small one
+    processor = SlowProbeProcessor({"small.mp4": 1, "large.mp4": 7200})
+    processor.release.set()
+    prefetcher = make_prefetcher(tmp_path, processor)
+    now = datetime(2026, 10, 12, 8, 0)
+
+    prefetcher.refresh(now)
+    prefetcher.refresh(now)
+
+    order = [slot['video_filename'] for _, _, slot in sorted(prefetcher._queue)]
+    assert order == ["large.mp4", "small.mp4"]
@@ -0,0 +1,57 @@
+"""Tests for per-account rate limits"""
+
+import pytest
+
+from modules.rate_limit import DEFAULT_RATE_LIMITS, RateLimiter, TokenBucket
+
+
+def test_defaults_apply_without_config():
+    limiter = RateLimiter()
+    assert limiter.limits == DEFAULT_RATE_LIMITS
+
+
+def test_override_merges_key_by_key():
+    limiter = RateLimiter({'instagram': {'burst': 2}})
+    assert limiter.limits['instagram'] == {'per_hour': 20, 'burst': 2}
+    assert limiter.limits['youtube'] == DEFAULT_RATE_LIMITS['youtube']
+
+
+def test_new_period_replaces_the_default_one():
+    limiter = RateLimiter({'instagram': {'per_day': 50}})
+    assert limiter.limits['instagram'] == {'per_day': 50, 'burst': 4}
+    assert limiter.bucket('instagram').rate == pytest.approx(50 / 86400)
+
+
+def test_unknown_platform_is_added():
+    limiter = RateLimiter({'threads': {'per_minute': 6}})
+    bucket = limiter.bucket('threads')
+    assert bucket.rate == pytest.approx(0.1)
+    assert bucket.capacity == 6
+
+
+@pytest.mark.parametrize('limit', [{'per_hour': 0}, {'per_day': -1}])
+def test_non_positive_rate_is_rejected(limit):
+    with pytest.raises(ValueError):
+        RateLimiter({'instagram': limit})
+
+
+def test_from_config_ignores_scalar_settings():
+    limiter = RateLimiter.from_config({'max_wait': 5, 'bandwidth_mbps': 10,
+                                       'tiktok': {'per_day': 3}})
+    assert limiter.max_wait == 5
+    assert 'bandwidth_mbps' not in limiter.limits
+    assert limiter.limits['tiktok'] == {'per_day': 3, 'burst': 5}
+
+
+def test_buckets_are_per_account():
+    limiter = RateLimiter({'instagram': {'per_hour': 1, 'burst': 1}}, max_wait=0)
+    assert limiter.acquire('instagram', 'alice')
+    assert not limiter.acquire('instagram', 'alice')
+    assert limiter.acquire('instagram', 'bob')
+
+
+def test_bucket_reserves_into_debt():
+    bucket = TokenBucket(rate=1000, capacity=1)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) > 0
+    assert bucket.reserve(100, max_wait=0.001) is None
@@ -0,0 +1,116 @@
+"""Tests for error classification and circuit breakers"""
+
+import pytest
+
+from modules import retry
+from modules.retry import (CircuitBreaker, RetryPolicy, UnconfirmedPostError,
+                           classify_error, FATAL, RATE_LIMITED, TRANSIENT)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(retry.time, 'monotonic', clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker('instagram', failure_threshold=2, reset_timeout=60)
+    breaker.record_failure(TRANSIENT)
+    assert breaker.allow()
+
+    breaker.record_failure(RATE_LIMITED)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == pytest.approx(60)
+
+
+def test_breaker_half_opens_for_one_trial(clock):
+    breaker = CircuitBreaker('instagram', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(TRANSIENT)
+
+    clock.now += 61
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker('instagram', failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_failure(TRANSIENT)
+    clock.now += 61
+    assert breaker.allow()
+
+    breaker.record_failure(TRANSIENT)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_retry_after_extends_open_time(clock):
+    breaker = CircuitBreaker('youtube', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(RATE_LIMITED, hint=600)
+    clock.now += 61
+    assert not breaker.allow()
+    clock.now += 540
+    assert breaker.allow()
+
+
+def test_fatal_errors_do_not_count(clock):
+    breaker = CircuitBreaker('instagram', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(FATAL)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure(TRANSIENT)
+    clock.now += 61
+    assert breaker.allow()
+    # A fatal trial says nothing about the endpoint but must not leave it half-open
+    breaker.record_failure(FATAL)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize('error, expected', [
+    (StatusError(429), RATE_LIMITED),
+    (StatusError(503), TRANSIENT),
+    (StatusError(400), FATAL),
+    (ConnectionResetError(), TRANSIENT),
+    (Exception("Please wait a few minutes"), RATE_LIMITED),
+    (Exception("bad caption"), FATAL),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_unconfirmed_post_is_classified_by_its_cause():
+    try:
+        try:
+            raise StatusError(503)
+        except StatusError as e:
+            raise UnconfirmedPostError("publish timed out") from e
+    except UnconfirmedPostError as e:
+        assert classify_error(e) == TRANSIENT
+
+
+def test_rate_limit_delay_honours_retry_after():
+    policy = RetryPolicy(base_delay=1, max_delay=10, rate_limit_delay=4)
+    assert 2 <= policy.delay(1, RATE_LIMITED) <= 4
+    assert policy.delay(1, TRANSIENT, hint=30) == 30
@@ -0,0 +1,86 @@
+"""Tests for memory-mapped upload bodies"""
+
+import socket
+
+import pytest
+
+from modules.upload_body import UploadBody
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(DATA)
+    return str(path)
+
+
+def test_iterates_the_whole_file_in_chunks(video):
+    progress = []
+    with UploadBody(video, chunk_size=4096, progress=lambda sent, total: progress.append((sent, total))) as body:
+        chunks = [bytes(chunk) for chunk in body]
+
+    assert len(body) == len(DATA)
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 2048]
+    assert b''.join(chunks) == DATA
+    assert progress[-1] == (len(DATA), len(DATA))
+
+
+def test_slices_are_relative_and_share_the_mapping(video):
+    with UploadBody(video, chunk_size=1000) as body:
+        part = body.slice(1000, 3500)
+        assert len(part) == 2500
+        assert b''.join(bytes(chunk) for chunk in part) == DATA[1000:3500]
+
+        nested = part.slice(500, 600)
+        assert b''.join(bytes(chunk) for chunk in nested) == DATA[1500:1600]
+
+        part.close()
+        # Closing a slice leaves the parent usable
+        assert bytes(next(iter(body))) == DATA[:1000]
+
+
+def test_ranges_are_clamped_to_the_file(video):
+    with UploadBody(video, start=10000, end=20000) as body:
+        assert len(body) == len(DATA) - 10000
+        assert b''.join(bytes(chunk) for chunk in body) == DATA[10000:]
+    assert len(UploadBody(video, start=5000, end=100)) == 0
+
+
+def test_close_releases_the_mapping(video):
+    body = UploadBody(video, chunk_size=4096).open()
+    for _ in body:
+        pass
+    body.close()
+    assert body._mmap is None and body._file is None
+    body.close()
+
+
+def test_throttle_sees_every_chunk(video):
+    throttled = []
+    with UploadBody(video, chunk_size=3000, throttle=throttled.append) as body:
+        list(body)
+    assert throttled == [3000, 3000, 3000, 1240]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.mp4"
+    path.write_bytes(b'')
+    with UploadBody(str(path)) as body:
+        assert len(body) == 0
+        assert list(body) == []
+
+
+def test_sendfile_sends_the_range(video):
+    left, right = socket.socketpair()
+    try:
+        with UploadBody(video, chunk_size=1024) as body:
+            assert body.slice(100, 2100).sendfile(left) == 2000
+        left.close()
+        received = b''
+        while len(received) < 2000:
+            received += right.recv(4096)
+        assert received == DATA[100:2100]
+    finally:
+        right.close()
@@ -0,0 +1,54 @@
+"""Tests for the prepared video cache"""
+
+import os
+
+from modules.video_cache import PreparedVideoCache
+
+
+def add(cache, tmp_path, key, size=10):
+    path = tmp_path / f"{key}.src.mp4"
+    path.write_bytes(b'x' * size)
+    return cache.put(key * 64, str(path))
+
+
+def test_hits_are_saved_without_a_put(tmp_path):
+    cache_dir = str(tmp_path / "prepared")
+    writer = PreparedVideoCache(cache_dir)
+    add(writer, tmp_path, 'a')
+
+    reader = PreparedVideoCache(cache_dir)
+    assert reader.get('a' * 64)
+    assert reader.get('a' * 64)
+    assert reader.get('z' * 64) is None
+    reader.close()
+
+    stats = PreparedVideoCache(cache_dir).stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+
+
+def test_lookups_do_not_rewrite_the_index(tmp_path):
+    cache = PreparedVideoCache(str(tmp_path / "prepared"))
+    add(cache, tmp_path, 'a')
+    mtime = os.stat(cache.index_path).st_mtime_ns
+
+    assert cache.get('a' * 64)
+    assert os.stat(cache.index_path).st_mtime_ns == mtime
+
+
+def test_lru_order_survives_across_instances(tmp_path):
+    cache_dir = str(tmp_path / "prepared")
+    writer = PreparedVideoCache(cache_dir, max_bytes=25)
+    add(writer, tmp_path, 'a')
+    add(writer, tmp_path, 'b')
+
+    # Another process only reads the older entry
+    reader = PreparedVideoCache(cache_dir, max_bytes=25)
+    assert reader.get('a' * 64)
+    reader.close()
+
+    add(PreparedVideoCache(cache_dir, max_bytes=25), tmp_path, 'c')
+    cache = PreparedVideoCache(cache_dir, max_bytes=25)
+    assert cache.get('a' * 64)
+    assert cache.get('b' * 64) is None
+    assert cache.get('c' * 64)
+    assert cache.stats()['evictions'] == 1
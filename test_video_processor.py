@@ -0,0 +1,190 @@
+"""Tests for encode planning and the prepared output cache keys"""
+
+import pytest
+import yaml
+
+from modules.video_processor import VideoProcessor
+
+
+@pytest.fixture
+def processor(tmp_path):
+    config = {
+        'video': {'max_size_mb': 100, 'probe_cache': str(tmp_path / "probe.json")},
+        'cache': {'fingerprints': str(tmp_path / "fingerprints.json"),
+                  'prepared_dir': str(tmp_path / "prepared"),
+                  'thumbnails_dir': str(tmp_path / "thumbnails")}
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return VideoProcessor(str(config_path))
+
+
+def info(**fields):
+    """Probe dict of an H.264/AAC 1080p clip that every platform accepts"""
+    return {'duration': 30.0, 'size_mb': 20.0, 'format': '.mp4', 'video_codec': 'h264',
+            'video_profile': 'High', 'video_level': 40, 'pix_fmt': 'yuv420p',
+            'has_audio': True, 'audio_codec': 'aac', 'video_bitrate_kbps': 5000, **fields}
+
+
+@pytest.mark.parametrize('path, fields, platform, action', [
+    ("clip.mp4", {}, 'instagram', 'passthrough'),
+    ("clip.mov", {}, 'instagram', 'remux'),
+    ("clip.mov", {'video_codec': 'hevc'}, 'instagram', 'transcode'),
+    ("clip.mov", {'video_codec': 'hevc'}, 'youtube', 'remux'),
+    ("clip.mp4", {'size_mb': 150.0}, 'instagram', 'transcode'),
+    ("clip.mp4", {'video_bitrate_kbps': 30000}, 'instagram', 'transcode'),
+    ("clip.mp4", {'duration': 1000.0}, 'instagram', 'refuse'),
+    ("clip.mp4", {'duration': 1000.0}, 'youtube', 'passthrough'),
+])
+def test_plan_action(processor, path, fields, platform, action):
+    plan = processor.plan_encode(path, info(**fields), processor.profile_for(platform))
+    assert plan['action'] == action
+
+
+def test_refuse_explains_itself(processor):
+    plan = processor.plan_encode("clip.mp4", info(duration=1000.0), processor.profile_for('tiktok'))
+    assert plan['action'] == 'refuse'
+    assert 'tiktok' in plan['error'] and 'trim' in plan['error']
+
+
+def test_trim_when_the_profile_allows_it(processor):
+    profile = {**processor.profile_for('tiktok'), 'trim': True}
+    plan = processor.plan_encode("clip.mp4", info(duration=1000.0), profile)
+    assert plan['action'] == 'remux'
+    assert plan['trim_to'] == 600
+    assert plan['duration'] == 600
+
+
+def test_oversize_targets_the_limit(processor):
+    plan = processor.plan_encode("clip.mp4", info(size_mb=150.0), processor.profile_for('instagram'))
+    assert plan['target_size_mb'] == 100
+    assert plan['output_path'] == "clip_compressed.mp4"
+    assert processor.min_video_bitrate_kbps <= plan['video_bitrate_kbps'] <= 25000
+
+
+def test_bitrate_cap_without_size_target(processor):
+    plan = processor.plan_encode("clip.mp4", info(video_bitrate_kbps=30000),
+                                 processor.profile_for('instagram'))
+    assert plan['video_bitrate_kbps'] == 25000
+    assert plan['target_size_mb'] is None
+
+
+def test_failed_remux_is_cached_as_a_transcode(processor, tmp_path, monkeypatch):
+    source = tmp_path / "clip.mov"
+    source.write_bytes(b'source')
+    monkeypatch.setattr(processor, 'get_video_info', lambda path: info(format='.mov'))
+    monkeypatch.setattr(processor, '_remux', lambda *args: False)
+    encodes = []
+
+    def transcode(plan, output_path, bitrate=None, segment=None):
+        encodes.append(plan['action'])
+        with open(output_path, 'wb') as f:
+            f.write(b'encoded')
+        return True
+
+    monkeypatch.setattr(processor, '_transcode', transcode)
+    profile = processor.profile_for('instagram')
+    remux_plan = processor.plan_encode(str(source), info(format='.mov'), profile)
+    remux_key = processor.cache.make_key(str(source), processor._cache_params(remux_plan))
+
+    report = processor.prepare(str(source), profile)
+    assert (report['action'], report['cached']) == ('transcode', False)
+    assert processor.cache.get(remux_key) is None
+
+    # A repeat finds the fallback instead of trying the remux again
+    again = processor.prepare(str(source), profile)
+    assert again['cached'] and again['path'] == report['path']
+    assert encodes == ['transcode']
+
+
+class FakeEncoder:
+    """Stands in for ffmpeg: output size follows bitrate x seconds, times a full-encode factor"""
+
+    def __init__(self, duration, full_factor=1.0):
+        self.duration = duration
+        self.full_factor = full_factor
+        self.full_bitrates = []
+
+    def __call__(self, plan, output_path, bitrate=None, segment=None):
+        seconds = segment[1] if segment else self.duration
+        # No bitrate means a CRF encode: pretend it averages 1000k
+        size = (bitrate or 1000) * 1024 / 8 * seconds
+        if not segment:
+            self.full_bitrates.append(bitrate)
+            size *= self.full_factor
+        with open(output_path, 'wb') as f:
+            f.write(b'\0' * int(size))
+        return True
+
+
+@pytest.fixture
+def size_encoder(processor, tmp_path, monkeypatch):
+    processor.audio_bitrate_kbps = 0
+    processor.min_video_bitrate_kbps = 5
+
+    def install(duration, full_factor=1.0):
+        encoder = FakeEncoder(duration, full_factor)
+        monkeypatch.setattr(processor, '_transcode', encoder)
+        plan = {'output_path': str(tmp_path / "out.mp4"), 'max_video_kbps': None}
+        return encoder, plan
+
+    return install
+
+
+def test_size_encode_converges_in_one_full_pass(processor, size_encoder):
+    encoder, plan = size_encoder(duration=300)
+    result = processor.encode_to_size(plan, plan['output_path'], 1, 300)
+
+    assert result['full_passes'] == 1
+    assert result['sample_passes'] >= 1
+    assert 1 * (1 - processor.size_margin - processor.size_tolerance) <= result['size_mb'] <= 1
+    assert processor.stats['size_full_passes'] == 1
+
+
+def test_size_encode_re_encodes_when_samples_underestimate(processor, size_encoder):
+    encoder, plan = size_encoder(duration=300, full_factor=1.2)
+    result = processor.encode_to_size(plan, plan['output_path'], 1, 300)
+
+    assert result['full_passes'] == 2
+    assert encoder.full_bitrates[1] < encoder.full_bitrates[0]
+    assert result['size_mb'] <= 1
+
+
+def test_size_encode_stops_at_the_minimum_bitrate(processor, size_encoder):
+    encoder, plan = size_encoder(duration=300)
+    processor.min_video_bitrate_kbps = 100
+    result = processor.encode_to_size(plan, plan['output_path'], 1, 300)
+
+    # Cannot fit, but never goes below the floor or loops on full encodes
+    assert encoder.full_bitrates == [100]
+    assert result['full_passes'] == 1
+    assert result['size_mb'] > 1
+
+
+def test_size_encode_respects_the_platform_bitrate_ceiling(processor, size_encoder):
+    encoder, plan = size_encoder(duration=300)
+    plan['max_video_kbps'] = 10
+    result = processor.encode_to_size(plan, plan['output_path'], 1, 300)
+
+    assert max(encoder.full_bitrates) <= 10
+    assert result['full_passes'] == 1
+
+
+def test_size_encode_without_duration_runs_one_crf_pass(processor, size_encoder):
+    encoder, plan = size_encoder(duration=10)
+    result = processor.encode_to_size(plan, plan['output_path'], 1, None)
+
+    assert encoder.full_bitrates == [None]
+    assert (result['full_passes'], result['bitrate_kbps']) == (1, None)
+    assert result['size_mb'] > 1
+    assert processor.stats['size_full_passes'] == 1
+
+
+def test_compress_refuses_what_the_profile_refuses(processor, tmp_path, monkeypatch):
+    source = tmp_path / "long.mp4"
+    source.write_bytes(b'source')
+    processor.ffmpeg_path = 'ffmpeg'
+    monkeypatch.setattr(processor, 'get_video_info', lambda path: info(duration=1000.0, size_mb=150.0))
+    monkeypatch.setattr(processor, '_transcode', lambda *args, **kwargs: pytest.fail("encoded"))
+
+    assert processor.compress_video(str(source)) is None
@@ -0,0 +1,43 @@
+"""Tests for the resumable YouTube uploader against the local fake endpoint"""
+
+import hashlib
+
+from modules.fake_platform import FakePlatformServer
+from modules.youtube_upload import ResumableUploader, CHUNK_MULTIPLE
+
+
+def make_video(tmp_path, size):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(range(256)) * (size // 256))
+    return str(path)
+
+
+def test_upload_resumes_after_dropped_connections(tmp_path):
+    video_path = make_video(tmp_path, 4 * CHUNK_MULTIPLE)
+    with FakePlatformServer(drop_offsets=[CHUNK_MULTIPLE // 2, 3 * CHUNK_MULTIPLE]) as server:
+        uploader = ResumableUploader(upload_url=server.upload_url, chunk_size=2 * CHUNK_MULTIPLE,
+                                     resume_delay=0.01)
+        acknowledged = []
+        result = uploader.upload(video_path, {'snippet': {'title': 'test'}},
+                                 progress=lambda sent, total: acknowledged.append(sent))
+        stats = server.stats()
+
+    with open(video_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    assert result['resumes'] == 2
+    assert result['bytes'] == 4 * CHUNK_MULTIPLE
+    assert result['resource']['snippet'] == {'title': 'test'}
+    assert result['resource']['fileDetails']['sha256'] == digest
+    assert stats['drops'] == 2
+    assert stats['posts'] == 1
+    assert acknowledged[-1] == 4 * CHUNK_MULTIPLE
+
+
+def test_upload_without_drops(tmp_path):
+    video_path = make_video(tmp_path, CHUNK_MULTIPLE)
+    with FakePlatformServer() as server:
+        uploader = ResumableUploader(upload_url=server.upload_url)
+        result = uploader.upload(video_path, lambda: {'snippet': {'title': 'built lazily'}})
+
+    assert result['resumes'] == 0
+    assert result['resource']['snippet']['title'] == 'built lazily'
@@ -1,5 +1,6 @@
 # Hard-coded Video Configuration
 # Each video has multiple captions that will rotate daily
+# Optional per video: "cover_time": seconds into the video to take the cover frame from
 
 VIDEO_CONFIG = {
     "Addio.MOV": {
@@ -93,4 +94,6 @@ DAILY_SCHEDULE = {
 UPLOAD_TIMES = ["09:00", "12:00", "18:00", "23:00"]  # 9am, 12pm, 6pm, 11pm
 
 # Platform settings - upload to multiple platforms
+# Name an Instagram account from config.yaml instagram.accounts as "instagram:<name>"
+# to post the same video from several creator accounts
 PLATFORMS = ["instagram"]  # Instagram only for now (YouTube coming soon)